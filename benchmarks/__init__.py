@@ -0,0 +1,5 @@
+"""Бенчмарки приложения orders.
+
+Запуск из корня проекта, например: python -m benchmarks.async_views --help
+Каждый бенчмарк работает с отдельной временной базой SQLite и не трогает db.sqlite3.
+"""
@@ -0,0 +1,91 @@
+"""Пропускная способность синхронного (WSGI) и асинхронного (ASGI) API.
+
+Синхронные представления обслуживаются пулом из --workers потоков,
+асинхронные - одним циклом событий с тем же числом одновременных запросов.
+
+    python -m benchmarks.async_views --orders 5000 --requests 500 --workers 8
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import remove_database, seed, setup_django, write_results
+
+ROUTES = [
+    ('orders_page', 'orders/?limit=100'),
+    ('order_detail', 'orders/{order_id}/'),
+    ('menu', 'menu/'),
+    ('revenue', 'revenue/'),
+    ('statistics', 'statistics/'),
+]
+
+
+def run_sync(path, requests, workers):
+    from django.test import Client
+    
+    def call(_):
+        response = Client().get(path)
+        assert response.status_code == 200, response.status_code
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(call, range(requests)))
+    return time.perf_counter() - started
+
+
+def run_async(path, requests, workers):
+    from django.test import AsyncClient
+    
+    async def main():
+        semaphore = asyncio.Semaphore(workers)
+        client = AsyncClient()
+        
+        async def call():
+            async with semaphore:
+                response = await client.get(path)
+                assert response.status_code == 200, response.status_code
+        
+        started = time.perf_counter()
+        await asyncio.gather(*(call() for _ in range(requests)))
+        return time.perf_counter() - started
+    
+    return asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=5000)
+    parser.add_argument('--menu-items', type=int, default=30)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--no-cache', action='store_true', help='отключить кеш ответов API')
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    args = parser.parse_args()
+    
+    db_path = setup_django(cache_enabled=not args.no_cache)
+    try:
+        seed(orders=args.orders, menu_items=args.menu_items)
+        from orders.models import Order
+        order_id = Order.objects.order_by('id').values_list('id', flat=True).first()
+        
+        results = {
+            'benchmark': 'async_views',
+            'params': vars(args),
+            'routes': {},
+        }
+        for name, route in ROUTES:
+            route = route.format(order_id=order_id)
+            sync_time = run_sync(f'/api/{route}', args.requests, args.workers)
+            async_time = run_async(f'/api/async/{route}', args.requests, args.workers)
+            results['routes'][name] = {
+                'sync_rps': round(args.requests / sync_time, 1),
+                'async_rps': round(args.requests / async_time, 1),
+            }
+        write_results(results, args.output)
+    finally:
+        remove_database(db_path)
+
+
+if __name__ == '__main__':
+    main()
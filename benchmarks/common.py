@@ -0,0 +1,154 @@
+"""Общая подготовка окружения для бенчмарков"""
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+DISH_NAMES = [
+    'Борщ', 'Солянка', 'Уха', 'Цезарь', 'Оливье', 'Греческий салат', 'Пельмени', 'Стейк',
+    'Котлета по-киевски', 'Плов', 'Блины', 'Сырники', 'Чизкейк', 'Медовик', 'Эспрессо',
+    'Капучино', 'Чай', 'Морс', 'Лимонад', 'Сок',
+]
+
+
+def setup_django(db_path=None, cache_enabled=True, migrate=True):
+    """Настраивает Django на временную базу и применяет миграции.
+    
+    Возвращает путь к файлу базы.
+    """
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cafe_orders.settings')
+    
+    import django
+    from django.conf import settings
+    django.setup()
+    
+    if db_path is None:
+        handle, db_path = tempfile.mkstemp(prefix='cafe_bench_', suffix='.sqlite3')
+        os.close(handle)
+        os.remove(db_path)
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
+    # Отладочный режим копит все SQL-запросы в памяти и искажает замеры
+    settings.DEBUG = False
+    if not cache_enabled:
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+    
+    if migrate:
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0, interactive=False)
+    return db_path
+
+
+def remove_database(db_path):
+    """Удаляет файл базы вместе с журналами WAL"""
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def seed(orders=1000, menu_items=20, items_per_order=(1, 6), tables=30, random_seed=42):
+    """Заполняет базу меню и заказами с реалистичным числом позиций"""
+    from orders import rollups
+    from orders.models import MenuItem, Order, OrderLine
+    
+    rng = random.Random(random_seed)
+    categories = [code for code, _ in MenuItem.CATEGORY_CHOICES]
+    menu = [
+        MenuItem(
+            name=DISH_NAMES[i % len(DISH_NAMES)] + ('' if i < len(DISH_NAMES) else f' {i}'),
+            price=Decimal(rng.randrange(100, 2000)) / 100,
+            category=categories[i % len(categories)],
+        )
+        for i in range(menu_items)
+    ]
+    MenuItem.objects.bulk_create(menu)
+    
+    statuses = ['waiting', 'ready', 'paid', 'paid', 'paid']
+    batch = []
+    for _ in range(orders):
+        picked = rng.choices(menu, k=rng.randint(*items_per_order))
+        items = [{'name': item.name, 'price': float(item.price)} for item in picked]
+        batch.append(Order(
+            table_number=rng.randint(1, tables),
+            items=items,
+            status=rng.choice(statuses),
+            total_price=sum(Decimal(str(item['price'])) for item in items),
+        ))
+        if len(batch) >= 1000:
+            _insert(batch, Order, OrderLine)
+            batch = []
+    if batch:
+        _insert(batch, Order, OrderLine)
+    rollups.rebuild()
+
+
+def _insert(batch, Order, OrderLine):
+    Order.objects.bulk_create(batch)
+    OrderLine.objects.bulk_create(OrderLine.build_for_orders(batch))
+
+
+def percentiles(samples):
+    """Сводка по замерам в миллисекундах: перцентили, среднее, минимум и максимум"""
+    ordered = sorted(samples)
+    
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+    
+    return {
+        'count': len(ordered),
+        'min_ms': round(ordered[0] * 1000, 3),
+        'p50_ms': round(pick(0.50) * 1000, 3),
+        'p90_ms': round(pick(0.90) * 1000, 3),
+        'p95_ms': round(pick(0.95) * 1000, 3),
+        'p99_ms': round(pick(0.99) * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+    }
+
+
+def measure(func, iterations, warmup=5):
+    """Выполняет func заданное число раз и возвращает длительности вызовов в секундах"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def environment():
+    """Сведения об окружении, чтобы результаты разных запусков можно было сравнивать"""
+    import django
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'platform': platform.platform(),
+    }
+
+
+def write_results(results, output=None):
+    """Печатает результаты в JSON или сохраняет их в файл"""
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
@@ -0,0 +1,41 @@
+"""Сравнение двух JSON-результатов benchmarks.run.
+
+    python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import json
+
+METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps')
+
+
+def flatten(results):
+    rows = {}
+    for section in ('routes', 'micro'):
+        for name, values in results.get(section, {}).items():
+            rows[f'{section}.{name}'] = values
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('before')
+    parser.add_argument('after')
+    args = parser.parse_args()
+    
+    with open(args.before, encoding='utf-8') as f:
+        before = flatten(json.load(f))
+    with open(args.after, encoding='utf-8') as f:
+        after = flatten(json.load(f))
+    
+    print(f"{'name':40} {'metric':15} {'before':>12} {'after':>12} {'change':>9}")
+    for name in sorted(before.keys() & after.keys()):
+        for metric in METRICS:
+            if metric not in before[name] or metric not in after[name]:
+                continue
+            old, new = before[name][metric], after[name][metric]
+            change = f'{(new - old) / old * 100:+.1f}%' if old else 'n/a'
+            print(f'{name:40} {metric:15} {old:12.3f} {new:12.3f} {change:>9}')
+
+
+if __name__ == '__main__':
+    main()
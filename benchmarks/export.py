@@ -0,0 +1,66 @@
+"""Память и скорость потоковой выгрузки заказов (orders.export).
+
+Выгрузка прогоняется на хвостах базы разного размера (курсор after);
+пиковая память Python (tracemalloc) должна оставаться примерно одинаковой,
+а время - расти линейно.
+
+    python -m benchmarks.export --orders 20000 80000 --format csv --lines
+"""
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.common import environment, remove_database, seed, setup_django, write_results
+
+
+def run_export(export_format, lines, compress, after):
+    from orders import export
+    
+    size = 0
+    tracemalloc.start()
+    started = time.perf_counter()
+    for chunk in export.export_stream(export_format, lines=lines, compress=compress, after=after):
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'seconds': round(elapsed, 3),
+        'bytes': size,
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, nargs='+', default=[20000, 80000], help='размеры выгрузок')
+    parser.add_argument('--format', choices=('csv', 'ndjson'), default='csv')
+    parser.add_argument('--lines', action='store_true', help='по строке на позицию заказа')
+    parser.add_argument('--gzip', action='store_true')
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    args = parser.parse_args()
+    
+    db_path = setup_django()
+    try:
+        seed(orders=max(args.orders), menu_items=40)
+        from orders.models import Order
+        
+        last_id = Order.objects.order_by('-id').values_list('id', flat=True).first()
+        runs = []
+        for orders in sorted(args.orders):
+            result = run_export(args.format, args.lines, args.gzip, after=last_id - orders)
+            result['orders'] = orders
+            result['orders_per_sec'] = round(orders / result['seconds'], 1)
+            runs.append(result)
+        write_results({
+            'benchmark': 'export',
+            'environment': environment(),
+            'params': vars(args),
+            'runs': runs,
+        }, args.output)
+    finally:
+        remove_database(db_path)
+
+
+if __name__ == '__main__':
+    main()
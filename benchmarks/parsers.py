@@ -0,0 +1,140 @@
+"""Разбор состава заказа: прежний цикл OrderForm.clean против orders.parsers.
+
+Прежний путь - re.match без компиляции на каждую строку, float-цены и
+словарь с кортежами-ключами; новый - orders.parsers с ценами в Decimal.
+Замеряются разбор текста, разбор JSON, вся обработка состава в clean()
+(оба ввода и объединение) и OrderForm.is_valid() целиком.
+
+    python -m benchmarks.parsers --lines 1000
+"""
+import argparse
+import json
+import random
+import re
+
+from benchmarks.common import DISH_NAMES, environment, measure, percentiles, remove_database, setup_django, write_results
+
+
+def legacy_parse_text(items_text):
+    unique_items = {}
+    errors = []
+    for line in items_text.strip().split('\n'):
+        if not line.strip():
+            continue
+        match = re.match(r'(.+?)\s*-\s*(\d+(?:\.\d+)?)', line)
+        if match:
+            name = match.group(1).strip()
+            try:
+                price = float(match.group(2))
+                item_key = (name, price)
+                if item_key not in unique_items:
+                    unique_items[item_key] = {"name": name, "price": price}
+            except ValueError:
+                errors.append(f'Некорректная цена в строке: "{line}"')
+        else:
+            errors.append(f'Некорректный формат в строке: "{line}". Используйте формат "название - цена"')
+    return list(unique_items.values()), errors
+
+
+def legacy_parse_json(json_items):
+    unique_items = {}
+    errors = []
+    for item in json_items:
+        if isinstance(item, dict) and 'name' in item and 'price' in item:
+            try:
+                price = float(item['price'])
+                unique_items.setdefault((item['name'], price), {"name": item['name'], "price": price})
+            except (ValueError, TypeError):
+                errors.append(f'Некорректная цена для блюда "{item["name"]}"')
+        else:
+            errors.append('Каждый элемент должен содержать поля "name" и "price"')
+    return list(unique_items.values()), errors
+
+
+def legacy_clean(items_text, items_json):
+    """Тело прежнего OrderForm.clean: текст, JSON и объединение без повторов"""
+    unique_items = {}
+    text_items, _ = legacy_parse_text(items_text)
+    json_items, _ = legacy_parse_json(json.loads(items_json))
+    for item in text_items + json_items:
+        unique_items.setdefault((item['name'], item['price']), item)
+    return list(unique_items.values())
+
+
+def summarize(samples, lines):
+    summary = percentiles(samples)
+    summary['lines_per_sec'] = round(lines / summary['p50_ms'] * 1000, 1)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=1000, help='число строк в заказе')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    args = parser.parse_args()
+    
+    db_path = setup_django()
+    try:
+        from orders import parsers
+        from orders.forms import OrderForm
+        
+        # Банкетный заказ: блюда и цены из меню, у части строк указано количество
+        rng = random.Random(42)
+        menu = [(name, rng.randrange(100, 100000) / 100) for name in DISH_NAMES]
+        lines = []
+        for i in range(args.lines):
+            name, price = menu[i % len(menu)]
+            name = f'{name} (гость {i})'
+            lines.append((name, price, rng.randint(2, 5) if i % 5 == 0 else 1))
+        text = '\n'.join(
+            f'{name} x{quantity} - {price}' if quantity > 1 else f'{name} - {price}' for name, price, quantity in lines
+        )
+        json_items = [{'name': name, 'price': price} for name, price, _ in lines]
+        items_json = json.dumps(json_items, ensure_ascii=False)
+        
+        def parse_text_fast():
+            items, errors = parsers.parse_text(text)
+            return parsers.merge_items(items), errors
+        
+        def parse_json_fast():
+            items, errors = parsers.parse_json_items(json_items)
+            return parsers.merge_items(items), errors
+        
+        def clean_fast():
+            text_items, _ = parsers.parse_text(text)
+            json_items, _ = parsers.parse_json_items(json.loads(items_json))
+            return parsers.merge_items(text_items, json_items)
+        
+        def form_clean():
+            form = OrderForm(data={'table_number': 1, 'items_text': text, 'items': items_json})
+            assert form.is_valid(), form.errors
+        
+        results = {
+            'benchmark': 'parsers',
+            'environment': environment(),
+            'params': vars(args),
+            'text': {
+                'legacy': summarize(measure(lambda: legacy_parse_text(text), args.iterations), args.lines),
+                'fast': summarize(measure(parse_text_fast, args.iterations), args.lines),
+            },
+            'json': {
+                'legacy': summarize(measure(lambda: legacy_parse_json(json_items), args.iterations), args.lines),
+                'fast': summarize(measure(parse_json_fast, args.iterations), args.lines),
+            },
+            'clean': {
+                'legacy': summarize(measure(lambda: legacy_clean(text, items_json), args.iterations), args.lines * 2),
+                'fast': summarize(measure(clean_fast, args.iterations), args.lines * 2),
+            },
+            'form_clean': summarize(measure(form_clean, args.iterations // 4), args.lines * 2),
+        }
+        for section in ('text', 'json', 'clean'):
+            legacy, fast = results[section]['legacy'], results[section]['fast']
+            results[section]['speedup'] = round(fast['lines_per_sec'] / legacy['lines_per_sec'], 2)
+        write_results(results, args.output)
+    finally:
+        remove_database(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Цены по меню и итог заказа: прежний путь против orders.pricing на заказах из 1-500 строк.
+
+Прежний путь - цены клиента как есть и сумма Decimal(str(price)) в
+Order.save(), который при каждом сохранении без update_fields пересчитывает
+итог и пересоздает позиции OrderLine. Новый - clean_order_payload с ценами
+из таблицы цен меню и итогом, посчитанным один раз при приеме заказа.
+Замеряются прием и создание заказа и повторное сохранение без изменения
+состава (например, смена статуса через save()).
+
+    python -m benchmarks.pricing --lines 1 10 100 500
+"""
+import argparse
+import random
+
+from benchmarks.common import environment, measure, percentiles, remove_database, seed, setup_django, write_results
+from benchmarks.parsers import legacy_parse_json
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, nargs='+', default=[1, 10, 100, 500], help='число строк в заказе')
+    parser.add_argument('--menu-items', type=int, default=40)
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    args = parser.parse_args()
+    
+    db_path = setup_django()
+    try:
+        from orders.forms import clean_order_payload
+        from orders.models import MenuItem, Order
+        from orders.views import _build_order
+        
+        seed(orders=0, menu_items=args.menu_items)
+        menu = list(MenuItem.objects.values_list('id', 'name', 'price'))
+        rng = random.Random(42)
+        
+        results = {
+            'benchmark': 'pricing',
+            'environment': environment(),
+            'params': vars(args),
+            'sizes': {},
+        }
+        for lines in args.lines:
+            # Половина строк - блюда меню по id или названию, остальные - свободный ввод с ценой;
+            # в прежнем формате у каждой строки название и цена клиента
+            items = []
+            legacy_items = []
+            for i in range(lines):
+                item_id, name, price = rng.choice(menu)
+                if i % 2:
+                    name, price = f'{name} (гость {i})', rng.randrange(100, 100000) / 100
+                    items.append({'name': name, 'price': price})
+                else:
+                    items.append({'menu_item_id': item_id} if i % 4 == 0 else {'name': name})
+                legacy_items.append({'name': name, 'price': float(price)})
+            
+            def legacy_create():
+                parsed, _ = legacy_parse_json(legacy_items)
+                Order.objects.create(table_number=1, items=parsed)
+            
+            def create():
+                payload, errors = clean_order_payload({'table_number': 1, 'items': items})
+                assert not errors, errors
+                _build_order(payload).save()
+            
+            order = Order.objects.get(pk=Order.objects.create(table_number=2, items=legacy_items).pk)
+            
+            def legacy_resave():
+                # Прежний save(): итог и позиции пересчитываются при каждом вызове
+                order._priced_key = order._saved_key = None
+                order.save()
+            
+            results['sizes'][str(lines)] = size = {
+                'create': {
+                    'legacy': percentiles(measure(legacy_create, args.iterations)),
+                    'pricing': percentiles(measure(create, args.iterations)),
+                },
+                'resave': {
+                    'legacy': percentiles(measure(legacy_resave, args.iterations)),
+                    'pricing': percentiles(measure(order.save, args.iterations)),
+                },
+            }
+            for section in size.values():
+                section['speedup'] = round(section['legacy']['p50_ms'] / section['pricing']['p50_ms'], 2)
+        write_results(results, args.output)
+    finally:
+        remove_database(db_path)
+
+
+if __name__ == '__main__':
+    main()
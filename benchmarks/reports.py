@@ -0,0 +1,48 @@
+"""Отчет за период (orders.reports): NumPy против прохода по заказам на Python.
+
+Оба способа строят одинаковый отчет; время включает чтение данных из БД.
+
+    python -m benchmarks.reports --orders 100000 --iterations 5
+"""
+import argparse
+
+from benchmarks.common import environment, measure, percentiles, remove_database, seed, setup_django, write_results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--menu-items', type=int, default=40)
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    args = parser.parse_args()
+    
+    db_path = setup_django()
+    try:
+        seed(orders=args.orders, menu_items=args.menu_items)
+        from django.utils import timezone
+        from orders import reports
+        
+        if reports.np is None:
+            parser.error('для сравнения нужен NumPy (pip install numpy)')
+        day_to = timezone.localdate()
+        day_from = day_to.replace(day=1)
+        
+        results = {
+            'benchmark': 'reports',
+            'environment': environment(),
+            'params': vars(args),
+        }
+        for engine in reports.ENGINES:
+            samples = measure(lambda: reports.build_report(day_from, day_to, engine=engine), args.iterations, warmup=1)
+            summary = percentiles(samples)
+            summary['orders_per_sec'] = round(args.orders / summary['p50_ms'] * 1000, 1)
+            results[engine] = summary
+        results['speedup'] = round(results['numpy']['orders_per_sec'] / results['python']['orders_per_sec'], 2)
+        write_results(results, args.output)
+    finally:
+        remove_database(db_path)
+
+
+if __name__ == '__main__':
+    main()
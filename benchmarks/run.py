@@ -0,0 +1,215 @@
+"""Нагрузочный прогон маршрутов приложения и микробенчмарки.
+
+Заполняет временную базу набором данных заданного размера, измеряет задержки
+(перцентили) и пропускную способность для каждого маршрута из orders/urls.py,
+а также Order.save(), OrderForm.clean() и цикл JSON-сериализации заказов.
+Результат - JSON, который можно сравнить с предыдущим прогоном (benchmarks.compare).
+
+    python -m benchmarks.run --orders 10000 --menu-items 40 --output before.json
+    python -m benchmarks.run --live-server --concurrency 4
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import (
+    environment, measure, percentiles, remove_database, seed, setup_django, write_results,
+)
+
+# Маршруты, которые нельзя измерять простым запросом (бесконечный поток событий)
+SKIPPED_ROUTES = {'orders_api_events'}
+
+
+def build_requests(order_id):
+    """Запросы для каждого именованного маршрута orders/urls.py: имя -> (метод, путь, тело)"""
+    from django.urls import reverse
+    from orders import urls
+    
+    bulk_body = json.dumps([
+        {'table_number': 1, 'items': [{'name': 'Борщ', 'price': 8.5}, {'name': 'Чай', 'price': 2.0}]}
+        for _ in range(50)
+    ])
+    # Параметры запроса и тела для маршрутов, где недостаточно GET без параметров
+    overrides = {
+        'orders_api_list': ('GET', '?limit=100', None),
+        'orders_api_bulk': ('POST', '', bulk_body),
+        # Первый вызов оплачивает заказ, повторные ничего не меняют (ответ 200)
+        'orders_api_status': ('POST', '', json.dumps({'updates': [{'id': order_id, 'status': 'paid'}]})),
+    }
+    
+    requests = {}
+    for pattern in urls.urlpatterns:
+        if not pattern.name or pattern.name in SKIPPED_ROUTES:
+            continue
+        kwargs = {name: order_id for name in pattern.pattern.converters}
+        method, query, body = overrides.get(pattern.name, ('GET', '', None))
+        requests[pattern.name] = (method, reverse(pattern.name, kwargs=kwargs) + query, body)
+    return requests
+
+
+def make_client_call(method, path, body):
+    from django.test import Client
+    client = Client()
+    
+    def call():
+        if method == 'POST':
+            response = client.post(path, data=body, content_type='application/json')
+        else:
+            response = client.get(path)
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        assert response.status_code < 400, (path, response.status_code)
+        return len(content)
+    
+    return call
+
+
+def make_http_call(base_url, method, path, body):
+    def call():
+        request = urllib.request.Request(
+            base_url + path,
+            data=body.encode() if body else None,
+            method=method,
+            headers={'Content-Type': 'application/json'},
+        )
+        with urllib.request.urlopen(request) as response:
+            return len(response.read())
+    
+    return call
+
+
+def start_live_server():
+    """Запускает многопоточный WSGI-сервер в фоне, возвращает (базовый URL, функция остановки)"""
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+    
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+    
+    class BenchmarkHandler(WSGIHandler):
+        def get_response(self, request):
+            # Как и тестовый клиент, не проверяем CSRF: API вызывается без сессии браузера
+            request._dont_enforce_csrf_checks = True
+            return super().get_response(request)
+    
+    server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler, allow_reuse_address=False)
+    server.set_app(BenchmarkHandler())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return f'http://127.0.0.1:{server.server_port}', server.shutdown
+
+
+def bench_route(call, iterations, concurrency):
+    if concurrency <= 1:
+        started = time.perf_counter()
+        samples = measure(call, iterations)
+        elapsed = time.perf_counter() - started
+    else:
+        def timed(_):
+            started = time.perf_counter()
+            call()
+            return time.perf_counter() - started
+        
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(timed, range(iterations)))
+        elapsed = time.perf_counter() - started
+    result = percentiles(samples)
+    result['throughput_rps'] = round(iterations / elapsed, 1)
+    result['response_bytes'] = call()
+    return result
+
+
+def micro_benchmarks(iterations):
+    """Замеры Order.save(), OrderForm.clean() и цикла сериализации"""
+    from orders import serializers
+    from orders.forms import OrderForm
+    from orders.models import Order
+    
+    items = [{'name': f'Блюдо {i}', 'price': 100 + i} for i in range(10)]
+    results = {}
+    
+    def save_order():
+        Order(table_number=1, items=items).save()
+    results['order_save'] = percentiles(measure(save_order, iterations))
+    
+    form_data = {
+        'table_number': 3,
+        'items': json.dumps(items),
+        'items_text': '\n'.join(f'Блюдо текстом {i} - {150 + i}' for i in range(10)),
+    }
+    
+    def clean_form():
+        assert OrderForm(data=form_data).is_valid()
+    results['order_form_clean'] = percentiles(measure(clean_form, iterations))
+    
+    orders_query = Order.objects.order_by('id')[:1000]
+    
+    def serialize():
+        serializers.dumps(serializers.serialize_orders(orders_query))
+    summary = percentiles(measure(serialize, max(1, iterations // 10)))
+    summary['rows'] = orders_query.count()
+    summary['rows_per_sec'] = round(summary['rows'] / summary['p50_ms'] * 1000, 1)
+    results['serialize_orders'] = summary
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=5000, help='число заказов в наборе данных')
+    parser.add_argument('--menu-items', type=int, default=30, help='число блюд в меню')
+    parser.add_argument('--min-items', type=int, default=1, help='минимум позиций в заказе')
+    parser.add_argument('--max-items', type=int, default=6, help='максимум позиций в заказе')
+    parser.add_argument('--tables', type=int, default=30, help='число столов')
+    parser.add_argument('--iterations', type=int, default=200, help='запросов на маршрут')
+    parser.add_argument('--concurrency', type=int, default=1, help='одновременных запросов')
+    parser.add_argument('--seed', type=int, default=42, help='зерно генератора данных')
+    parser.add_argument('--live-server', action='store_true', help='измерять через HTTP на локальном сервере')
+    parser.add_argument('--no-cache', action='store_true', help='отключить кеш ответов API')
+    parser.add_argument('--skip-micro', action='store_true', help='не запускать микробенчмарки')
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    args = parser.parse_args()
+    
+    db_path = setup_django(cache_enabled=not args.no_cache)
+    stop_server = None
+    try:
+        started = time.perf_counter()
+        seed(orders=args.orders, menu_items=args.menu_items, items_per_order=(args.min_items, args.max_items),
+             tables=args.tables, random_seed=args.seed)
+        seed_seconds = time.perf_counter() - started
+        
+        from orders.models import Order
+        order_id = Order.objects.order_by('id').values_list('id', flat=True).first()
+        
+        if args.live_server:
+            base_url, stop_server = start_live_server()
+        
+        results = {
+            'benchmark': 'run',
+            'environment': environment(),
+            'params': vars(args),
+            'seed_seconds': round(seed_seconds, 3),
+            'routes': {},
+        }
+        for name, (method, path, body) in build_requests(order_id).items():
+            if args.live_server:
+                call = make_http_call(base_url, method, path, body)
+            else:
+                call = make_client_call(method, path, body)
+            results['routes'][name] = dict(bench_route(call, args.iterations, args.concurrency),
+                                           method=method, path=path)
+        
+        if not args.skip_micro:
+            results['micro'] = micro_benchmarks(args.iterations)
+        write_results(results, args.output)
+    finally:
+        if stop_server:
+            stop_server()
+        remove_database(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Скорость сериализации заказов и меню: прежний путь против orders.serializers.
+
+Прежний путь - экземпляры моделей, словарь на каждую строку и JsonResponse
+с DjangoJSONEncoder; новый - values_list и кодирование сразу в байты.
+Время включает чтение выборки из БД (каждый замер - новый запрос).
+
+    python -m benchmarks.serialization --orders 10000 --rows 5000
+"""
+import argparse
+
+from benchmarks.common import environment, measure, percentiles, remove_database, seed, setup_django, write_results
+
+
+def legacy_order(order):
+    return {
+        "id": order.id,
+        "table_number": order.table_number,
+        "items": order.items,
+        "status": order.status,
+        "total_price": float(order.total_price),
+        "created_at": order.created_at.isoformat(),
+    }
+
+
+def legacy_menu_item(item):
+    return {
+        "id": item.id,
+        "name": item.name,
+        "price": float(item.price),
+        "category": item.get_category_display(),
+        "description": item.description,
+    }
+
+
+def summarize(samples, rows):
+    summary = percentiles(samples)
+    summary['rows'] = rows
+    summary['rows_per_sec'] = round(rows / summary['p50_ms'] * 1000, 1)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=10000)
+    parser.add_argument('--menu-items', type=int, default=200)
+    parser.add_argument('--rows', type=int, default=5000, help='число заказов в одной выдаче')
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    args = parser.parse_args()
+    
+    db_path = setup_django()
+    try:
+        seed(orders=args.orders, menu_items=args.menu_items)
+        from django.http import JsonResponse
+        from orders import serializers
+        from orders.models import MenuItem, Order
+        
+        orders_query = Order.objects.order_by('id')[:args.rows]
+        menu_query = MenuItem.objects.order_by('name')
+        rows = orders_query.count()
+        menu_rows = menu_query.count()
+        
+        def orders_legacy():
+            return JsonResponse([legacy_order(order) for order in orders_query.all()], safe=False).content
+        
+        def orders_fast():
+            return serializers.JSONBytesResponse(serializers.serialize_orders(orders_query.all())).content
+        
+        def menu_legacy():
+            return JsonResponse([legacy_menu_item(item) for item in menu_query.all()], safe=False).content
+        
+        def menu_fast():
+            return serializers.JSONBytesResponse(serializers.serialize_menu(menu_query.all())).content
+        
+        results = {
+            'benchmark': 'serialization',
+            'environment': environment(),
+            'params': vars(args),
+            'json_backend': serializers.backend_name(),
+            'orders': {
+                'legacy': summarize(measure(orders_legacy, args.iterations), rows),
+                'fast': summarize(measure(orders_fast, args.iterations), rows),
+            },
+            'menu': {
+                'legacy': summarize(measure(menu_legacy, args.iterations * 10), menu_rows),
+                'fast': summarize(measure(menu_fast, args.iterations * 10), menu_rows),
+            },
+        }
+        for section in ('orders', 'menu'):
+            legacy, fast = results[section]['legacy'], results[section]['fast']
+            results[section]['speedup'] = round(fast['rows_per_sec'] / legacy['rows_per_sec'], 2)
+        write_results(results, args.output)
+    finally:
+        remove_database(db_path)
+
+
+if __name__ == '__main__':
+    main()
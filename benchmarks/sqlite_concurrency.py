@@ -0,0 +1,121 @@
+"""Смешанная нагрузка чтения и записи на SQLite из нескольких процессов.
+
+Имитирует несколько воркеров gunicorn: каждый процесс в течение --duration секунд
+читает заказы через /api/orders/<id>/ и меняет статусы через order_update_status.
+Прогон выполняется дважды - с настройками SQLite по умолчанию (CAFE_SQLITE_TUNING=0)
+и с настройками проекта (WAL, busy_timeout и т.д.) - на одинаковых копиях базы.
+
+    python -m benchmarks.sqlite_concurrency --workers 4 --duration 10 --write-ratio 0.2
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import time
+
+from benchmarks.common import environment, percentiles, remove_database, seed, setup_django, write_results
+
+STATUSES = ('waiting', 'ready', 'paid')
+
+
+def worker(db_path, tuned, duration, write_ratio, order_ids, worker_seed, results):
+    os.environ['CAFE_SQLITE_TUNING'] = '1' if tuned else '0'
+    setup_django(db_path, migrate=False)
+    from django.test import Client
+    
+    client = Client()
+    rng = random.Random(worker_seed)
+    stats = {'reads': 0, 'writes': 0, 'errors': 0, 'read_latency': [], 'write_latency': []}
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        order_id = rng.choice(order_ids)
+        is_write = rng.random() < write_ratio
+        started = time.perf_counter()
+        try:
+            if is_write:
+                response = client.post(f'/orders/update-status/{order_id}/', {'status': rng.choice(STATUSES)})
+                ok = response.status_code == 302
+            else:
+                response = client.get(f'/api/orders/{order_id}/')
+                ok = response.status_code == 200
+        except Exception:
+            # Типичная ошибка без настройки - OperationalError: database is locked
+            ok = False
+        elapsed = time.perf_counter() - started
+        if not ok:
+            stats['errors'] += 1
+        elif is_write:
+            stats['writes'] += 1
+            stats['write_latency'].append(elapsed)
+        else:
+            stats['reads'] += 1
+            stats['read_latency'].append(elapsed)
+    results.put(stats)
+
+
+def run_scenario(db_path, tuned, args, order_ids):
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(
+            db_path, tuned, args.duration, args.write_ratio, order_ids, args.seed + index, results,
+        ))
+        for index in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    
+    reads = sum(stats['reads'] for stats in collected)
+    writes = sum(stats['writes'] for stats in collected)
+    read_latency = [value for stats in collected for value in stats['read_latency']]
+    write_latency = [value for stats in collected for value in stats['write_latency']]
+    return {
+        'reads_per_sec': round(reads / args.duration, 1),
+        'writes_per_sec': round(writes / args.duration, 1),
+        'errors': sum(stats['errors'] for stats in collected),
+        'read_latency': percentiles(read_latency) if read_latency else None,
+        'write_latency': percentiles(write_latency) if write_latency else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=4, help='число процессов')
+    parser.add_argument('--duration', type=float, default=10, help='длительность сценария, секунд')
+    parser.add_argument('--write-ratio', type=float, default=0.2, help='доля запросов на запись')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    args = parser.parse_args()
+    
+    base_path = setup_django()
+    paths = []
+    try:
+        seed(orders=args.orders, random_seed=args.seed)
+        from django.db import connection
+        from orders.models import Order
+        order_ids = list(Order.objects.values_list('id', flat=True))
+        connection.close()
+        
+        results = {'benchmark': 'sqlite_concurrency', 'environment': environment(), 'params': vars(args)}
+        for name, tuned, journal_mode in (('default', False, 'DELETE'), ('tuned', True, 'WAL')):
+            path = f'{base_path}.{name}'
+            paths.append(path)
+            shutil.copyfile(base_path, path)
+            # Режим журнала хранится в самом файле базы, поэтому задаем его явно для каждой копии
+            with sqlite3.connect(path) as db:
+                db.execute(f'PRAGMA journal_mode = {journal_mode}')
+            results[name] = run_scenario(path, tuned, args, order_ids)
+        write_results(results, args.output)
+    finally:
+        for path in [base_path] + paths:
+            remove_database(path)
+
+
+if __name__ == '__main__':
+    main()
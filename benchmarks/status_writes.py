@@ -0,0 +1,120 @@
+"""Всплеск PATCH /api/orders/<id>/ со сменой статуса: сразу в БД против write-behind.
+
+Несколько потоков одного процесса (очередь write-behind у каждого процесса
+своя) в течение --duration секунд меняют статусы случайных заказов из
+--hot-orders. Прогон выполняется дважды на одинаковых копиях базы - с
+записью в транзакции запроса и с ORDERS_STATUS_WRITE_BEHIND = True; для
+второго замеряется и время записи остатка очереди после нагрузки.
+
+    python -m benchmarks.status_writes --threads 8 --duration 5 --hot-orders 200
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from benchmarks.common import environment, percentiles, remove_database, seed, setup_django, write_results
+
+STATUSES = ('waiting', 'ready', 'paid')
+
+
+def run(write_behind, threads, duration, order_ids, journal_dir):
+    from django.conf import settings
+    from django.db import close_old_connections
+    from django.test import Client
+    from orders import writebehind
+    
+    settings.ORDERS_STATUS_WRITE_BEHIND = write_behind
+    settings.ORDERS_STATUS_JOURNAL_PATH = os.path.join(journal_dir, 'status_journal.log')
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    
+    def worker(worker_seed):
+        client = Client()
+        rng = random.Random(worker_seed)
+        samples = []
+        failed = 0
+        while time.monotonic() < deadline:
+            body = json.dumps({'status': rng.choice(STATUSES)})
+            started = time.perf_counter()
+            response = client.patch(f'/api/orders/{rng.choice(order_ids)}/', body, content_type='application/json')
+            samples.append(time.perf_counter() - started)
+            if response.status_code not in (200, 202):
+                failed += 1
+        close_old_connections()
+        with lock:
+            latencies.extend(samples)
+            errors.append(failed)
+    
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    
+    drained = time.perf_counter()
+    writebehind.shutdown()
+    result = {
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'latency': percentiles(latencies),
+    }
+    if write_behind:
+        result['drain_ms'] = round((time.perf_counter() - drained) * 1000, 3)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--hot-orders', type=int, default=200, help='число заказов, статусы которых меняются')
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    args = parser.parse_args()
+    
+    db_path = setup_django()
+    journal_dir = tempfile.mkdtemp(prefix='cafe_journal_')
+    copies = []
+    try:
+        from django.conf import settings
+        from django.db import connections
+        from orders.models import Order
+        
+        seed(orders=args.orders)
+        order_ids = list(Order.objects.order_by('id').values_list('id', flat=True)[:args.hot_orders])
+        connections.close_all()
+        
+        results = {
+            'benchmark': 'status_writes',
+            'environment': environment(),
+            'params': vars(args),
+        }
+        for name, write_behind in (('sync', False), ('write_behind', True)):
+            copy = f'{db_path}.{name}'
+            shutil.copy(db_path, copy)
+            copies.append(copy)
+            settings.DATABASES['default']['NAME'] = copy
+            results[name] = run(write_behind, args.threads, args.duration, order_ids, journal_dir)
+            connections.close_all()
+        results['throughput_ratio'] = round(
+            results['write_behind']['requests_per_second'] / results['sync']['requests_per_second'], 2
+        )
+        write_results(results, args.output)
+    finally:
+        for path in copies + [db_path]:
+            remove_database(path)
+        shutil.rmtree(journal_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
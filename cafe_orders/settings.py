@@ -18,6 +18,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'orders.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -46,13 +47,42 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'cafe_orders.wsgi.application'
+ASGI_APPLICATION = 'cafe_orders.asgi.application'
+
+# Настройки SQLite задаются переменными окружения (CAFE_DB_*, CAFE_SQLITE_*).
+# CAFE_SQLITE_TUNING=0 возвращает поведение SQLite по умолчанию
+SQLITE_TUNING = os.environ.get('CAFE_SQLITE_TUNING', '1') == '1'
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('CAFE_DB_PATH', BASE_DIR / 'db.sqlite3'),
+        # Постоянные соединения с проверкой перед повторным использованием
+        'CONN_MAX_AGE': int(os.environ.get('CAFE_DB_CONN_MAX_AGE', 600 if SQLITE_TUNING else 0)),
+        'CONN_HEALTH_CHECKS': SQLITE_TUNING,
+        'OPTIONS': {
+            # Сколько секунд драйвер ждет освобождения блокировки записи
+            'timeout': int(os.environ.get('CAFE_DB_TIMEOUT', 20 if SQLITE_TUNING else 5)),
+        },
     }
 }
+if SQLITE_TUNING:
+    # Транзакция сразу берет блокировку записи: иначе повышение блокировки чтения
+    # до записи при конкуренции сразу завершается ошибкой "database is locked"
+    DATABASES['default']['OPTIONS']['transaction_mode'] = os.environ.get('CAFE_SQLITE_TRANSACTION_MODE', 'IMMEDIATE')
+
+# PRAGMA, выполняемые при открытии каждого соединения SQLite (orders.db)
+ORDERS_SQLITE_PRAGMAS = {
+    # WAL: читатели не блокируют писателя и наоборот
+    'journal_mode': os.environ.get('CAFE_SQLITE_JOURNAL_MODE', 'WAL'),
+    # В режиме WAL NORMAL сохраняет целостность, синхронизируя диск только на контрольных точках
+    'synchronous': os.environ.get('CAFE_SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'busy_timeout': int(os.environ.get('CAFE_SQLITE_BUSY_TIMEOUT_MS', 20000)),
+    # Отрицательное значение - размер кеша страниц в КиБ
+    'cache_size': int(os.environ.get('CAFE_SQLITE_CACHE_SIZE_KB', 20000)) * -1,
+    'mmap_size': int(os.environ.get('CAFE_SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'temp_store': 'MEMORY',
+} if SQLITE_TUNING else {}
 
 AUTH_PASSWORD_VALIDATORS = [
     # настройки валидаторов
@@ -75,6 +105,68 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Кеш ответов API инвалидируется событиями (orders.cache), поэтому срок хранения большой.
+# При нескольких процессах нужен общий бэкенд: CAFE_REDIS_URL=redis://... (пакет redis).
+# В кеше процесса версии ресурсов у каждого воркера свои, и записи в нем хранятся
+# не дольше ORDERS_CACHE_LOCAL_TTL
+if os.environ.get('CAFE_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['CAFE_REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+ORDERS_CACHE_TTL = 60 * 60 * 24
+ORDERS_CACHE_LOCAL_TTL = 60 * 5
+
+# Оплаченные заказы старше этого числа дней переносятся в архив (manage.py archive_orders)
+ORDERS_ARCHIVE_AFTER_DAYS = 7
+
+# Ответы на POST с заголовком Idempotency-Key хранятся столько секунд (orders.idempotency);
+# сверх ORDERS_IDEMPOTENCY_MAX_KEYS удаляются самые старые ключи
+ORDERS_IDEMPOTENCY_TTL = 60 * 60 * 24
+ORDERS_IDEMPOTENCY_MAX_KEYS = 100000
+
+# Хранить в снимке меню (orders.menu) заранее сжатую gzip копию ответа /api/menu/
+ORDERS_MENU_GZIP = True
+# С кешем процесса снимок меню сверяется с БД не чаще раза в столько секунд:
+# так другие воркеры видят изменения меню (и новые цены) с такой задержкой
+ORDERS_MENU_STAMP_INTERVAL = 1
+
+# Множители цен блюд меню по категориям при приеме заказа (orders.pricing),
+# например {'drink': '0.90'} - скидка 10% на напитки
+ORDERS_CATEGORY_PRICE_MODIFIERS = {}
+
+# Бэкенд событий заказов для табло кухни: LocalBackend - один процесс,
+# DatabaseBackend - общая таблица событий для нескольких процессов
+ORDERS_EVENTS_BACKEND = 'orders.events.LocalBackend'
+
+# Метрики запросов (/metrics/): задержки, число и время SQL-запросов, размер ответа.
+# Запросы дольше ORDERS_METRICS_SLOW_REQUEST_MS пишутся в лог (None - не писать),
+# ORDERS_METRICS_TRACE_QUERIES добавляет к записи список SQL-запросов
+ORDERS_METRICS_ENABLED = True
+ORDERS_METRICS_SLOW_REQUEST_MS = 500
+ORDERS_METRICS_TRACE_QUERIES = False
+
+# Отложенная запись статусов из PATCH /api/orders/<id>/ (orders.writebehind): статусы
+# копятся в очереди процесса и пишутся пачкой раз в ORDERS_STATUS_FLUSH_INTERVAL_MS,
+# принятые изменения сохраняются в журнал процесса ORDERS_STATUS_JOURNAL_PATH.<pid>
+ORDERS_STATUS_WRITE_BEHIND = os.environ.get('CAFE_STATUS_WRITE_BEHIND') == '1'
+ORDERS_STATUS_FLUSH_INTERVAL_MS = 50
+ORDERS_STATUS_QUEUE_MAX = 10000
+ORDERS_STATUS_JOURNAL_PATH = BASE_DIR / 'status_journal.log'
+
+# Источник состава заказа для API на время перехода на OrderLine:
+# 'json' - поле Order.items, 'lines' - нормализованная таблица OrderLine
+# (одинаковые блюда в ней идут подряд, см. Order.lines_as_items)
+ORDERS_ITEMS_SOURCE = 'json'
+
 
 LOGGING = {
     'version': 1,
@@ -92,5 +184,10 @@ LOGGING = {
             'level': 'INFO',  # Уровень логирования для Django
             'propagate': True,
         },
+        'orders': {
+            'handlers': ['file'],  # медленные запросы и прочие сообщения приложения
+            'level': 'INFO',
+            'propagate': True,
+        },
     },
 }
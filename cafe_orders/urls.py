@@ -2,16 +2,33 @@ from django.contrib import admin
 from django.urls import path, include
 from django.shortcuts import redirect
 from orders import views as orders_views
+from orders import async_views as orders_async_views
 
 urlpatterns = [
     path('', lambda request: redirect('order_list', permanent=False)),
     path('admin/', admin.site.urls),
+    path('metrics/', orders_views.metrics_api, name='metrics'),
     path('orders/', include('orders.urls')),
     
     # API endpoints на корневом уровне
     path('api/orders/', orders_views.orders_api_list, name='api_orders_list'),
+    path('api/orders/events/', orders_views.order_events_stream, name='api_orders_events'),
+    path('api/orders/bulk/', orders_views.orders_api_bulk, name='api_orders_bulk'),
+    path('api/orders/status/', orders_views.orders_api_status, name='api_orders_status'),
+    path('api/orders/export/', orders_views.orders_api_export, name='api_orders_export'),
     path('api/orders/<int:order_id>/', orders_views.orders_api_detail, name='api_orders_detail'),
     path('api/menu/', orders_views.menu_list_api, name='api_menu_list'),
     path('api/revenue/', orders_views.revenue_api, name='api_revenue'),
     path('api/statistics/', orders_views.statistics_api, name='api_statistics'),
+    path('api/analytics/', orders_views.analytics_api, name='api_analytics'),
+    path('api/reports/', orders_views.reports_api, name='api_reports'),
+    path('api/tables/', orders_views.tables_api_list, name='api_tables_list'),
+    path('api/tables/<int:table_number>/', orders_views.tables_api_detail, name='api_tables_detail'),
+    
+    # Асинхронные версии API для запуска под ASGI (cafe_orders.asgi)
+    path('api/async/orders/', orders_async_views.orders_api_list, name='api_async_orders_list'),
+    path('api/async/orders/<int:order_id>/', orders_async_views.orders_api_detail, name='api_async_orders_detail'),
+    path('api/async/menu/', orders_async_views.menu_list_api, name='api_async_menu_list'),
+    path('api/async/revenue/', orders_async_views.revenue_api, name='api_async_revenue'),
+    path('api/async/statistics/', orders_async_views.statistics_api, name='api_async_statistics'),
 ]
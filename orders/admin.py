@@ -1,9 +1,41 @@
 from django.contrib import admin
 from .models import Order
 from .models import MenuItem
+from .models import OrderLine
+from .models import ArchivedOrder, ArchivedOrderLine
+from .models import TableState
+from .models import IdempotencyKey
+
+class OrderLineInline(admin.TabularInline):
+    model = OrderLine
+    extra = 0
+    readonly_fields = ('name', 'menu_item', 'quantity', 'unit_price', 'position')
+    can_delete = False
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ('id', 'table_number', 'total_price', 'status')
+    inlines = [OrderLineInline]
 
 admin.site.register(MenuItem)
+
+class ArchivedOrderLineInline(admin.TabularInline):
+    model = ArchivedOrderLine
+    extra = 0
+    readonly_fields = ('name', 'menu_item', 'quantity', 'unit_price', 'position')
+    can_delete = False
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    list_display = ('id', 'table_number', 'total_price', 'status', 'created_at', 'archived_at')
+    inlines = [ArchivedOrderLineInline]
+
+@admin.register(TableState)
+class TableStateAdmin(admin.ModelAdmin):
+    list_display = ('table_number', 'unpaid_total', 'oldest_waiting_at', 'updated_at')
+    readonly_fields = ('table_number', 'open_orders', 'unpaid_total', 'oldest_waiting_at', 'updated_at')
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('key', 'status_code', 'created_at')
+    readonly_fields = ('key', 'fingerprint', 'status_code', 'content_type', 'body', 'created_at')
@@ -0,0 +1,118 @@
+"""Ряды выручки и числа заказов по часам, дням и неделям для дашбордов.
+
+Почасовые агрегаты (всего, по столам или по блюдам) считаются одним
+группирующим запросом по рабочей таблице и архиву (UNION ALL) и кешируются
+по дням: у каждого дня своя версия, которую orders.tracking увеличивает при
+изменении заказов этого дня. Текущий день не кешируется, поэтому заново
+считается только он, а дни и недели собираются из часов без запросов к БД.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, F, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from . import cache
+from .models import ArchivedOrder, ArchivedOrderLine, Order, OrderLine
+
+BUCKETS = ('hour', 'day', 'week')
+GROUPS = ('table', 'dish')
+ALL_STATUSES = 'all'
+MAX_DAYS = 366
+
+LINE_REVENUE = Sum(F('unit_price') * F('quantity'), output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _hourly_query(group, status, start, end):
+    """Почасовые агрегаты (hour, key, count, revenue) за [start, end) одним запросом"""
+    queries = []
+    if group == 'dish':
+        for line_model in (OrderLine, ArchivedOrderLine):
+            lines = line_model.objects.filter(order__created_at__gte=start, order__created_at__lt=end)
+            if status != ALL_STATUSES:
+                lines = lines.filter(order__status=status)
+            queries.append(
+                lines.annotate(hour=TruncHour('order__created_at'), key=F('name'))
+                .values('hour', 'key')
+                .annotate(count=Sum('quantity'), revenue=LINE_REVENUE)
+                .values_list('hour', 'key', 'count', 'revenue')
+                .order_by()
+            )
+    else:
+        for model in (Order, ArchivedOrder):
+            orders = model.objects.filter(created_at__gte=start, created_at__lt=end)
+            if status != ALL_STATUSES:
+                orders = orders.filter(status=status)
+            fields = ('hour', 'table_number') if group == 'table' else ('hour',)
+            orders = (
+                orders.annotate(hour=TruncHour('created_at'))
+                .values(*fields)
+                .annotate(count=Count('id'), revenue=Sum('total_price'))
+                .values_list(*fields, 'count', 'revenue')
+                .order_by()
+            )
+            queries.append(orders)
+    rows = queries[0].union(queries[1], all=True)
+    if group is None:
+        return [(hour, None, count, revenue) for hour, count, revenue in rows]
+    return list(rows)
+
+
+def hourly_rows(day_from, day_to, group=None, status='paid'):
+    """Почасовые агрегаты за дни [day_from, day_to]: {день: [(hour, key, count, revenue), ...]}"""
+    days = [day_from + timedelta(days=offset) for offset in range((day_to - day_from).days + 1)]
+    today = timezone.localdate()
+    cache_key = f'{group}:{status}'
+    
+    result = cache.get_days(cache.ANALYTICS, [day for day in days if day < today], cache_key)
+    missing = [day for day in days if day not in result]
+    if not missing:
+        return result
+    
+    computed = {day: [] for day in missing}
+    for row in _hourly_query(group, status, _day_start(missing[0]), _day_start(missing[-1] + timedelta(days=1))):
+        day = timezone.localdate(row[0])
+        if day in computed:
+            computed[day].append(row)
+    # Закрытые дни кешируются, текущий (открытый) пересчитывается при каждом запросе
+    cache.set_days(cache.ANALYTICS, {day: rows for day, rows in computed.items() if day < today}, cache_key)
+    result.update(computed)
+    return result
+
+
+def _bucket_start(hour, bucket):
+    hour = timezone.localtime(hour)
+    if bucket == 'hour':
+        return hour
+    day = hour.replace(hour=0)
+    if bucket == 'week':
+        day -= timedelta(days=day.weekday())
+    return day
+
+
+def series(bucket, day_from, day_to, group=None, status='paid'):
+    """Ряд агрегатов по корзинам bucket; для group - с разбивкой по столам или блюдам"""
+    totals = defaultdict(lambda: [0, Decimal('0')])
+    for rows in hourly_rows(day_from, day_to, group, status).values():
+        for hour, key, count, revenue in rows:
+            total = totals[(_bucket_start(hour, bucket), key)]
+            total[0] += count
+            total[1] += revenue or 0
+    
+    count_name = 'quantity' if group == 'dish' else 'orders'
+    key_name = {'table': 'table_number', 'dish': 'dish'}.get(group)
+    points = []
+    for (start, key), (count, revenue) in sorted(totals.items()):
+        point = {'bucket': start}
+        if key_name:
+            point[key_name] = key
+        point[count_name] = count
+        point['revenue'] = float(revenue)
+        points.append(point)
+    return points
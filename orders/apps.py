@@ -4,3 +4,19 @@ from django.apps import AppConfig
 class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'orders'
+    
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from .db import configure_sqlite
+        from .middleware import install_query_counter
+        
+        # Подключаем обработчики сигналов моделей
+        from . import signals  # noqa: F401
+        connection_created.connect(configure_sqlite, dispatch_uid='orders.configure_sqlite')
+        # Счетчик SQL-запросов для метрик (orders.middleware)
+        connection_created.connect(install_query_counter, dispatch_uid='orders.install_query_counter')
+        
+        # Очередь отложенной записи статусов запускается (и проигрывает журнал) с первым запросом
+        from django.core.signals import request_started
+        from . import writebehind
+        request_started.connect(writebehind.start_on_first_request, dispatch_uid=writebehind.START_DISPATCH_UID)
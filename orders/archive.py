@@ -0,0 +1,54 @@
+"""Перенос старых оплаченных заказов в архив (ArchivedOrder).
+
+Рабочая таблица Order остается небольшой: в ней только заказы, с которыми
+работают кухня и официанты. Архивные заказы по-прежнему учитываются в выручке
+и статистике (дневные агрегаты при переносе не меняются) и доступны по id
+в API деталей заказа.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import tracking
+from .models import ArchivedOrder, ArchivedOrderLine, Order, OrderLine
+
+ARCHIVE_BATCH_SIZE = 500
+
+ORDER_FIELDS = ('id', 'table_number', 'items', 'total_price', 'status', 'created_at', 'updated_at', 'version')
+LINE_FIELDS = ('order_id', 'menu_item_id', 'name', 'quantity', 'unit_price', 'position')
+
+
+def archive_cutoff(days=None):
+    """Момент, раньше которого оплаченные заказы переносятся в архив"""
+    if days is None:
+        days = getattr(settings, 'ORDERS_ARCHIVE_AFTER_DAYS', 7)
+    return timezone.now() - timedelta(days=days)
+
+
+def archivable_orders(before):
+    return Order.objects.filter(status='paid', created_at__lt=before).order_by()
+
+
+def archive_orders(before, batch_size=ARCHIVE_BATCH_SIZE):
+    """Переносит оплаченные заказы, созданные раньше before, порциями по batch_size.
+    
+    Каждая порция переносится в своей транзакции, поэтому команду можно прервать
+    и запустить снова. Возвращает число перенесенных заказов.
+    """
+    archived = 0
+    while True:
+        with transaction.atomic():
+            ids = list(archivable_orders(before).values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return archived
+            ArchivedOrder.objects.bulk_create(
+                ArchivedOrder(**row) for row in Order.objects.filter(id__in=ids).values(*ORDER_FIELDS)
+            )
+            ArchivedOrderLine.objects.bulk_create(
+                ArchivedOrderLine(**row) for row in OrderLine.objects.filter(order_id__in=ids).values(*LINE_FIELDS)
+            )
+            with tracking.suspended():
+                Order.objects.filter(id__in=ids).delete()
+        archived += len(ids)
@@ -0,0 +1,183 @@
+"""Асинхронные версии JSON API для запуска под ASGI (cafe_orders.asgi).
+
+Повторяют поведение одноименных представлений из orders.views, но работают
+через асинхронные методы ORM, поэтому медленный клиент или долгий агрегат
+не занимает поток сервера.
+"""
+import json
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.db.models import Sum
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_http_methods
+
+from . import cache, menu, rollups, serializers
+from .idempotency import idempotent
+from .models import ArchivedOrder, Order
+from .views import (
+    API_PAGE_SIZE_DEFAULT, API_PAGE_SIZE_MAX, API_STREAM_CHUNK_SIZE, API_STREAM_FORMATS, UNPAID_STATUS,
+    _create_order, _menu_response, _parse_non_negative_int, _parse_positive_int, _revenue_filter,
+    _revenue_window, _statistics_from_totals,
+)
+
+# Создание заказа с проверкой Idempotency-Key: разбор, цены меню, сохранение заказа и ключа
+# идут в одной транзакции, а она не может охватывать await - поэтому весь вызов в потоке
+_acreate_order = sync_to_async(idempotent(_create_order))
+
+
+async def _aget_order(order_id):
+    try:
+        return await Order.objects.aget(id=order_id)
+    except Order.DoesNotExist:
+        raise Http404("No Order matches the given query.")
+
+
+async def _astream_orders(orders_query, stream_format):
+    separator = b'\n' if stream_format == 'ndjson' else b','
+    # Итератор values_list выполняет запрос синхронно, поэтому порции читаются в потоке
+    chunks = serializers.iter_order_chunks(orders_query, API_STREAM_CHUNK_SIZE)
+    next_chunk = sync_to_async(next)
+    first = True
+    
+    if stream_format == 'json':
+        yield b'['
+    while (chunk := await next_chunk(chunks, None)) is not None:
+        yield _stream_chunk(chunk, separator, first, stream_format)
+        first = False
+    if stream_format == 'json':
+        yield b']'
+
+
+def _stream_chunk(orders, separator, first, stream_format):
+    encoded = separator.join(map(serializers.dumps, orders))
+    if stream_format == 'ndjson':
+        return encoded + separator
+    return (b'' if first else separator) + encoded
+
+
+async def _aserialize_orders(orders_query):
+    rows = [row async for row in serializers.order_rows(orders_query)]
+    return await serializers.arows_to_dicts(rows, serializers.line_model_for(orders_query))
+
+
+async def orders_api_list(request):
+    # POST - создание нового заказа
+    if request.method == 'POST':
+        return await _acreate_order(request)
+    
+    # GET - получение списка заказов
+    table_number = request.GET.get('table_number')
+    status = request.GET.get('status')
+    stream_format = request.GET.get('stream')
+    
+    try:
+        after = _parse_non_negative_int(request.GET.get('after'), 'after')
+        limit = _parse_positive_int(request.GET.get('limit'), 'limit')
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    
+    if stream_format and stream_format not in API_STREAM_FORMATS:
+        return JsonResponse({"error": "Parameter 'stream' must be 'json' or 'ndjson'"}, status=400)
+    
+    orders_query = Order.objects.all().order_by('id')
+    if table_number:
+        orders_query = orders_query.filter(table_number=table_number)
+    if status == UNPAID_STATUS:
+        # Неоплаченные заказы для кухни (частичный индекс orders_order_unpaid_idx)
+        orders_query = orders_query.exclude(status='paid')
+    elif status:
+        orders_query = orders_query.filter(status=status)
+    if after is not None:
+        orders_query = orders_query.filter(id__gt=after)
+    
+    if stream_format:
+        content_type = 'application/x-ndjson' if stream_format == 'ndjson' else 'application/json'
+        return StreamingHttpResponse(_astream_orders(orders_query, stream_format), content_type=content_type)
+    
+    if limit is not None or after is not None:
+        limit = min(API_PAGE_SIZE_DEFAULT if limit is None else limit, API_PAGE_SIZE_MAX)
+        page = await _aserialize_orders(orders_query[:limit + 1])
+        has_next = len(page) > limit
+        page = page[:limit]
+        return serializers.JSONBytesResponse({
+            "results": page,
+            "next_after": page[-1]["id"] if has_next else None,
+        })
+    
+    return serializers.JSONBytesResponse(await _aserialize_orders(orders_query))
+
+
+async def orders_api_detail(request, order_id):
+    # GET - получение деталей заказа
+    if request.method == 'GET':
+        rows = await _aserialize_orders(Order.objects.filter(id=order_id))
+        if not rows:
+            rows = await _aserialize_orders(ArchivedOrder.objects.filter(id=order_id))
+        if not rows:
+            raise Http404("No Order matches the given query.")
+        return serializers.JSONBytesResponse(rows[0])
+    
+    order = await _aget_order(order_id)
+    
+    # PATCH - обновление статуса заказа
+    if request.method == 'PATCH':
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({"error": "Invalid JSON"}, status=400)
+        if 'status' in data and data['status'] in dict(Order.STATUS_CHOICES):
+            order.status = data['status']
+            await order.asave(update_fields=['status'])
+            return JsonResponse({"success": True, "message": "Status updated"})
+        return JsonResponse({"error": "Invalid status"}, status=400)
+    
+    # DELETE - удаление заказа
+    elif request.method == 'DELETE':
+        await order.adelete()
+        return JsonResponse({}, status=204)
+    
+    return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@require_http_methods(["GET"])
+async def menu_list_api(request):
+    # Снимок строится синхронно, но только после изменения меню
+    snapshot = menu.current_snapshot()
+    if snapshot is None:
+        snapshot = await sync_to_async(menu.get_snapshot)()
+    return _menu_response(request, snapshot)
+
+
+@require_http_methods(["GET"])
+async def revenue_api(request):
+    date_from = request.GET.get('date_from')
+    date_to = request.GET.get('date_to')
+    
+    try:
+        window, days = _revenue_window(date_from, date_to)
+    except ValueError:
+        return JsonResponse({"error": "Invalid date"}, status=400)
+    
+    async def compute():
+        if days is not None:
+            revenue = await rollups.arevenue(*days)
+        else:
+            # Рабочая таблица и архив
+            query = _revenue_filter(date_from, date_to)
+            revenue = Decimal('0')
+            for model in (Order, ArchivedOrder):
+                revenue += (await model.objects.filter(query).aaggregate(
+                    total_revenue=Sum('total_price')
+                ))['total_revenue'] or 0
+        return {'revenue': float(revenue)}
+    
+    return JsonResponse(await cache.aget_or_compute(cache.REVENUE, window, compute))
+
+
+@require_http_methods(["GET"])
+async def statistics_api(request):
+    async def compute():
+        return _statistics_from_totals(await rollups.astatus_totals())
+    
+    return JsonResponse(await cache.aget_or_compute(cache.STATISTICS, 'all', compute))
@@ -0,0 +1,256 @@
+"""Версионируемый кеш ответов API с инвалидацией по событиям.
+
+Каждый ресурс (menu, revenue, statistics) имеет номер версии в кеше, который
+входит в ключи всех его записей. Изменение заказов и меню увеличивает версию
+(см. orders.tracking и orders.signals), и старые записи просто перестают читаться,
+поэтому записи можно хранить долго. При промахе значение вычисляет только один
+поток процесса, а между процессами - держатель короткой блокировки в кеше.
+
+Версии видны всем процессам только в общем бэкенде (Redis, Memcached). В кеше
+процесса (LocMemCache) изменение, сделанное другим воркером, не увеличит
+местную версию, поэтому записи в нем живут не дольше ORDERS_CACHE_LOCAL_TTL.
+"""
+import asyncio
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+MENU = 'menu'
+REVENUE = 'revenue'
+STATISTICS = 'statistics'
+# Аналитика хранится по дням, у каждого дня своя версия (см. get_days)
+ANALYTICS = 'analytics'
+
+DEFAULT_TTL = 60 * 60 * 24
+# Срок хранения в кеше процесса: столько другие воркеры могут отдавать устаревшие данные
+LOCAL_TTL = 60 * 5
+# Сколько держится межпроцессная блокировка пересчета и сколько ее ждут остальные
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 5
+LOCK_POLL_INTERVAL = 0.05
+
+_MISSING = object()
+
+# Набор блокировок для однократного пересчета внутри процесса (по хешу ключа)
+_key_locks = [threading.Lock() for _ in range(64)]
+
+_stats_lock = threading.Lock()
+_stats = defaultdict(lambda: {'hits': 0, 'misses': 0})
+
+
+def _initial_version():
+    # Наносекунды: после вытеснения ключа новая версия не совпадет со старой,
+    # даже если ту уже успели увеличить несколько раз
+    return time.time_ns()
+
+
+def is_process_local():
+    """Кеш по умолчанию хранится в памяти процесса и не виден другим воркерам"""
+    return isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache)
+
+
+def default_ttl():
+    """Срок хранения записей: ORDERS_CACHE_TTL, для кеша процесса - не больше ORDERS_CACHE_LOCAL_TTL"""
+    ttl = getattr(settings, 'ORDERS_CACHE_TTL', DEFAULT_TTL)
+    if is_process_local():
+        ttl = min(ttl, getattr(settings, 'ORDERS_CACHE_LOCAL_TTL', LOCAL_TTL))
+    return ttl
+
+
+def _version_key(resource):
+    return f'orders:version:{resource}'
+
+
+def get_version(resource):
+    """Текущая версия ресурса (создается при первом обращении)"""
+    key = _version_key(resource)
+    version = cache.get(key)
+    if version is None:
+        # Стартуем с метки времени, чтобы после вытеснения ключа не вернуться к старой версии
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_version(resource):
+    """Асинхронный вариант get_version"""
+    key = _version_key(resource)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _initial_version(), None)
+        version = await cache.aget(key)
+    return version
+
+
+def _bump_now(resources):
+    for resource in resources:
+        try:
+            cache.incr(_version_key(resource))
+        except ValueError:
+            cache.set(_version_key(resource), _initial_version(), None)
+
+
+def bump(*resources):
+    """Инвалидирует все записи ресурсов.
+    
+    Версия увеличивается сразу (чтобы чтения в той же транзакции не видели старые
+    данные) и повторно после фиксации транзакции: значение, которое другой запрос
+    успел посчитать по еще не зафиксированным данным, тоже устареет.
+    """
+    _bump_now(resources)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump_now(resources))
+
+
+def _day_resource(resource, day):
+    return f'{resource}:{day.isoformat()}'
+
+
+def bump_days(resource, days):
+    """Инвалидирует записи ресурса только за указанные дни"""
+    if days:
+        bump(*(_day_resource(resource, day) for day in days))
+
+
+def _day_keys(resource, days, key):
+    """Ключи записей по дням; версии всех дней читаются одним обращением к кешу"""
+    version_keys = {day: _version_key(_day_resource(resource, day)) for day in days}
+    versions = cache.get_many(version_keys.values())
+    keys = {}
+    for day, version_key in version_keys.items():
+        version = versions.get(version_key)
+        if version is None:
+            version = get_version(_day_resource(resource, day))
+        keys[day] = f'orders:{resource}:{day.isoformat()}:{version}:{key}'
+    return keys
+
+
+def get_days(resource, days, key):
+    """Записи ресурса за дни days: {день: значение} только для найденных в кеше"""
+    keys = _day_keys(resource, days, key)
+    found = cache.get_many(keys.values())
+    values = {day: found[cache_key] for day, cache_key in keys.items() if cache_key in found}
+    with _stats_lock:
+        _stats[resource]['hits'] += len(values)
+        _stats[resource]['misses'] += len(keys) - len(values)
+    return values
+
+
+def set_days(resource, values, key, ttl=None):
+    """Сохраняет записи ресурса по дням: values - {день: значение}"""
+    if ttl is None:
+        ttl = default_ttl()
+    keys = _day_keys(resource, values, key)
+    cache.set_many({keys[day]: value for day, value in values.items()}, ttl)
+
+
+def _record(resource, outcome):
+    with _stats_lock:
+        _stats[resource][outcome] += 1
+
+
+def get_or_compute(resource, key, compute, ttl=None):
+    """Возвращает значение из кеша или вычисляет его ровно одним исполнителем"""
+    if ttl is None:
+        ttl = default_ttl()
+    cache_key = f'orders:{resource}:{get_version(resource)}:{key}'
+    
+    value = cache.get(cache_key, _MISSING)
+    if value is not _MISSING:
+        _record(resource, 'hits')
+        return value
+    
+    with _key_locks[hash(cache_key) % len(_key_locks)]:
+        # Пока ждали блокировку, значение мог положить соседний поток
+        value = cache.get(cache_key, _MISSING)
+        if value is not _MISSING:
+            _record(resource, 'hits')
+            return value
+        
+        lock_key = f'{cache_key}:lock'
+        if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+            # Значение уже вычисляет другой процесс - ждем его результат
+            deadline = time.monotonic() + LOCK_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(LOCK_POLL_INTERVAL)
+                value = cache.get(cache_key, _MISSING)
+                if value is not _MISSING:
+                    _record(resource, 'hits')
+                    return value
+            lock_key = None
+        
+        _record(resource, 'misses')
+        try:
+            value = compute()
+            cache.set(cache_key, value, ttl)
+        finally:
+            if lock_key:
+                cache.delete(lock_key)
+    return value
+
+
+# Незавершенные асинхронные вычисления по ключу (однократный пересчет в цикле событий)
+_pending = {}
+
+
+async def aget_or_compute(resource, key, acompute, ttl=None):
+    """Асинхронный вариант get_or_compute; acompute - корутинная функция"""
+    if ttl is None:
+        ttl = default_ttl()
+    cache_key = f'orders:{resource}:{await aget_version(resource)}:{key}'
+    
+    value = await cache.aget(cache_key, _MISSING)
+    if value is not _MISSING:
+        _record(resource, 'hits')
+        return value
+    
+    # Остальные корутины процесса ждут уже запущенное вычисление
+    pending_key = (asyncio.get_running_loop(), cache_key)
+    future = _pending.get(pending_key)
+    if future is not None:
+        _record(resource, 'hits')
+        return await asyncio.shield(future)
+    
+    future = asyncio.get_running_loop().create_future()
+    _pending[pending_key] = future
+    try:
+        lock_key = f'{cache_key}:lock'
+        if not await cache.aadd(lock_key, 1, LOCK_TIMEOUT):
+            deadline = time.monotonic() + LOCK_WAIT
+            while time.monotonic() < deadline:
+                await asyncio.sleep(LOCK_POLL_INTERVAL)
+                value = await cache.aget(cache_key, _MISSING)
+                if value is not _MISSING:
+                    _record(resource, 'hits')
+                    future.set_result(value)
+                    return value
+            lock_key = None
+        
+        _record(resource, 'misses')
+        try:
+            value = await acompute()
+            await cache.aset(cache_key, value, ttl)
+        finally:
+            if lock_key:
+                await cache.adelete(lock_key)
+        future.set_result(value)
+        return value
+    except BaseException as e:
+        if not future.done():
+            future.set_exception(e)
+            # Исключение получат ожидающие; если их нет, не шумим в логах
+            future.exception()
+        raise
+    finally:
+        _pending.pop(pending_key, None)
+
+
+def stats():
+    """Счетчики попаданий и промахов по ресурсам"""
+    with _stats_lock:
+        return {resource: dict(counters) for resource, counters in _stats.items()}
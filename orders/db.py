@@ -0,0 +1,23 @@
+"""Настройка соединений SQLite при их открытии (PRAGMA из ORDERS_SQLITE_PRAGMAS)"""
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Обработчик сигнала connection_created"""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'ORDERS_SQLITE_PRAGMAS', {})
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+            if name == 'journal_mode':
+                mode = cursor.fetchone()[0]
+                # База в памяти (тесты) не поддерживает WAL - это не ошибка
+                if str(mode).lower() != str(value).lower() and mode != 'memory':
+                    logger.warning('SQLite journal_mode=%s не применен, текущий режим: %s', value, mode)
@@ -0,0 +1,295 @@
+"""События заказов для табло кухни (Server-Sent Events).
+
+События публикуются из orders.tracking после фиксации транзакции (все события
+транзакции одной пачкой) и раздаются подписчикам процесса через Broker. Бэкенд
+(настройка ORDERS_EVENTS_BACKEND) определяет, как события попадают к брокерам:
+LocalBackend работает в пределах одного процесса, DatabaseBackend пишет события
+в таблицу OrderEvent, которую читают фоновые потоки всех процессов.
+
+Под ASGI подключение ждет события в цикле событий (AsyncSubscription), не
+занимая поток.
+"""
+import asyncio
+import itertools
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, transaction
+from django.utils.module_loading import import_string
+
+ORDER_CREATED = 'order_created'
+ORDER_STATUS_CHANGED = 'order_status_changed'
+ORDER_UPDATED = 'order_updated'
+ORDER_DELETED = 'order_deleted'
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 1000
+HISTORY_SIZE = 1000
+
+# Признак отключения подписчика, не успевающего читать события
+CLOSED = object()
+
+
+class Subscription:
+    """Очередь событий одного подключения"""
+    
+    def __init__(self, broker):
+        self.broker = broker
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+    
+    def get(self, timeout=None):
+        """Следующее событие, CLOSED при отключении или queue.Empty по таймауту"""
+        return self.queue.get(timeout=timeout)
+    
+    def put(self, event):
+        """Добавляет событие в очередь; queue.Full, если подписчик не успевает читать"""
+        self.queue.put_nowait(event)
+        self._notify()
+    
+    def disconnect(self):
+        """Заменяет непрочитанные события признаком отключения"""
+        with self.queue.mutex:
+            self.queue.queue.clear()
+        self.queue.put_nowait(CLOSED)
+        self._notify()
+    
+    def _notify(self):
+        pass
+    
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class AsyncSubscription(Subscription):
+    """Очередь событий подключения под ASGI: создается и читается в цикле событий"""
+    
+    def __init__(self, broker):
+        super().__init__(broker)
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+    
+    def _notify(self):
+        # Событие раздается из потока публикации или опроса таблицы
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            # Цикл событий уже закрыт - подключения больше нет
+            pass
+    
+    async def aget(self, timeout=None):
+        """Асинхронный вариант get()"""
+        while True:
+            self._ready.clear()
+            try:
+                return self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                raise queue.Empty from None
+
+
+class Broker:
+    """Раздача событий подписчикам внутри процесса"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+    
+    def subscribe(self, asynchronous=False):
+        subscription = AsyncSubscription(self) if asynchronous else Subscription(self)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+    
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+    
+    def dispatch(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.put(event)
+            except queue.Full:
+                # Медленного клиента отключаем: он переподключится с Last-Event-ID
+                self.unsubscribe(subscription)
+                subscription.disconnect()
+
+
+class LocalBackend:
+    """События в пределах одного процесса"""
+    
+    def __init__(self):
+        self.broker = Broker()
+        self._ids = itertools.count(1)
+        self._history = deque(maxlen=HISTORY_SIZE)
+        self._lock = threading.Lock()
+    
+    def publish(self, kind, payload):
+        self.publish_many([(kind, payload)])
+    
+    def publish_many(self, pending):
+        """Публикует пары (тип, данные) в порядке списка"""
+        with self._lock:
+            published = [{'id': next(self._ids), 'type': kind, 'data': payload} for kind, payload in pending]
+            self._history.extend(published)
+        for event in published:
+            self.broker.dispatch(event)
+    
+    def subscribe(self, asynchronous=False):
+        return self.broker.subscribe(asynchronous)
+    
+    def last_id(self):
+        """id последнего опубликованного события (0, если событий не было)"""
+        with self._lock:
+            return self._history[-1]['id'] if self._history else 0
+    
+    def replay(self, after_id):
+        with self._lock:
+            return [event for event in self._history if event['id'] > after_id]
+
+
+class DatabaseBackend:
+    """События через таблицу OrderEvent: общая очередь для нескольких процессов.
+    
+    Каждый процесс при первой подписке запускает поток, который раз в
+    POLL_INTERVAL секунд читает новые строки и раздает их своему брокеру.
+    """
+    POLL_INTERVAL = 0.5
+    # Предельная пауза между попытками, пока чтение таблицы завершается ошибкой
+    MAX_BACKOFF = 30
+    # Сколько последних событий хранить в таблице
+    RETENTION = 10000
+    PRUNE_EVERY = 500
+    
+    def __init__(self):
+        self.broker = Broker()
+        self._lock = threading.Lock()
+        self._poller = None
+        self._last_id = None
+        self._published = 0
+    
+    def publish(self, kind, payload):
+        self.publish_many([(kind, payload)])
+    
+    def publish_many(self, pending):
+        """Записывает пары (тип, данные) одним INSERT"""
+        from .models import OrderEvent
+        created = OrderEvent.objects.bulk_create(
+            [OrderEvent(kind=kind, payload=payload) for kind, payload in pending]
+        )
+        before, self._published = self._published, self._published + len(created)
+        if created and before // self.PRUNE_EVERY != self._published // self.PRUNE_EVERY:
+            last_id = created[-1].id or OrderEvent.objects.order_by('-id').values_list('id', flat=True).first()
+            OrderEvent.objects.filter(id__lte=last_id - self.RETENTION).delete()
+    
+    def subscribe(self, asynchronous=False):
+        self._ensure_poller()
+        return self.broker.subscribe(asynchronous)
+    
+    def last_id(self):
+        from .models import OrderEvent
+        return OrderEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    
+    def replay(self, after_id):
+        from .models import OrderEvent
+        rows = OrderEvent.objects.filter(id__gt=after_id).values_list('id', 'kind', 'payload')
+        return [{'id': event_id, 'type': kind, 'data': payload} for event_id, kind, payload in rows]
+    
+    def poll_once(self):
+        """Читает новые события из таблицы и раздает их подписчикам процесса"""
+        if self._last_id is None:
+            self._last_id = self.last_id()
+        for event in self.replay(self._last_id):
+            self._last_id = event['id']
+            self.broker.dispatch(event)
+    
+    def _ensure_poller(self):
+        with self._lock:
+            if self._poller is None or not self._poller.is_alive():
+                self._poller = threading.Thread(target=self._run, name='order-events-poller', daemon=True)
+                self._poller.start()
+    
+    def _run(self):
+        delay = self.POLL_INTERVAL
+        while True:
+            time.sleep(delay)
+            try:
+                self.poll_once()
+            except Exception:
+                # Ошибка БД не должна останавливать рассылку: повторяем с растущей паузой
+                logger.exception('Не удалось прочитать события заказов')
+                delay = min(delay * 2, self.MAX_BACKOFF)
+            else:
+                delay = self.POLL_INTERVAL
+            finally:
+                close_old_connections()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                path = getattr(settings, 'ORDERS_EVENTS_BACKEND', 'orders.events.LocalBackend')
+                _backend = import_string(path)()
+    return _backend
+
+
+def publish(kind, payload):
+    """Публикует событие после фиксации текущей транзакции"""
+    publish_many([(kind, payload)])
+
+
+def publish_many(pending):
+    """Публикует пары (тип, данные) одной пачкой после фиксации текущей транзакции"""
+    if pending:
+        transaction.on_commit(lambda: get_backend().publish_many(pending))
+
+
+def publish_order_changes(changes):
+    """Преобразует изменения заказов (пары OrderState) в события"""
+    pending = []
+    for old, new in changes:
+        if old is None:
+            pending.append((ORDER_CREATED, state_payload(new)))
+        elif new is None:
+            pending.append((ORDER_DELETED, state_payload(old)))
+        elif old.status != new.status:
+            pending.append((ORDER_STATUS_CHANGED, dict(state_payload(new), previous_status=old.status)))
+        else:
+            pending.append((ORDER_UPDATED, state_payload(new)))
+    publish_many(pending)
+
+
+def state_payload(state):
+    return {
+        'id': state.id,
+        'table_number': state.table_number,
+        'status': state.status,
+        'total_price': float(state.total_price),
+        'created_at': state.created_at.isoformat() if state.created_at else None,
+    }
+
+
+def format_sse(event):
+    """Кадр события в формате text/event-stream"""
+    data = DjangoJSONEncoder().encode(event['data'])
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
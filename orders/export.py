@@ -0,0 +1,173 @@
+"""Потоковая выгрузка заказов для бухгалтерии в CSV или NDJSON.
+
+Заказы читаются порциями по ключу (id > последнего выгруженного) из рабочей
+таблицы и архива, порции сливаются по id, поэтому память не зависит от объема
+выгрузки, а прерванную выгрузку можно продолжить с параметром after.
+"""
+import csv
+import heapq
+import io
+import zlib
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from . import serializers
+from .models import UNPAID_STATUS, ArchivedOrder, Order
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+EXPORT_CHUNK_SIZE = 2000
+
+ORDER_COLUMNS = ('id', 'table_number', 'status', 'total_price', 'created_at', 'version')
+LINE_COLUMNS = ('item_position', 'item_name', 'item_price')
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def parse_bound(value, name, end=False):
+    """Граница периода выгрузки: дата или момент времени, ValueError при ошибке.
+
+    Дата в конце периода включается целиком (end=True дает начало следующего дня).
+    """
+    if not value:
+        return None
+    day = parse_date(value)
+    if day is not None:
+        moment = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+    else:
+        moment = parse_datetime(value)
+        if moment is None:
+            raise ValueError(f"Parameter '{name}' must be a date or datetime")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def _iter_store(model, filters, status, after, chunk_size):
+    """Заказы одного хранилища порциями по ключу id"""
+    orders_query = model.objects.filter(**filters).order_by('id')
+    if status == UNPAID_STATUS:
+        orders_query = orders_query.exclude(status='paid')
+    last_id = after
+    while True:
+        chunk_query = orders_query if last_id is None else orders_query.filter(id__gt=last_id)
+        chunk = serializers.serialize_orders(chunk_query[:chunk_size])
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1]['id']
+
+
+def iter_orders(date_from=None, date_to=None, status=None, after=None, chunk_size=None):
+    """Словари заказов рабочей таблицы и архива в порядке id.
+
+    date_from и date_to - результаты parse_bound(): date_to не включается.
+    Таблицы читаются отдельными запросами по порциям, без общего снимка: если
+    во время выгрузки archive_orders переносит заказы, заказ может быть прочитан
+    в обеих таблицах (повтор пропускается) или не попасть ни в одну. Выгрузку
+    за период, который архивируется, лучше запускать вне окна archive_orders.
+    """
+    filters = {}
+    if date_from is not None:
+        filters['created_at__gte'] = date_from
+    if date_to is not None:
+        filters['created_at__lt'] = date_to
+    if status and status != UNPAID_STATUS:
+        filters['status'] = status
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    stores = [_iter_store(model, filters, status, after, chunk_size) for model in (Order, ArchivedOrder)]
+    last_id = None
+    for order in heapq.merge(*stores, key=lambda order: order['id']):
+        if order['id'] != last_id:
+            last_id = order['id']
+            yield order
+
+
+def _format_price(value):
+    return f'{value:.2f}'
+
+
+def order_records(orders, lines=False):
+    """Плоские записи выгрузки: по одной на заказ или (lines=True) на позицию заказа"""
+    for order in orders:
+        record = {
+            'id': order['id'],
+            'table_number': order['table_number'],
+            'status': order['status'],
+            'total_price': _format_price(order['total_price']),
+            'created_at': order['created_at'].isoformat() if order['created_at'] else None,
+            'version': order['version'],
+        }
+        if not lines:
+            record['items'] = order['items']
+            yield record
+            continue
+        if not order['items']:
+            # Заказ без позиций все равно попадает в выгрузку
+            yield {**record, 'item_position': None, 'item_name': None, 'item_price': None}
+        for position, item in enumerate(order['items']):
+            yield {
+                **record,
+                'item_position': position,
+                'item_name': item.get('name'),
+                'item_price': _format_price(float(item.get('price') or 0)),
+            }
+
+
+def _csv_columns(lines):
+    return ORDER_COLUMNS + (LINE_COLUMNS if lines else ('items',))
+
+
+def encode_chunks(records, export_format, lines=False, chunk_size=None):
+    """Кодирует записи в байты порциями по chunk_size записей"""
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    if export_format == 'csv':
+        columns = _csv_columns(lines)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+    else:
+        buffer = io.BytesIO()
+
+    count = 0
+    for record in records:
+        if export_format == 'csv':
+            if not lines:
+                # Состав заказа без разбивки на позиции - JSON в одной ячейке
+                record = {**record, 'items': serializers.dumps(record['items']).decode('utf-8')}
+            writer.writerow([record[column] for column in columns])
+        else:
+            buffer.write(serializers.dumps(record) + b'\n')
+        count += 1
+        if count % chunk_size == 0:
+            yield _drain(buffer)
+    data = _drain(buffer)
+    if data:
+        yield data
+
+
+def _drain(buffer):
+    data = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return data.encode('utf-8') if isinstance(data, str) else data
+
+
+def gzip_chunks(chunks):
+    """Сжимает поток байтов в формат gzip на лету"""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(export_format, lines=False, compress=False, **filters):
+    """Поток байтов выгрузки; filters - аргументы iter_orders()"""
+    chunks = encode_chunks(order_records(iter_orders(**filters), lines), export_format, lines)
+    return gzip_chunks(chunks) if compress else chunks
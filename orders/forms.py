@@ -1,8 +1,90 @@
 from django import forms
 from .models import Order, MenuItem
-import re
+from . import menu, parsers, pricing
 import json
 
+# То же поле формы, что строит OrderForm для Order.table_number
+_table_number_field = Order._meta.get_field('table_number').formfield()
+
+
+def clean_order_payload(data):
+    """Проверяет заказ из JSON по тем же правилам, что и OrderForm.
+    
+    Возвращает (данные заказа, словарь ошибок по полям).
+    """
+    errors = {}
+    if not isinstance(data, dict):
+        return None, {'__all__': ['Заказ должен быть объектом JSON']}
+    
+    try:
+        table_number = _table_number_field.clean(data.get('table_number'))
+    except forms.ValidationError as e:
+        errors['table_number'] = e.messages
+    
+    status = data.get('status', 'waiting')
+    if status not in dict(Order.STATUS_CHOICES):
+        errors['status'] = ['Неверный статус']
+    
+    # Состав заказа - списком items и/или текстом items_text в формате формы,
+    # цены блюд меню проставляются по таблице цен (orders.pricing)
+    table = pricing.get_price_table()
+    json_items, item_errors = parsers.parse_json_items(data.get('items', []))
+    json_items, price_errors = pricing.resolve_items(json_items, table)
+    if item_errors or price_errors:
+        errors['items'] = item_errors + price_errors
+    text_items = []
+    items_text = data.get('items_text')
+    if items_text is not None:
+        if isinstance(items_text, str):
+            text_items, text_errors = parsers.parse_text(items_text)
+            text_items, price_errors = pricing.resolve_items(text_items, table)
+            text_errors += price_errors
+        else:
+            text_errors = ['Ожидается строка']
+        if text_errors:
+            errors['items_text'] = text_errors
+    items, total_price = parsers.merge_items(json_items, text_items)
+    if not items and 'items' not in errors and 'items_text' not in errors:
+        errors['__all__'] = ['Добавьте хотя бы одно блюдо через любой из способов ввода']
+    
+    if errors:
+        return None, errors
+    return {'table_number': table_number, 'items': items, 'total_price': total_price, 'status': status}, {}
+
+
+def _menu_choices():
+    return [(entry.id, str(entry)) for entry in menu.get_snapshot().available]
+
+
+class MenuItemsField(forms.MultipleChoiceField):
+    """Выбор доступных блюд из снимка меню (orders.menu) без запросов к MenuItem.
+    
+    Возвращает список MenuEntry с полями id, name, price, category.
+    """
+    
+    def __init__(self, **kwargs):
+        super().__init__(choices=_menu_choices, **kwargs)
+    
+    def clean(self, value):
+        value = self.to_python(value)
+        if self.required and not value:
+            raise forms.ValidationError(self.error_messages['required'], code='required')
+        
+        available = menu.get_snapshot().available_by_id
+        entries = []
+        for item_id in value:
+            try:
+                entries.append(available[int(item_id)])
+            except (KeyError, ValueError):
+                raise forms.ValidationError(
+                    self.error_messages['invalid_choice'],
+                    code='invalid_choice',
+                    params={'value': item_id},
+                )
+        self.run_validators(value)
+        return entries
+
+
 class OrderTemplateForm(forms.Form):
     """Форма для выбора шаблона заказа"""
     template = forms.ModelChoiceField(
@@ -29,20 +111,19 @@ class OrderForm(forms.ModelForm):
     items_text = forms.CharField(
         widget=forms.Textarea(attrs={
             'rows': 5,
-            'placeholder': 'Введите блюда в формате "название - цена" (по одному на строку)\nПример:\nСуп - 250\nКофе - 150'
+            'placeholder': 'Введите блюда в формате "название - цена" или "название x2 - цена" (по одному на строку)\nПример:\nСуп - 250\nКофе x2 - 150'
         }),
         required=False,
         label="Блюда (текстовый ввод)"
     )
     
     # Поле для выбора готовых блюд из меню
-    menu_items = forms.ModelMultipleChoiceField(
-        queryset=MenuItem.objects.filter(is_available=True),
+    menu_items = MenuItemsField(
         widget=forms.CheckboxSelectMultiple,
         required=False,
         label="Выберите из меню"
     )
-
+    
     class Meta:
         model = Order
         fields = ['table_number', 'items']
@@ -53,81 +134,50 @@ class OrderForm(forms.ModelForm):
         widgets = {
             'table_number': forms.NumberInput(attrs={'class': 'form-control', 'min': 1}),
         }
-
+    
     def clean(self):
         cleaned_data = super().clean()
         items_text = cleaned_data.get('items_text', '')
         items_json = cleaned_data.get('items', '')
         menu_items = cleaned_data.get('menu_items', [])
         
-        # Словарь для отслеживания уникальности блюд (ключ: (название, цена))
-        unique_items = {}
-        
-        # Обработка текстового ввода
+        # Все способы ввода разбираются общим парсером (orders.parsers), цены блюд
+        # меню берутся из таблицы цен (orders.pricing); ошибки каждого поля
+        # добавляются одним вызовом
+        table = pricing.get_price_table()
+        text_items = []
         if items_text:
-            lines = items_text.strip().split('\n')
-            for line in lines:
-                if not line.strip():
-                    continue
-                    
-                # Парсим строку в формате "название - цена"
-                match = re.match(r'(.+?)\s*-\s*(\d+(?:\.\d+)?)', line)
-                if match:
-                    name = match.group(1).strip()
-                    try:
-                        price = float(match.group(2))
-                        item_key = (name, price)
-                        if item_key not in unique_items:
-                            unique_items[item_key] = {"name": name, "price": price}
-                    except ValueError:
-                        self.add_error('items_text', f'Некорректная цена в строке: "{line}"')
-                else:
-                    self.add_error('items_text', f'Некорректный формат в строке: "{line}". Используйте формат "название - цена"')
+            text_items, errors = parsers.parse_text(items_text)
+            text_items, price_errors = pricing.resolve_items(text_items, table)
+            if errors or price_errors:
+                self.add_error('items_text', errors + price_errors)
         
-        # Обработка JSON-ввода
+        json_items = []
         if items_json:
             try:
-                json_items = json.loads(items_json)
-                if isinstance(json_items, list):
-                    for item in json_items:
-                        if isinstance(item, dict) and 'name' in item and 'price' in item:
-                            name = item['name']
-                            try:
-                                price = float(item['price'])
-                                item_key = (name, price)
-                                if item_key not in unique_items:
-                                    unique_items[item_key] = {"name": name, "price": price}
-                            except (ValueError, TypeError):
-                                self.add_error('items', f'Некорректная цена для блюда "{name}"')
-                        else:
-                            self.add_error('items', 'Каждый элемент должен содержать поля "name" и "price"')
-                else:
-                    self.add_error('items', 'JSON должен быть списком объектов')
+                json_items, errors = parsers.parse_json_items(json.loads(items_json))
             except json.JSONDecodeError:
-                self.add_error('items', 'Некорректный JSON формат')
+                errors = ['Некорректный JSON формат']
+            json_items, price_errors = pricing.resolve_items(json_items, table)
+            if errors or price_errors:
+                self.add_error('items', errors + price_errors)
         
-        # Обработка выбранных элементов меню
-        if menu_items:
-            for item in menu_items:
-                name = item.name
-                price = float(item.price)
-                item_key = (name, price)
-                if item_key not in unique_items:
-                    unique_items[item_key] = {"name": name, "price": price}
-        
-        # Преобразуем словарь уникальных блюд обратно в список
-        items = list(unique_items.values())
+        menu_entries, errors = pricing.resolve_items([(entry.id, None, 1) for entry in menu_items or ()], table)
+        if errors:
+            self.add_error('menu_items', errors)
+        items, total_price = parsers.merge_items(text_items, json_items, menu_entries)
         
         # Проверяем, что хотя бы один способ ввода был использован
         if not items:
             self.add_error(None, 'Добавьте хотя бы одно блюдо через любой из способов ввода')
         
         cleaned_data['items'] = items
+        cleaned_data['total_price'] = total_price
         return cleaned_data
-
+    
     def save(self, commit=True):
         instance = super(OrderForm, self).save(commit=False)
-        instance.items = self.cleaned_data.get('items', [])
+        instance.set_items(self.cleaned_data.get('items', []), self.cleaned_data.get('total_price'))
         
         if commit:
             instance.save()
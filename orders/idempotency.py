@@ -0,0 +1,112 @@
+"""Идемпотентное создание заказов по заголовку Idempotency-Key.
+
+Планшеты повторяют POST при таймауте. Первый успешный ответ на запрос с
+ключом сохраняется в таблице IdempotencyKey в той же транзакции, что и
+созданный заказ; повтор с тем же ключом в пределах ORDERS_IDEMPOTENCY_TTL
+получает сохраненный ответ без новой вставки.
+
+Одновременные повторы: в SQLite транзакция берет блокировку записи сразу
+(режим IMMEDIATE), поэтому второй запрос ждет первого и находит его ключ.
+В остальных БД второй запрос упирается в уникальный индекс по key, его
+транзакция (вместе с заказом) откатывается, и он отдает ответ первого.
+"""
+import functools
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+KEY_MAX_LENGTH = 255
+# Очистка устаревших ключей - раз на столько записей
+PRUNE_EVERY = 100
+
+
+def _ttl():
+    return timedelta(seconds=getattr(settings, 'ORDERS_IDEMPOTENCY_TTL', 60 * 60 * 24))
+
+
+def _max_keys():
+    return getattr(settings, 'ORDERS_IDEMPOTENCY_MAX_KEYS', 100000)
+
+
+def fingerprint(request):
+    digest = hashlib.sha256()
+    for part in (request.method.encode(), request.path.encode(), request.body):
+        digest.update(part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _find(key):
+    """Действующая запись ключа; устаревшая удаляется, чтобы ключ можно было занять снова"""
+    record = IdempotencyKey.objects.filter(key=key).first()
+    if record is not None and record.created_at < timezone.now() - _ttl():
+        record.delete()
+        return None
+    return record
+
+
+def _replay(record, request_fingerprint):
+    if record.fingerprint != request_fingerprint:
+        return JsonResponse({"error": f"{HEADER} was already used for a different request"}, status=422)
+    response = HttpResponse(bytes(record.body), status=record.status_code, content_type=record.content_type)
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def prune():
+    """Удаляет ключи старше TTL и самые старые ключи сверх ORDERS_IDEMPOTENCY_MAX_KEYS"""
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=timezone.now() - _ttl()).delete()
+    newest = IdempotencyKey.objects.order_by('-id').values_list('id', flat=True).first()
+    if newest is not None:
+        extra, _ = IdempotencyKey.objects.filter(id__lte=newest - _max_keys()).delete()
+        deleted += extra
+    return deleted
+
+
+def idempotent(view):
+    """Декоратор POST-представления: повтор запроса с тем же Idempotency-Key отдает первый ответ.
+    
+    Сохраняются только успешные ответы (2xx): после ошибки запрос можно повторить.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if request.method != 'POST' or key is None:
+            return view(request, *args, **kwargs)
+        if not key or len(key) > KEY_MAX_LENGTH:
+            return JsonResponse({"error": f"{HEADER} must be 1-{KEY_MAX_LENGTH} characters"}, status=400)
+        
+        request_fingerprint = fingerprint(request)
+        try:
+            with transaction.atomic():
+                record = _find(key)
+                if record is not None:
+                    return _replay(record, request_fingerprint)
+                response = view(request, *args, **kwargs)
+                if 200 <= response.status_code < 300 and not response.streaming:
+                    record = IdempotencyKey.objects.create(
+                        key=key,
+                        fingerprint=request_fingerprint,
+                        status_code=response.status_code,
+                        content_type=response.get('Content-Type', ''),
+                        body=response.content,
+                    )
+                    if record.id % PRUNE_EVERY == 0:
+                        prune()
+                return response
+        except IntegrityError:
+            # Одновременный запрос с тем же ключом зафиксировался первым
+            record = _find(key)
+            if record is None:
+                raise
+            return _replay(record, request_fingerprint)
+    
+    return wrapper
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from orders import archive
+
+
+class Command(BaseCommand):
+    help = 'Переносит оплаченные заказы старше заданного числа дней в архив (ArchivedOrder)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='возраст заказа в днях (по умолчанию ORDERS_ARCHIVE_AFTER_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=archive.ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='только посчитать заказы для переноса')
+
+    def handle(self, *args, **options):
+        before = archive.archive_cutoff(options['days'])
+        if options['dry_run']:
+            count = archive.archivable_orders(before).count()
+            self.stdout.write(f'Будет перенесено заказов: {count}')
+            return
+        count = archive.archive_orders(before, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Перенесено в архив заказов: {count}'))
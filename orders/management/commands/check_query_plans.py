@@ -0,0 +1,124 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.http import Http404
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from orders import cache
+from orders.models import DailyStatusRollup, MenuItem, Order, TableState
+
+# Запросы API и списка заказов: (название, путь, таблицы, которые можно читать целиком)
+CHECKS = [
+    ('Список заказов', '/orders/', ()),
+    ('Список заказов, старше курсора', '/orders/?before={order_id}', ()),
+    ('Список заказов по статусу', '/orders/?status=waiting', ()),
+    ('Список заказов по столу и статусу', '/orders/?table_number=1&status=ready&before={order_id}', ()),
+    ('API: первая страница', '/api/orders/?limit=100', ()),
+    ('API: страница после курсора', '/api/orders/?limit=100&after={order_id}', ()),
+    ('API: фильтр по статусу', '/api/orders/?status=paid&limit=100&after={order_id}', ()),
+    ('API: фильтр по столу', '/api/orders/?table_number=1&limit=100', ()),
+    ('API: фильтр по столу и статусу', '/api/orders/?table_number=1&status=waiting&limit=100', ()),
+    ('API: неоплаченные заказы для кухни', '/api/orders/?status=unpaid&limit=100', ()),
+    ('API: заказ', '/api/orders/{order_id}/', ()),
+    ('API: меню', '/api/menu/', (MenuItem._meta.db_table,)),
+    ('API: выручка', '/api/revenue/', ()),
+    ('API: выручка по дням', '/api/revenue/?date_from=2024-01-01&date_to=2024-12-31', ()),
+    ('API: выручка за период', '/api/revenue/?date_from=2024-01-01T10:00:00Z&date_to=2024-01-31T22:00:00Z', ()),
+    # Статистика за все время по определению читает все дневные агрегаты
+    ('API: статистика', '/api/statistics/', (DailyStatusRollup._meta.db_table,)),
+    ('API: аналитика по часам', '/api/analytics/?bucket=hour&date_from=2024-01-01&date_to=2024-01-31', ()),
+    ('API: аналитика по столам', '/api/analytics/?group=table&date_from=2024-01-01&date_to=2024-01-31', ()),
+    ('API: аналитика по блюдам', '/api/analytics/?group=dish&date_from=2024-01-01&date_to=2024-01-31', ()),
+    # Список столов читает по строке на стол с открытыми заказами, таблица заказов не затрагивается
+    ('API: столы', '/api/tables/', (TableState._meta.db_table,)),
+    ('API: стол', '/api/tables/1/', ()),
+]
+
+SCAN_RE = re.compile(r'^SCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?')
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет EXPLAIN QUERY PLAN для запросов API и списка заказов '
+        'и завершается с ошибкой, если какой-либо из них читает таблицу целиком'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='печатать планы всех запросов')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда проверяет планы запросов только для SQLite')
+
+        order_id = Order.objects.order_by('id').values_list('id', flat=True).first() or 1
+        factory = RequestFactory()
+        partial_indexes = self.partial_indexes()
+        failures = 0
+
+        for name, path, allowed_tables in CHECKS:
+            plans = list(self.explain_route(factory, path.format(order_id=order_id)))
+            scans = [
+                (sql, plan, self.full_scans(sql, plan, allowed_tables, partial_indexes))
+                for sql, plan in plans
+            ]
+            tables = sorted({table for _, _, found in scans for table in found})
+            if tables:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f'{name}: полное чтение {", ".join(tables)}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'{name}: OK'))
+            for sql, plan, found in scans:
+                if found or options['verbose_plans']:
+                    self.stdout.write(f'  {sql}')
+                    for detail in plan:
+                        self.stdout.write(f'    {detail}')
+
+        if failures:
+            raise CommandError(f'Полное чтение таблиц в запросах: {failures}')
+
+    def partial_indexes(self):
+        """Имена частичных индексов: их просмотр читает только подходящие строки"""
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL")
+            return {name for name, sql in cursor.fetchall() if ' WHERE ' in sql.upper()}
+
+    def explain_route(self, factory, path):
+        """Выполняет маршрут и возвращает пары (SQL, строки плана) для его SELECT-запросов"""
+        # Сбрасываем кеш ответов, чтобы маршрут действительно выполнил запросы
+        cache.bump(cache.MENU, cache.REVENUE, cache.STATISTICS)
+        request = factory.get(path)
+        match = resolve(request.path_info)
+        with CaptureQueriesContext(connection) as queries:
+            try:
+                match.func(request, *match.args, **match.kwargs)
+            except Http404:
+                pass  # в пустой базе заказа нет, но запрос все равно выполнен
+
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                sql = query['sql']
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                yield sql, [row[3] for row in cursor.fetchall()]
+
+    def full_scans(self, sql, plan, allowed_tables, partial_indexes):
+        """Таблицы, которые план читает целиком.
+
+        Чтение по порядку без фильтра и без сортировки во временном B-дереве
+        (первая страница с LIMIT) останавливается на лимите и полным не считается,
+        как и просмотр частичного индекса.
+        """
+        bounded = ' LIMIT ' in sql and ' WHERE ' not in sql and not any('TEMP B-TREE' in detail for detail in plan)
+        scans = []
+        for detail in plan:
+            match = SCAN_RE.match(detail)
+            if not match or bounded:
+                continue
+            table, index = match.groups()
+            if table not in allowed_tables and index not in partial_indexes:
+                scans.append(table)
+        return scans
@@ -0,0 +1,53 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from orders import export
+
+
+class Command(BaseCommand):
+    help = 'Потоково выгружает заказы (рабочие и архивные) в CSV или NDJSON для бухгалтерии'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=export.EXPORT_FORMATS, default='csv')
+        parser.add_argument('--lines', action='store_true', help='по строке на позицию заказа')
+        parser.add_argument('--date-from', help='дата или момент начала периода')
+        parser.add_argument('--date-to', help='дата (включительно) или момент конца периода')
+        parser.add_argument('--status', help="статус заказа или 'unpaid'")
+        parser.add_argument('--after', type=int, help='продолжить выгрузку после заказа с этим id')
+        parser.add_argument('--gzip', action='store_true', help='сжимать вывод gzip')
+        parser.add_argument('--output', help='файл для выгрузки (по умолчанию stdout)')
+
+    def handle(self, *args, **options):
+        try:
+            date_from = export.parse_bound(options['date_from'], 'date_from')
+            date_to = export.parse_bound(options['date_to'], 'date_to', end=True)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.last_id = options['after']
+        orders = export.iter_orders(
+            date_from=date_from, date_to=date_to, status=options['status'], after=options['after']
+        )
+        chunks = export.encode_chunks(
+            export.order_records(self.track(orders), options['lines']), options['format'], options['lines']
+        )
+        if options['gzip']:
+            chunks = export.gzip_chunks(chunks)
+
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                self.write_chunks(chunks, output)
+        else:
+            self.write_chunks(chunks, sys.stdout.buffer)
+        # Курсор для продолжения прерванной выгрузки (--after)
+        self.stderr.write(f'Последний выгруженный заказ: {self.last_id}')
+
+    def track(self, orders):
+        for order in orders:
+            yield order
+            self.last_id = order['id']
+
+    def write_chunks(self, chunks, output):
+        for chunk in chunks:
+            output.write(chunk)
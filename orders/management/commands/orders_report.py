@@ -0,0 +1,33 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from orders import reports
+
+
+class Command(BaseCommand):
+    help = 'Отчет за период: группировки, перцентили чека, топ блюд и оборачиваемость столов (JSON)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date-from', help='первый день периода (по умолчанию - начало месяца)')
+        parser.add_argument('--date-to', help='последний день периода (по умолчанию - сегодня)')
+        parser.add_argument('--top', type=int, default=reports.TOP_DISHES, help='число блюд в топе')
+        parser.add_argument('--engine', choices=reports.ENGINES, help='по умолчанию numpy, если установлен')
+
+    def handle(self, *args, **options):
+        try:
+            day_to = parse_date(options['date_to']) if options['date_to'] else timezone.localdate()
+            day_from = parse_date(options['date_from']) if options['date_from'] else day_to and day_to.replace(day=1)
+        except ValueError:
+            # Дата правильного формата, но несуществующая (2024-02-30) - как 400 в /api/reports/
+            raise CommandError('Invalid date')
+        if day_from is None or day_to is None or day_from > day_to:
+            raise CommandError('Некорректный период')
+        try:
+            report = reports.build_report(day_from, day_to, top=options['top'], engine=options['engine'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(json.dumps(report, cls=DjangoJSONEncoder, ensure_ascii=False, indent=2))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from orders import idempotency
+
+
+class Command(BaseCommand):
+    help = 'Удаляет устаревшие ключи Idempotency-Key (старше ORDERS_IDEMPOTENCY_TTL и сверх ORDERS_IDEMPOTENCY_MAX_KEYS)'
+
+    def handle(self, *args, **options):
+        deleted = idempotency.prune()
+        self.stdout.write(self.style.SUCCESS(f'Удалено ключей: {deleted}'))
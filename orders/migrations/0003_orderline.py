@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_menuitem_alter_order_options_order_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('quantity', models.PositiveIntegerField(default=1)),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('menu_item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_lines', to='orders.menuitem')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='orders.order')),
+            ],
+            options={
+                'ordering': ['order', 'position'],
+                'indexes': [models.Index(fields=['order', 'position'], name='orders_orde_order_i_50b9e9_idx'), models.Index(fields=['menu_item', 'order'], name='orders_orde_menu_it_a8f0fb_idx'), models.Index(fields=['name'], name='orders_orde_name_aa822a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,76 @@
+from decimal import Decimal
+
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+
+def backfill_order_lines(apps, schema_editor):
+    """Заполняет OrderLine по Order.items пакетами, не загружая всю таблицу в память"""
+    Order = apps.get_model('orders', 'Order')
+    OrderLine = apps.get_model('orders', 'OrderLine')
+    MenuItem = apps.get_model('orders', 'MenuItem')
+    db_alias = schema_editor.connection.alias
+    
+    menu_ids = {}
+    for item_id, name in MenuItem.objects.using(db_alias).order_by('-id').values_list('id', 'name'):
+        menu_ids[name] = item_id
+    
+    last_id = 0
+    while True:
+        batch = list(
+            Order.objects.using(db_alias)
+            .filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', 'items')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_id = batch[-1][0]
+        
+        # Повторный запуск не должен дублировать уже перенесенные позиции
+        done = set(
+            OrderLine.objects.using(db_alias)
+            .filter(order_id__in=[order_id for order_id, _ in batch])
+            .values_list('order_id', flat=True)
+        )
+        
+        new_lines = []
+        for order_id, items in batch:
+            if order_id in done:
+                continue
+            lines = {}
+            for item in items or []:
+                name = str(item.get('name', ''))[:100]
+                price = Decimal(str(item.get('price', 0)))
+                key = (name, price)
+                if key in lines:
+                    lines[key][1] += 1
+                else:
+                    lines[key] = [len(lines), 1]
+            for (name, price), (position, quantity) in lines.items():
+                new_lines.append(OrderLine(
+                    order_id=order_id,
+                    menu_item_id=menu_ids.get(name),
+                    name=name,
+                    quantity=quantity,
+                    unit_price=price,
+                    position=position,
+                ))
+        OrderLine.objects.using(db_alias).bulk_create(new_lines, batch_size=BATCH_SIZE)
+
+
+def remove_order_lines(apps, schema_editor):
+    OrderLine = apps.get_model('orders', 'OrderLine')
+    OrderLine.objects.using(schema_editor.connection.alias).all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_orderline'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_order_lines, remove_order_lines),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:54
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def build_rollups(apps, schema_editor):
+    """Первичное заполнение агрегатов по существующим заказам"""
+    Order = apps.get_model('orders', 'Order')
+    DailyStatusRollup = apps.get_model('orders', 'DailyStatusRollup')
+    db_alias = schema_editor.connection.alias
+    rows = (
+        Order.objects.using(db_alias)
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'status')
+        .annotate(order_count=Count('id'), revenue=Sum('total_price'))
+        .order_by()
+    )
+    DailyStatusRollup.objects.using(db_alias).bulk_create([
+        DailyStatusRollup(day=row['day'], status=row['status'],
+                          order_count=row['order_count'], revenue=row['revenue'] or 0)
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_backfill_orderlines'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStatusRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('waiting', 'В ожидании'), ('ready', 'Готово'), ('paid', 'Оплачено')], max_length=10)),
+                ('order_count', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'ordering': ['day', 'status'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'status'), name='unique_rollup_day_status')],
+            },
+        ),
+        migrations.RunPython(build_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_order_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dailystatusrollup',
+            index=models.Index(fields=['status', 'day', 'revenue'], name='orders_rollup_revenue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['table_number', 'status', 'id'], name='orders_orde_table_n_f6ae3d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'created_at', 'total_price'], name='orders_order_revenue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'paid'), _negated=True), fields=['id'], name='orders_order_unpaid_idx'),
+        ),
+        # Одиночные индексы удаляются после создания составных, которые их заменяют
+        migrations.RemoveIndex(
+            model_name='order',
+            name='orders_orde_status_c6dd84_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='order',
+            name='orders_orde_table_n_63e048_idx',
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:14
+
+from django.db import migrations, models
+
+
+def build_table_state(apps, schema_editor):
+    """Первичное заполнение состояния столов по неоплаченным заказам"""
+    Order = apps.get_model('orders', 'Order')
+    TableState = apps.get_model('orders', 'TableState')
+    db_alias = schema_editor.connection.alias
+    states = {}
+    rows = (
+        Order.objects.using(db_alias).exclude(status='paid').order_by()
+        .values_list('id', 'table_number', 'status', 'total_price', 'created_at')
+    )
+    for order_id, table_number, status, total_price, created_at in rows:
+        state = states.setdefault(table_number, TableState(table_number=table_number, open_orders={}))
+        state.open_orders[str(order_id)] = {
+            'status': status,
+            'total_price': str(total_price),
+            'created_at': created_at.isoformat() if created_at else None,
+        }
+        state.unpaid_total += total_price
+        if status == 'waiting' and (state.oldest_waiting_at is None or created_at < state.oldest_waiting_at):
+            state.oldest_waiting_at = created_at
+    TableState.objects.using(db_alias).bulk_create(states.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_order_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableState',
+            fields=[
+                ('table_number', models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ('open_orders', models.JSONField(default=dict)),
+                ('unpaid_total', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('oldest_waiting_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['table_number'],
+            },
+        ),
+        migrations.RunPython(build_table_state, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,10 @@
-from django.db import models
-from django.utils import timezone
+from django.db import models, transaction
 from decimal import Decimal
 
+# Значение фильтра status в API и выгрузке: все неоплаченные заказы
+UNPAID_STATUS = 'unpaid'
+
+
 class Order(models.Model):
     STATUS_CHOICES = [
         ('waiting', 'В ожидании'),
@@ -16,21 +19,112 @@ class Order(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='waiting')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Номер версии для оптимистичной блокировки: увеличивается при каждом сохранении
+    version = models.PositiveIntegerField(default=1)
+    
+    # Допустимые переходы статусов (только вперед: ожидание -> готово -> оплачено)
+    ALLOWED_TRANSITIONS = {
+        'waiting': {'ready', 'paid'},
+        'ready': {'paid'},
+        'paid': set(),
+    }
     
     class Meta:
         ordering = ['-created_at']
+        # Индексы повторяют реальные запросы (проверка: manage.py check_query_plans).
+        # Отдельные индексы по status и table_number не нужны - это префиксы составных
         indexes = [
-            models.Index(fields=['status']),
-            models.Index(fields=['table_number']),
             models.Index(fields=['created_at']),
+            # Фильтр списка заказов с сортировкой по id (курсорная навигация)
+            models.Index(fields=['status', 'id']),
+            models.Index(fields=['table_number', 'id']),
+            models.Index(fields=['table_number', 'status', 'id']),
+            # Выручка за период: сумма читается из индекса без обращения к таблице
+            models.Index(fields=['status', 'created_at', 'total_price'], name='orders_order_revenue_idx'),
+            # Неоплаченные заказы для кухни - небольшая часть таблицы
+            models.Index(fields=['id'], condition=~models.Q(status='paid'), name='orders_order_unpaid_idx'),
         ]
     
+    # Состав, которому соответствуют total_price и позиции OrderLine в БД
+    # (значения orders.pricing.items_key); None - еще не считались
+    _priced_key = None
+    _saved_key = None
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем состояние из БД, чтобы при сохранении посчитать изменение агрегатов
+        instance._tracked_state = instance.get_tracked_state()
+        if 'items' not in instance.get_deferred_fields():
+            from .pricing import items_key
+            instance._priced_key = instance._saved_key = items_key(instance.items)
+        return instance
+    
+    def get_tracked_state(self):
+        """Снимок полей, от которых зависят агрегаты (None, если поля отложены)"""
+        from .tracking import OrderState
+        if self.get_deferred_fields() & OrderState.FIELDS:
+            return None
+        return OrderState.of(self)
+    
+    def set_items(self, items, total_price=None):
+        """Задает состав заказа вместе с уже посчитанным итогом (orders.pricing)"""
+        from .pricing import items_key, items_total
+        self.items = items
+        self.total_price = items_total(items) if total_price is None else total_price
+        self._priced_key = items_key(items)
+    
     def save(self, *args, **kwargs):
-        # Рассчитываем общую стоимость заказа только если items изменились
-        # или это новый объект
-        if not self.pk or 'items' in kwargs.get('update_fields', ['items']):
-            self.total_price = sum(Decimal(str(item.get('price', 0))) for item in self.items)
-        super().save(*args, **kwargs)
+        # Итог и позиции пересчитываются, только если состав заказа отличается
+        # от сохраненного; update_fields без items состав не проверяет
+        from .pricing import items_key, items_total
+        update_fields = kwargs.get('update_fields')
+        items_changed = False
+        if update_fields is None or 'items' in update_fields:
+            key = items_key(self.items)
+            items_changed = key != self._saved_key
+            if key != self._priced_key:
+                self.total_price = items_total(self.items)
+                self._priced_key = key
+                if update_fields is not None:
+                    kwargs['update_fields'] = {*update_fields, 'total_price'}
+        
+        # Версия увеличивается в самой БД, чтобы не затереть параллельное изменение
+        bump_version = not self._state.adding
+        if bump_version:
+            self.version = models.F('version') + 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        
+        # Заказ, его позиции OrderLine и агрегаты (через post_save) пишутся в одной транзакции.
+        # Переходный период: items остается основным источником, OrderLine - его копия
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            if items_changed:
+                self.sync_lines()
+                self._saved_key = key
+        if bump_version:
+            # Новое значение будет прочитано из БД при первом обращении
+            del self.version
+
+
+    def sync_lines(self):
+        """Пересоздает позиции OrderLine по текущему содержимому items"""
+        self.lines.all().delete()
+        OrderLine.objects.bulk_create(OrderLine.build_for_orders([self]))
+    
+    def lines_as_items(self):
+        """Возвращает позиции OrderLine в формате поля items.
+        
+        Одинаковые блюда хранятся одной позицией, поэтому идут подряд в порядке
+        первого появления: [Суп, Кофе, Суп] читается как [Суп, Суп, Кофе].
+        Состав из orders.parsers.merge_items уже сгруппирован так и читается без изменений.
+        """
+        return [
+            {'name': line.name, 'price': float(line.unit_price)}
+            for line in self.lines.all()
+            for _ in range(line.quantity)
+        ]
     
     def get_items_count(self):
         """Возвращает количество позиций в заказе"""
@@ -48,7 +142,7 @@ class Order(models.Model):
             'paid': 'bg-success',
         }
         return status_classes.get(self.status, 'bg-secondary')
-        
+    
     def __str__(self):
         return f"Order #{self.id} for Table {self.table_number}"
 
@@ -85,3 +179,197 @@ class MenuItem(models.Model):
     
     def __str__(self):
         return f"{self.name} ({self.price}₽)"
+
+
+class OrderLine(models.Model):
+    """Позиция заказа: нормализованное представление элемента Order.items"""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='lines')
+    menu_item = models.ForeignKey(
+        MenuItem, on_delete=models.SET_NULL, null=True, blank=True, related_name='order_lines'
+    )
+    name = models.CharField(max_length=100)
+    quantity = models.PositiveIntegerField(default=1)
+    unit_price = models.DecimalField(max_digits=8, decimal_places=2)
+    # Порядок позиции внутри заказа (как в исходном списке items)
+    position = models.PositiveSmallIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['order', 'position']
+        indexes = [
+            models.Index(fields=['order', 'position']),
+            models.Index(fields=['menu_item', 'order']),
+            models.Index(fields=['name']),
+        ]
+    
+    @classmethod
+    def build_for_orders(cls, orders):
+        """Строит (без сохранения) позиции для списка заказов.
+        
+        Одинаковые блюда (название и цена) схлопываются в одну позицию с количеством,
+        блюда сопоставляются с меню по названию через снимок меню (orders.menu).
+        """
+        grouped = []
+        names = set()
+        for order in orders:
+            lines = {}
+            for item in order.items:
+                name = str(item.get('name', ''))[:100]
+                price = Decimal(str(item.get('price', 0)))
+                key = (name, price)
+                if key in lines:
+                    lines[key][1] += 1
+                else:
+                    lines[key] = [len(lines), 1]
+                names.add(name)
+            grouped.append((order, lines))
+        
+        # Названия сопоставляются по снимку меню: без запросов к MenuItem, пока меню не менялось
+        from .menu import get_snapshot
+        menu_ids = get_snapshot().ids_by_name if names else {}
+        
+        return [
+            cls(
+                order=order,
+                menu_item_id=menu_ids.get(name),
+                name=name,
+                quantity=quantity,
+                unit_price=price,
+                position=position,
+            )
+            for order, lines in grouped
+            for (name, price), (position, quantity) in lines.items()
+        ]
+    
+    @property
+    def line_total(self):
+        return self.unit_price * self.quantity
+    
+    def __str__(self):
+        return f"{self.name} x{self.quantity} ({self.unit_price}₽)"
+
+
+class DailyStatusRollup(models.Model):
+    """Агрегат заказов за день в разрезе статуса.
+    
+    Поддерживается инкрементально при создании, изменении и удалении заказов
+    (см. orders.tracking), полностью пересчитывается командой rebuild_rollups.
+    """
+    day = models.DateField()
+    status = models.CharField(max_length=10, choices=Order.STATUS_CHOICES)
+    order_count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        ordering = ['day', 'status']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'status'], name='unique_rollup_day_status'),
+        ]
+        indexes = [
+            # Выручка за диапазон дней читается из индекса
+            models.Index(fields=['status', 'day', 'revenue'], name='orders_rollup_revenue_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} {self.status}: {self.order_count} / {self.revenue}₽"
+
+
+class OrderEvent(models.Model):
+    """Журнал событий заказов для рассылки между процессами (orders.events.DatabaseBackend)"""
+    kind = models.CharField(max_length=32)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"Event #{self.id} {self.kind}"
+
+
+class ArchivedOrder(models.Model):
+    """Оплаченный заказ, перенесенный из Order командой archive_orders.
+    
+    id совпадает с id исходного заказа (SQLite не переиспользует id удаленных строк),
+    поэтому заказ находится по тому же номеру в любом из хранилищ.
+    """
+    id = models.IntegerField(primary_key=True)
+    table_number = models.PositiveIntegerField()
+    items = models.JSONField(default=list)
+    total_price = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    status = models.CharField(max_length=10, choices=Order.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    version = models.PositiveIntegerField(default=1)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at', 'total_price'], name='orders_archive_revenue_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Archived order #{self.id} for Table {self.table_number}"
+
+
+class ArchivedOrderLine(models.Model):
+    """Позиция архивного заказа (копия OrderLine)"""
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE, related_name='lines')
+    menu_item = models.ForeignKey(
+        MenuItem, on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_lines'
+    )
+    name = models.CharField(max_length=100)
+    quantity = models.PositiveIntegerField(default=1)
+    unit_price = models.DecimalField(max_digits=8, decimal_places=2)
+    position = models.PositiveSmallIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['order', 'position']
+        indexes = [
+            models.Index(fields=['order', 'position']),
+            models.Index(fields=['menu_item', 'order']),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} x{self.quantity} ({self.unit_price}₽)"
+
+
+class TableState(models.Model):
+    """Текущее состояние стола: неоплаченные заказы и сумма к оплате.
+    
+    Поддерживается при создании, смене статуса и удалении заказов (см. orders.tables),
+    строка существует только пока у стола есть неоплаченные заказы.
+    Восстанавливается командой rebuild_table_state.
+    """
+    table_number = models.PositiveIntegerField(primary_key=True)
+    # Неоплаченные заказы: {"<id>": {"status", "total_price", "created_at"}}
+    open_orders = models.JSONField(default=dict)
+    unpaid_total = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    oldest_waiting_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['table_number']
+    
+    def __str__(self):
+        return f"Table {self.table_number}: {len(self.open_orders)} open / {self.unpaid_total}₽"
+
+
+class IdempotencyKey(models.Model):
+    """Сохраненный ответ на запрос с заголовком Idempotency-Key.
+    
+    Повтор запроса с тем же ключом в пределах ORDERS_IDEMPOTENCY_TTL получает
+    этот ответ без повторного создания заказа (см. orders.idempotency).
+    Устаревшие и лишние (сверх ORDERS_IDEMPOTENCY_MAX_KEYS) ключи удаляются
+    по мере записи новых.
+    """
+    key = models.CharField(max_length=255, unique=True)
+    # sha256 метода, пути и тела запроса: ключ нельзя переиспользовать для другого запроса
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField()
+    content_type = models.CharField(max_length=100)
+    body = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    def __str__(self):
+        return f"{self.key} -> {self.status_code}"
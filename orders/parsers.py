@@ -0,0 +1,170 @@
+"""Разбор состава заказа из текста и JSON.
+
+Общий для формы заказа, JSON API и массового создания заказов. Цены
+разбираются в Decimal (не более двух знаков после запятой, как у
+Order.total_price), ошибки всех строк собираются за один проход.
+
+Блюдо - кортеж (название, цена в Decimal, количество): без именованных
+кортежей, их создание заметно на заказах из тысяч строк.
+
+Текстовый формат - по блюду на строку: "название - цена" или с количеством
+"название x3 - цена" (допускаются x, х, × и *; десятичный разделитель - точка
+или запятая). В JSON блюдо меню можно указать по menu_item_id и без цены:
+вместо названия в кортеже тогда id, вместо цены - None, а цену проставляет
+orders.pricing.
+"""
+import math
+import re
+from decimal import Decimal
+from functools import lru_cache
+
+QUANTITY_MAX = 1000
+PRICE_MAX = Decimal('999999.99')
+
+# Название берется жадно до последнего "- цена": дефисы в названии не мешают
+LINE_RE = re.compile(r'(?P<name>.*\S)\s*-\s*(?P<units>\d+)(?:[.,](?P<cents>\d+))?')
+# Количество в конце названия: "Суп x3"; проверяется, только если название кончается цифрой
+QUANTITY_RE = re.compile(r'(?P<name>.*?\S)\s+[xXхХ×*]\s*(?P<quantity>\d+)')
+# Цена без знака; длины частей (до шести цифр и до двух после запятой) проверяет _price
+PRICE_RE = re.compile(r'(?P<units>\d+)(?:[.,](?P<cents>\d+))?')
+CENTS = Decimal('0.01')
+
+FORMAT_ERROR = 'Некорректный формат в строке: "{line}". Используйте формат "название - цена"'
+PRICE_ERROR = 'Некорректная цена в строке: "{line}"'
+QUANTITY_ERROR = 'Некорректное количество в строке: "{line}"'
+JSON_PRICE_ERROR = 'Некорректная цена для блюда "{name}"'
+JSON_QUANTITY_ERROR = 'Некорректное количество для блюда "{name}"'
+JSON_ITEM_ERROR = 'Каждый элемент должен содержать поле "name" или "menu_item_id"'
+JSON_LIST_ERROR = 'JSON должен быть списком объектов'
+
+
+@lru_cache(maxsize=4096)
+def _price(units, cents):
+    """Decimal по целой и дробной части; цены в заказах повторяются, поэтому результат кешируется"""
+    if len(units) > 6 or (cents is not None and len(cents) > 2):
+        return None
+    return Decimal(f'{units}.{cents}' if cents else units)
+
+
+def _parse_price_text(text):
+    match = PRICE_RE.fullmatch(text)
+    if match is None:
+        return None
+    return _price(*match.group('units', 'cents'))
+
+
+@lru_cache(maxsize=4096)
+def _float_price(value):
+    # float приводится через repr: 12.3 -> Decimal('12.3'), а не двоичная дробь
+    return _parse_price_text(repr(value)) if math.isfinite(value) else None
+
+
+def parse_price(value):
+    """Цена в Decimal (не более двух знаков после запятой) или None, если цена некорректна"""
+    value_type = type(value)
+    if value_type is int:
+        return Decimal(value) if 0 <= value <= PRICE_MAX else None
+    if value_type is float:
+        return _float_price(value)
+    if value_type is str:
+        return _parse_price_text(value.strip())
+    if value_type is Decimal:
+        if not value.is_finite() or value < 0 or value > PRICE_MAX or value != value.quantize(CENTS):
+            return None
+        return value
+    return None
+
+
+def parse_text(text):
+    """Разбирает текстовый ввод; возвращает (список блюд, список ошибок)"""
+    items = []
+    errors = []
+    match_line = LINE_RE.match
+    for line in text.splitlines():
+        match = match_line(line)
+        if match is None:
+            if line.strip():
+                errors.append(FORMAT_ERROR.format(line=line))
+            continue
+        name, units, cents = match.groups()
+        price = _price(units, cents)
+        if price is None:
+            errors.append(PRICE_ERROR.format(line=line))
+            continue
+        quantity = 1
+        if name[-1].isdigit():
+            quantity_match = QUANTITY_RE.fullmatch(name)
+            if quantity_match is not None:
+                name = quantity_match['name']
+                quantity = int(quantity_match['quantity'])
+                if not 1 <= quantity <= QUANTITY_MAX:
+                    errors.append(QUANTITY_ERROR.format(line=line))
+                    continue
+        items.append((name.strip(), price, quantity))
+    return items, errors
+
+
+def parse_json_items(json_items):
+    """Разбирает список блюд из JSON: [{"name" или "menu_item_id", "price"?, "quantity"?}, ...].
+    
+    Возвращает (список блюд, список ошибок). Цена без menu_item_id необязательна
+    для блюд меню, ее наличие проверяет orders.pricing.resolve_items.
+    """
+    if not isinstance(json_items, list):
+        return [], [JSON_LIST_ERROR]
+    items = []
+    errors = []
+    for item in json_items:
+        if type(item) is not dict:
+            errors.append(JSON_ITEM_ERROR)
+            continue
+        name = item.get('menu_item_id')
+        if name is None:
+            name = item.get('name')
+            if type(name) is not str:
+                errors.append(JSON_ITEM_ERROR)
+                continue
+        elif type(name) is not int:
+            errors.append(JSON_ITEM_ERROR)
+            continue
+        value = item.get('price')
+        if value is None:
+            price = None
+        else:
+            price = _float_price(value) if type(value) is float else parse_price(value)
+            if price is None:
+                errors.append(JSON_PRICE_ERROR.format(name=name))
+                continue
+        quantity = item.get('quantity', 1)
+        # type() вместо isinstance: True не должно считаться количеством
+        if type(quantity) is not int or not 1 <= quantity <= QUANTITY_MAX:
+            errors.append(JSON_QUANTITY_ERROR.format(name=name))
+            continue
+        items.append((name, price, quantity))
+    return items, errors
+
+
+def merge_items(*groups):
+    """Объединяет блюда из нескольких источников в формат Order.items.
+    
+    Одинаковые блюда (название и цена) учитываются один раз - по первому
+    вхождению, количество разворачивается в повторяющиеся элементы списка.
+    Возвращает (items, итог в Decimal). Цена в JSON хранится числом: для двух
+    знаков после запятой str(float) совпадает с Decimal, поэтому итог по items
+    равен итогу по исходным ценам.
+    """
+    unique = {}
+    for group in groups:
+        for item in group:
+            unique.setdefault(item[:2], item)
+    items = []
+    total = Decimal('0')
+    for name, price, quantity in unique.values():
+        entry = {'name': name, 'price': float(price)}
+        if quantity == 1:
+            items.append(entry)
+            total += price
+        else:
+            items.extend([entry] * quantity)
+            total += price * quantity
+    return items, total
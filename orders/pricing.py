@@ -0,0 +1,98 @@
+"""Цены позиций заказа по меню и итоговая сумма заказа.
+
+Блюдо ищется в таблице цен по id (menu_item_id) или по названию. Таблица
+строится из снимка меню (orders.menu) один раз на его версию: цена блюда
+меню берется из нее с модификатором категории
+(settings.ORDERS_CATEGORY_PRICE_MODIFIERS), цена клиента для такого блюда
+не учитывается. Блюда не из меню (свободный ввод) сохраняют указанную цену.
+
+Итог заказа считается в Decimal один раз при приеме заказа; Order.save()
+пересчитывает его, только если состав заказа изменился (см. items_key).
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+
+from . import menu
+
+CENTS = Decimal('0.01')
+
+MENU_ITEM_ERROR = 'Блюдо с id {item_id} отсутствует в меню'
+PRICE_REQUIRED_ERROR = 'Блюдо "{name}" отсутствует в меню, укажите цену'
+
+
+def category_modifiers():
+    """Множители цен по категориям меню из настроек, например {'drink': Decimal('0.9')}"""
+    modifiers = getattr(settings, 'ORDERS_CATEGORY_PRICE_MODIFIERS', None) or {}
+    return {category: Decimal(str(modifier)) for category, modifier in modifiers.items()}
+
+
+def apply_modifier(price, modifier):
+    if modifier is None:
+        return price
+    return (price * modifier).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+class PriceTable:
+    """Цены доступных блюд одной версии меню: {id или название: (название, цена)}"""
+    
+    def __init__(self, snapshot, modifiers):
+        self.version = snapshot.version
+        self.modifiers = modifiers
+        self.by_id = {}
+        self.by_name = {}
+        for entry in snapshot.available:
+            priced = (entry.name, apply_modifier(entry.price, modifiers.get(entry.category)))
+            self.by_id[entry.id] = priced
+            self.by_name[entry.name] = priced
+
+
+_table = None
+
+
+def get_price_table():
+    """Таблица цен для текущей версии меню и текущих модификаторов"""
+    global _table
+    snapshot = menu.get_snapshot()
+    modifiers = category_modifiers()
+    table = _table
+    if table is None or table.version != snapshot.version or table.modifiers != modifiers:
+        table = _table = PriceTable(snapshot, modifiers)
+    return table
+
+
+def resolve_items(items, table=None):
+    """Проставляет цены меню блюдам из orders.parsers.
+    
+    items - кортежи (название или id блюда меню, цена или None, количество).
+    Возвращает (кортежи (название, цена, количество), список ошибок).
+    """
+    table = table or get_price_table()
+    by_id, by_name = table.by_id, table.by_name
+    resolved = []
+    errors = []
+    for key, price, quantity in items:
+        if type(key) is int:
+            priced = by_id.get(key)
+            if priced is None:
+                errors.append(MENU_ITEM_ERROR.format(item_id=key))
+                continue
+        else:
+            priced = by_name.get(key)
+            if priced is None:
+                if price is None:
+                    errors.append(PRICE_REQUIRED_ERROR.format(name=key))
+                    continue
+                priced = (key, price)
+        resolved.append((*priced, quantity))
+    return resolved, errors
+
+
+def items_key(items):
+    """Значение для сравнения составов заказа (поле Order.items)"""
+    return tuple(tuple(item.items()) for item in items or ())
+
+
+def items_total(items):
+    """Итог по полю Order.items, если состав пришел не через resolve_items"""
+    return sum((Decimal(str(item.get('price', 0))) for item in items), Decimal('0'))
@@ -0,0 +1,258 @@
+"""Отчеты за период по заказам рабочей таблицы и архива (например, за месяц).
+
+Столбцы заказов (день, стол, статус, сумма в копейках) и позиций оплаченных
+заказов читаются порциями по ключу в массивы NumPy, а группировки,
+перцентили чека, топ блюд и оборачиваемость столов считаются векторно.
+NumPy - необязательная зависимость: без него (или с engine='python')
+тот же отчет строится обычным проходом по заказам и их полю items.
+"""
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import F, IntegerField
+from django.db.models.functions import Cast, Round
+from django.utils import timezone
+
+from .models import ArchivedOrder, ArchivedOrderLine, Order, OrderLine
+
+try:
+    import numpy as np
+except ImportError:  # numpy - необязательная зависимость
+    np = None
+
+ENGINES = ('numpy', 'python')
+REPORT_CHUNK_SIZE = 20000
+PERCENTILES = (50, 90, 95, 99)
+TOP_DISHES = 10
+
+PAID = 'paid'
+STATUSES = [status for status, _ in Order.STATUS_CHOICES]
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+
+def default_engine():
+    return 'numpy' if np is not None else 'python'
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _bounds(day_from, day_to):
+    return _day_start(day_from), _day_start(day_to + timedelta(days=1))
+
+
+def _cents(field):
+    # Суммы переводятся в целые копейки на стороне БД: без Decimal и float на каждую строку
+    return Cast(Round(F(field) * 100), output_field=IntegerField())
+
+
+def _keyset_chunks(query, chunk_size, key='id'):
+    """Порции строк values_list, где первый столбец - ключ key"""
+    last = None
+    while True:
+        chunk_query = query if last is None else query.filter(**{f'{key}__gt': last})
+        chunk = list(chunk_query.order_by(key)[:chunk_size])
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last = chunk[-1][0]
+
+
+def _order_chunks(start, end, chunk_size):
+    for model in (Order, ArchivedOrder):
+        rows = (
+            model.objects.filter(created_at__gte=start, created_at__lt=end)
+            .annotate(cents=_cents('total_price'))
+            .values_list('id', 'created_at', 'table_number', 'status', 'cents')
+        )
+        yield from _keyset_chunks(rows, chunk_size)
+
+
+def _line_chunks(start, end, chunk_size):
+    for line_model in (OrderLine, ArchivedOrderLine):
+        rows = (
+            line_model.objects.filter(
+                order__status=PAID, order__created_at__gte=start, order__created_at__lt=end
+            )
+            .annotate(unit_cents=_cents('unit_price'))
+            .values_list('id', 'name', 'quantity', 'unit_cents')
+        )
+        yield from _keyset_chunks(rows, chunk_size)
+
+
+def load_columns(day_from, day_to, chunk_size=None):
+    """Столбцы заказов и позиций оплаченных заказов за дни [day_from, day_to] в массивах NumPy"""
+    chunk_size = chunk_size or REPORT_CHUNK_SIZE
+    start, end = _bounds(day_from, day_to)
+    # Начала местных суток периода: день заказа находится бинарным поиском по моменту создания
+    midnights = np.array([
+        _day_start(day_from + timedelta(days=offset)).timestamp()
+        for offset in range((day_to - day_from).days + 1)
+    ])
+    
+    parts = defaultdict(list)
+    for chunk in _order_chunks(start, end, chunk_size):
+        count = len(chunk)
+        timestamps = np.fromiter((row[1].timestamp() for row in chunk), np.float64, count)
+        days = np.searchsorted(midnights, timestamps, side='right') - 1 + day_from.toordinal()
+        parts['day'].append(days.astype(np.int32))
+        parts['table'].append(np.fromiter((row[2] for row in chunk), np.int32, count))
+        parts['status'].append(np.fromiter((STATUS_CODES[row[3]] for row in chunk), np.int8, count))
+        parts['cents'].append(np.fromiter((row[4] for row in chunk), np.int64, count))
+    
+    # Названия блюд кодируются номерами в порядке первого появления
+    dish_codes = {}
+    for chunk in _line_chunks(start, end, chunk_size):
+        count = len(chunk)
+        parts['dish'].append(np.fromiter(
+            (dish_codes.setdefault(row[1], len(dish_codes)) for row in chunk), np.int32, count
+        ))
+        parts['quantity'].append(np.fromiter((row[2] for row in chunk), np.int64, count))
+        parts['unit_cents'].append(np.fromiter((row[3] for row in chunk), np.int64, count))
+    
+    dtypes = {'day': np.int32, 'table': np.int32, 'status': np.int8, 'cents': np.int64,
+              'dish': np.int32, 'quantity': np.int64, 'unit_cents': np.int64}
+    columns = {
+        name: np.concatenate(parts[name]) if parts[name] else np.empty(0, dtype)
+        for name, dtype in dtypes.items()
+    }
+    columns['dish_names'] = list(dish_codes)
+    return columns
+
+
+def _money(cents):
+    return round(float(cents) / 100, 2)
+
+
+def _percentile(sorted_values, q):
+    """Перцентиль с линейной интерполяцией (как numpy.percentile по умолчанию)"""
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _top(dishes, top):
+    """dishes - {название: (количество, копейки)}; сортировка по выручке, затем по названию"""
+    ranked = sorted(dishes.items(), key=lambda item: (-item[1][1], item[0]))[:top]
+    return [
+        {'dish': name, 'quantity': int(quantity), 'revenue': _money(cents)}
+        for name, (quantity, cents) in ranked
+    ]
+
+
+def _assemble(by_status, tables, days, percentiles, dishes, period_days, top):
+    return {
+        'orders': int(sum(count for count, _ in by_status.values())),
+        'revenue': _money(by_status[PAID][1]),
+        'by_status': {
+            status: {'orders': int(count), 'revenue': _money(cents)}
+            for status, (count, cents) in by_status.items()
+        },
+        'by_table': [
+            {
+                'table_number': int(table_number),
+                'orders': int(count),
+                'revenue': _money(cents),
+                # Оборачиваемость: оплаченные заказы стола в среднем за день периода
+                'turnover': round(int(count) / period_days, 2),
+            }
+            for table_number, (count, cents) in sorted(tables.items())
+        ],
+        'by_day': [
+            {'day': date.fromordinal(int(ordinal)), 'orders': int(count), 'revenue': _money(cents)}
+            for ordinal, (count, cents) in sorted(days.items())
+        ],
+        'order_value_percentiles': {
+            f'p{q}': _money(value) for q, value in zip(PERCENTILES, percentiles)
+        } if percentiles else {},
+        'top_dishes': _top(dishes, top),
+    }
+
+
+def _grouped(keys, weights):
+    """{ключ: (число строк, сумма weights)} для массива keys"""
+    values, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(values))
+    sums = np.bincount(inverse, weights=weights, minlength=len(values))
+    return {value: (count, total) for value, count, total in zip(values.tolist(), counts.tolist(), sums.tolist())}
+
+
+def _numpy_report(columns, period_days, top):
+    status, cents = columns['status'], columns['cents']
+    status_counts = np.bincount(status, minlength=len(STATUSES))
+    status_cents = np.bincount(status, weights=cents, minlength=len(STATUSES))
+    by_status = {
+        status_name: (status_counts[code], status_cents[code])
+        for status_name, code in STATUS_CODES.items()
+    }
+    
+    paid = status == STATUS_CODES[PAID]
+    paid_cents = cents[paid]
+    percentiles = np.percentile(paid_cents, PERCENTILES).tolist() if len(paid_cents) else []
+    
+    line_cents = columns['unit_cents'] * columns['quantity']
+    dish_quantity = np.bincount(columns['dish'], weights=columns['quantity'], minlength=len(columns['dish_names']))
+    dish_cents = np.bincount(columns['dish'], weights=line_cents, minlength=len(columns['dish_names']))
+    dishes = {
+        name: (quantity, total)
+        for name, quantity, total in zip(columns['dish_names'], dish_quantity.tolist(), dish_cents.tolist())
+    }
+    return _assemble(
+        by_status,
+        _grouped(columns['table'][paid], paid_cents),
+        _grouped(columns['day'][paid], paid_cents),
+        percentiles,
+        dishes,
+        period_days,
+        top,
+    )
+
+
+def _python_report(day_from, day_to, period_days, top):
+    """Тот же отчет проходом по заказам: Decimal и поле items на каждую строку"""
+    start, end = _bounds(day_from, day_to)
+    by_status = {status: [0, Decimal('0')] for status in STATUSES}
+    tables = defaultdict(lambda: [0, Decimal('0')])
+    days = defaultdict(lambda: [0, Decimal('0')])
+    dishes = defaultdict(lambda: [0, Decimal('0')])
+    paid_values = []
+    for model in (Order, ArchivedOrder):
+        rows = (
+            model.objects.filter(created_at__gte=start, created_at__lt=end)
+            .values_list('created_at', 'table_number', 'status', 'total_price', 'items')
+            .iterator(chunk_size=REPORT_CHUNK_SIZE)
+        )
+        for created_at, table_number, status, total_price, items in rows:
+            cents = total_price * 100
+            by_status[status][0] += 1
+            by_status[status][1] += cents
+            if status != PAID:
+                continue
+            paid_values.append(float(cents))
+            for group in (tables[table_number], days[timezone.localdate(created_at).toordinal()]):
+                group[0] += 1
+                group[1] += cents
+            for item in items:
+                dish = dishes[item.get('name')]
+                dish[0] += 1
+                dish[1] += Decimal(str(item.get('price', 0))) * 100
+    paid_values.sort()
+    percentiles = [_percentile(paid_values, q) for q in PERCENTILES] if paid_values else []
+    return _assemble(by_status, tables, days, percentiles, dishes, period_days, top)
+
+
+def build_report(day_from, day_to, top=TOP_DISHES, engine=None):
+    """Отчет за дни [day_from, day_to] включительно"""
+    engine = engine or default_engine()
+    if engine == 'numpy' and np is None:
+        raise ValueError('NumPy is not installed')
+    period_days = (day_to - day_from).days + 1
+    if engine == 'numpy':
+        report = _numpy_report(load_columns(day_from, day_to), period_days, top)
+    else:
+        report = _python_report(day_from, day_to, period_days, top)
+    return {'date_from': day_from, 'date_to': day_to, 'engine': engine, **report}
@@ -0,0 +1,113 @@
+"""Инкрементально поддерживаемые агрегаты заказов по дням и статусам"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+
+from .models import ArchivedOrder, DailyStatusRollup, Order
+
+
+def apply_order_changes(changes):
+    """Сворачивает изменения заказов в дельты и применяет их одним UPDATE на (день, статус)"""
+    deltas = defaultdict(lambda: [0, Decimal('0')])
+    for old, new in changes:
+        if old is not None:
+            delta = deltas[(old.day, old.status)]
+            delta[0] -= 1
+            delta[1] -= old.total_price
+        if new is not None:
+            delta = deltas[(new.day, new.status)]
+            delta[0] += 1
+            delta[1] += new.total_price
+    
+    for (day, status), (count, revenue) in deltas.items():
+        if count == 0 and revenue == 0:
+            continue
+        _apply_delta(day, status, count, revenue)
+
+
+def _apply_delta(day, status, count, revenue):
+    rows = DailyStatusRollup.objects.filter(day=day, status=status)
+    if rows.update(order_count=F('order_count') + count, revenue=F('revenue') + revenue):
+        return
+    try:
+        # Точка сохранения: при гонке с параллельной вставкой откатываем только ее
+        with transaction.atomic():
+            DailyStatusRollup.objects.create(day=day, status=status, order_count=count, revenue=revenue)
+    except IntegrityError:
+        rows.update(order_count=F('order_count') + count, revenue=F('revenue') + revenue)
+
+
+def rebuild():
+    """Полностью пересчитывает агрегаты по заказам и архиву, возвращает число строк"""
+    totals = defaultdict(lambda: [0, Decimal('0')])
+    for model in (Order, ArchivedOrder):
+        rows = (
+            model.objects
+            .annotate(day=TruncDate('created_at'))
+            .values('day', 'status')
+            .annotate(order_count=Count('id'), revenue=Sum('total_price'))
+            .order_by()
+        )
+        for row in rows:
+            total = totals[(row['day'], row['status'])]
+            total[0] += row['order_count']
+            total[1] += row['revenue'] or 0
+    rollups = [
+        DailyStatusRollup(day=day, status=status, order_count=order_count, revenue=revenue)
+        for (day, status), (order_count, revenue) in totals.items()
+    ]
+    with transaction.atomic():
+        DailyStatusRollup.objects.all().delete()
+        DailyStatusRollup.objects.bulk_create(rollups)
+    return len(rollups)
+
+
+def revenue(date_from=None, date_to=None):
+    """Выручка по оплаченным заказам за дни [date_from, date_to] включительно"""
+    rows = DailyStatusRollup.objects.filter(status='paid')
+    if date_from:
+        rows = rows.filter(day__gte=date_from)
+    if date_to:
+        rows = rows.filter(day__lte=date_to)
+    return rows.aggregate(total=Sum('revenue'))['total'] or Decimal('0')
+
+
+async def arevenue(date_from=None, date_to=None):
+    """Асинхронный вариант revenue"""
+    rows = DailyStatusRollup.objects.filter(status='paid')
+    if date_from:
+        rows = rows.filter(day__gte=date_from)
+    if date_to:
+        rows = rows.filter(day__lte=date_to)
+    return (await rows.aaggregate(total=Sum('revenue')))['total'] or Decimal('0')
+
+
+def status_totals():
+    """Количество заказов и выручка по каждому статусу за все время"""
+    totals = {status: (0, Decimal('0')) for status, _ in Order.STATUS_CHOICES}
+    rows = (
+        DailyStatusRollup.objects
+        .values('status')
+        .annotate(order_count=Sum('order_count'), revenue=Sum('revenue'))
+        .order_by()
+    )
+    for row in rows:
+        totals[row['status']] = (row['order_count'] or 0, row['revenue'] or Decimal('0'))
+    return totals
+
+
+async def astatus_totals():
+    """Асинхронный вариант status_totals"""
+    totals = {status: (0, Decimal('0')) for status, _ in Order.STATUS_CHOICES}
+    rows = (
+        DailyStatusRollup.objects
+        .values('status')
+        .annotate(order_count=Sum('order_count'), revenue=Sum('revenue'))
+        .order_by()
+    )
+    async for row in rows:
+        totals[row['status']] = (row['order_count'] or 0, row['revenue'] or Decimal('0'))
+    return totals
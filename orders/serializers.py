@@ -0,0 +1,137 @@
+"""Быстрая сериализация заказов и меню для JSON API.
+
+Строки читаются через values_list, без создания экземпляров моделей,
+названия категорий берутся из заранее построенного словаря, а ответ
+кодируется сразу в байты: через orjson, если он установлен, иначе
+стандартным модулем json.
+"""
+import json
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from .models import ArchivedOrder, ArchivedOrderLine, MenuItem, OrderLine
+
+try:
+    import orjson
+except ImportError:  # orjson - необязательная зависимость
+    orjson = None
+
+ORDER_FIELDS = ('id', 'table_number', 'items', 'status', 'total_price', 'created_at', 'version')
+MENU_ITEM_FIELDS = ('id', 'name', 'price', 'category', 'description')
+
+CATEGORY_DISPLAY = dict(MenuItem.CATEGORY_CHOICES)
+
+_json_encoder = json.JSONEncoder(separators=(',', ':'), default=lambda value: value.isoformat())
+
+
+def dumps(data):
+    """Кодирует данные в JSON и возвращает байты"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return _json_encoder.encode(data).encode('utf-8')
+
+
+def backend_name():
+    """Название используемой JSON-библиотеки (для бенчмарков)"""
+    return 'orjson' if orjson is not None else 'json'
+
+
+class JSONBytesResponse(HttpResponse):
+    """Ответ с телом, закодированным dumps() без повторного прохода через DjangoJSONEncoder"""
+    
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data), **kwargs)
+
+
+def items_from_lines():
+    """Читать ли состав заказа из OrderLine вместо JSON-поля items"""
+    return getattr(settings, 'ORDERS_ITEMS_SOURCE', 'json') == 'lines'
+
+
+def order_rows(orders_query):
+    """Выборка заказов в виде кортежей ORDER_FIELDS"""
+    return orders_query.values_list(*ORDER_FIELDS)
+
+
+def _lines_query(order_ids, line_model=OrderLine):
+    return line_model.objects.filter(order_id__in=order_ids).order_by('order_id', 'position').values_list(
+        'order_id', 'name', 'unit_price', 'quantity'
+    )
+
+
+def _group_lines(line_rows):
+    """Раскладывает позиции по заказам в формате поля items"""
+    items = defaultdict(list)
+    for order_id, name, unit_price, quantity in line_rows:
+        item = {'name': name, 'price': float(unit_price)}
+        items[order_id].extend([item] * quantity)
+    return items
+
+
+def _row_to_dict(row, items):
+    order_id, table_number, json_items, status, total_price, created_at, version = row
+    return {
+        "id": order_id,
+        "table_number": table_number,
+        "items": json_items if items is None else items.get(order_id, []),
+        "status": status,
+        "total_price": float(total_price),
+        "created_at": created_at,
+        "version": version,
+    }
+
+
+def line_model_for(orders_query):
+    """Модель позиций для выборки заказов (рабочих или архивных)"""
+    return ArchivedOrderLine if orders_query.model is ArchivedOrder else OrderLine
+
+
+def rows_to_dicts(rows, line_model=OrderLine):
+    """Преобразует кортежи order_rows() в словари ответа API"""
+    items = None
+    if items_from_lines() and rows:
+        items = _group_lines(_lines_query([row[0] for row in rows], line_model))
+    return [_row_to_dict(row, items) for row in rows]
+
+
+async def arows_to_dicts(rows, line_model=OrderLine):
+    """Асинхронная версия rows_to_dicts()"""
+    items = None
+    if items_from_lines() and rows:
+        items = _group_lines([line async for line in _lines_query([row[0] for row in rows], line_model)])
+    return [_row_to_dict(row, items) for row in rows]
+
+
+def serialize_orders(orders_query):
+    """Список словарей заказов для выборки orders_query (Order или ArchivedOrder)"""
+    return rows_to_dicts(list(order_rows(orders_query)), line_model_for(orders_query))
+
+
+def iter_order_chunks(orders_query, chunk_size):
+    """Генератор порций словарей заказов: строки читаются с сервера по chunk_size"""
+    rows = order_rows(orders_query).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield rows_to_dicts(chunk, line_model_for(orders_query))
+
+
+def menu_item_row_to_dict(row):
+    item_id, name, price, category, description = row
+    return {
+        "id": item_id,
+        "name": name,
+        "price": float(price),
+        "category": CATEGORY_DISPLAY.get(category, category),
+        "description": description,
+    }
+
+
+def serialize_menu(menu_query):
+    """Список словарей блюд для выборки menu_query"""
+    return [menu_item_row_to_dict(row) for row in menu_query.values_list(*MENU_ITEM_FIELDS)]
@@ -0,0 +1,41 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import cache
+from .models import MenuItem, Order
+from .tracking import OrderState, track_order_changes
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_state(sender, instance, raw=False, **kwargs):
+    # Заказ создан не через ORM-чтение (или с отложенными полями) - берем состояние из БД
+    if raw or instance._state.adding or getattr(instance, '_tracked_state', None) is not None:
+        return
+    row = (
+        Order.objects.filter(pk=instance.pk)
+        .values_list('table_number', 'status', 'total_price', 'created_at')
+        .first()
+    )
+    instance._tracked_state = OrderState(instance.pk, *row) if row else None
+
+
+@receiver(post_save, sender=Order)
+def track_order_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else getattr(instance, '_tracked_state', None)
+    new = OrderState.of(instance)
+    track_order_changes([(old, new)])
+    instance._tracked_state = new
+
+
+@receiver(post_delete, sender=Order)
+def track_order_deleted(sender, instance, **kwargs):
+    old = getattr(instance, '_tracked_state', None) or OrderState.of(instance)
+    track_order_changes([(old, None)])
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+def invalidate_menu(sender, **kwargs):
+    cache.bump(cache.MENU)
@@ -0,0 +1,108 @@
+"""Состояние столов: неоплаченные заказы, сумма к оплате, самый старый ожидающий заказ.
+
+Обновляется вместе с заказами через orders.tracking, поэтому /api/tables/ читает
+по одной строке на стол с открытыми заказами и не обращается к таблице заказов.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.utils.dateparse import parse_datetime
+
+from .models import Order, TableState
+from .tracking import OrderState
+
+PAID = 'paid'
+
+
+def _entry(state):
+    return {
+        'status': state.status,
+        'total_price': str(state.total_price),
+        'created_at': state.created_at.isoformat() if state.created_at else None,
+    }
+
+
+def refresh_totals(table_state):
+    """Пересчитывает сумму к оплате и время самого старого ожидающего заказа"""
+    entries = table_state.open_orders.values()
+    table_state.unpaid_total = sum((Decimal(entry['total_price']) for entry in entries), Decimal('0'))
+    waiting = [entry['created_at'] for entry in entries if entry['status'] == 'waiting' and entry['created_at']]
+    table_state.oldest_waiting_at = parse_datetime(min(waiting)) if waiting else None
+
+
+def _apply(table_state, table_changes):
+    for old, new in table_changes:
+        if old is not None and old.table_number == table_state.table_number:
+            table_state.open_orders.pop(str(old.id), None)
+        if new is not None and new.table_number == table_state.table_number and new.status != PAID:
+            table_state.open_orders[str(new.id)] = _entry(new)
+    refresh_totals(table_state)
+
+
+def apply_order_changes(changes):
+    """Применяет изменения заказов (пары OrderState) к состоянию затронутых столов"""
+    by_table = defaultdict(list)
+    for old, new in changes:
+        for state in (old, new):
+            if state is not None:
+                by_table[state.table_number].append((old, new))
+    if not by_table:
+        return
+
+    # Строки столов блокируются до конца транзакции заказа
+    existing = TableState.objects.select_for_update().in_bulk(list(by_table))
+    for table_number, table_changes in by_table.items():
+        # Заказ, перешедший к другому столу, попадает в оба списка - дубли не мешают
+        table_state = existing.get(table_number) or TableState(table_number=table_number)
+        _apply(table_state, table_changes)
+        _save(table_state, table_number in existing, table_changes)
+
+
+def _save(table_state, exists, table_changes):
+    if not table_state.open_orders:
+        if exists:
+            table_state.delete()
+        return
+    if exists:
+        table_state.save()
+        return
+    try:
+        # Точка сохранения: при гонке с параллельной вставкой откатываем только ее
+        with transaction.atomic():
+            table_state.save(force_insert=True)
+    except IntegrityError:
+        table_state = TableState.objects.select_for_update().get(table_number=table_state.table_number)
+        _apply(table_state, table_changes)
+        _save(table_state, True, table_changes)
+
+
+def rebuild():
+    """Полностью пересчитывает состояние столов по неоплаченным заказам, возвращает число столов"""
+    states = {}
+    rows = (
+        Order.objects.exclude(status=PAID)
+        .order_by()
+        .values_list('id', 'table_number', 'status', 'total_price', 'created_at')
+    )
+    for row in rows:
+        state = OrderState(*row)
+        table_state = states.setdefault(state.table_number, TableState(table_number=state.table_number, open_orders={}))
+        table_state.open_orders[str(state.id)] = _entry(state)
+    for table_state in states.values():
+        refresh_totals(table_state)
+
+    with transaction.atomic():
+        TableState.objects.all().delete()
+        TableState.objects.bulk_create(states.values())
+    return len(states)
+
+
+def table_to_dict(table_state):
+    """Состояние стола для ответа API"""
+    return {
+        'table_number': table_state.table_number,
+        'open_orders': sorted(int(order_id) for order_id in table_state.open_orders),
+        'unpaid_total': float(table_state.unpaid_total),
+        'oldest_waiting_at': table_state.oldest_waiting_at,
+    }
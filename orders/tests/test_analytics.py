@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+from django.core.cache import cache as django_cache
+from django.test import TestCase
+from django.utils import timezone
+
+from orders import archive
+from orders.models import Order
+
+
+class AnalyticsApiTest(TestCase):
+    """Тесты рядов выручки по часам, дням и неделям"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        django_cache.clear()
+        self.today = timezone.localdate()
+        self.day = self.today - timedelta(days=10)
+        self.morning = timezone.make_aware(datetime.combine(self.day, datetime.min.time()).replace(hour=9))
+        self.orders = [
+            Order.objects.create(table_number=1, items=[{'name': 'Суп', 'price': 5}] * 2, status='paid'),
+            Order.objects.create(table_number=2, items=[{'name': 'Чай', 'price': 2}], status='paid'),
+            Order.objects.create(table_number=1, items=[{'name': 'Суп', 'price': 5}], status='waiting'),
+        ]
+        Order.objects.filter(id=self.orders[0].id).update(created_at=self.morning)
+        Order.objects.filter(id=self.orders[1].id).update(created_at=self.morning + timedelta(hours=2))
+        # Первый заказ уходит в архив: ряды учитывают обе таблицы
+        archive.archive_orders(self.morning + timedelta(hours=1))
+        self.params = {'date_from': self.day.isoformat(), 'date_to': self.today.isoformat()}
+    
+    def get(self, **params):
+        response = self.client.get('/api/analytics/', {**self.params, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['series']
+    
+    def test_buckets(self):
+        """Тест корзин по часам и дням"""
+        series = self.get(bucket='hour')
+        self.assertEqual([(point['orders'], point['revenue']) for point in series], [(1, 10.0), (1, 2.0)])
+        self.assertEqual(series[0]['bucket'], self.morning.isoformat())
+        
+        self.assertEqual(self.get(bucket='day'), [
+            {'bucket': series[0]['bucket'].replace('T09', 'T00'), 'orders': 2, 'revenue': 12.0},
+        ])
+        self.assertEqual(sum(point['orders'] for point in self.get(bucket='week', status='all')), 3)
+    
+    def test_groups(self):
+        """Тест разбивки по столам и блюдам"""
+        by_table = self.get(group='table')
+        self.assertEqual([(point['table_number'], point['revenue']) for point in by_table], [(1, 10.0), (2, 2.0)])
+        
+        by_dish = self.get(group='dish', status='all')
+        totals = {}
+        for point in by_dish:
+            totals[point['dish']] = totals.get(point['dish'], 0) + point['quantity']
+        self.assertEqual(totals, {'Суп': 3, 'Чай': 1})
+    
+    def test_closed_days_cached(self):
+        """Тест кеша закрытых дней: повторный запрос считает только текущий день"""
+        self.get()
+        with self.assertNumQueries(1):
+            self.get()
+        
+        # Изменение заказа закрытого дня инвалидирует только этот день
+        order = Order.objects.get(id=self.orders[1].id)
+        order.status = 'ready'
+        order.save(update_fields=['status'])
+        self.assertEqual(self.get(), [{'bucket': self.get(bucket='day')[0]['bucket'], 'orders': 1, 'revenue': 10.0}])
+    
+    def test_invalid_params(self):
+        """Тест ошибок в параметрах"""
+        for params in (
+            {'bucket': 'month'}, {'group': 'waiter'}, {'status': 'lost'},
+            {'date_from': 'вчера'}, {'date_from': '2024-02-30'}, {'date_to': '2024-13-01'},
+            {'date_from': self.today.isoformat(), 'date_to': self.day.isoformat()},
+            {'date_from': (self.today - timedelta(days=400)).isoformat()},
+        ):
+            self.assertEqual(self.client.get('/api/analytics/', {**self.params, **params}).status_code, 400)
@@ -1,4 +1,4 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from rest_framework.test import APIClient
 from orders.models import Order, MenuItem
@@ -142,6 +142,16 @@ class APITestCase(TestCase):
         self.assertIn('revenue', data)
         self.assertEqual(data['revenue'], 23.0)  # 15.00 + 8.00 = 23.00
     
+    def test_revenue_invalid_date(self):
+        """Тест ответа 400 для границы, которая не дата и не момент времени"""
+        for value in ('abc', '2024-02-30', '2024-01-01T25:00'):
+            response = self.client.get(self.revenue_api_url, {'date_from': value})
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()['error'], 'Invalid date')
+        # Момент времени считается точно по таблице заказов
+        response = self.client.get(self.revenue_api_url, {'date_from': '2000-01-01T00:00:00'})
+        self.assertEqual(response.json()['revenue'], 23.0)
+    
     def test_get_statistics(self):
         """Тест получения статистики через API"""
         response = self.client.get(self.statistics_api_url)
@@ -155,3 +165,100 @@ class APITestCase(TestCase):
         self.assertEqual(data['total_orders'], 2)
         self.assertEqual(data['status_counts']['waiting'], 1)
         self.assertEqual(data['status_counts']['paid'], 1)
+    
+    def test_get_orders_keyset_pagination(self):
+        """Тест курсорной пагинации списка заказов"""
+        order3 = Order.objects.create(table_number=3, items=[], status='waiting')
+        
+        response = self.client.get(f"{self.orders_api_url}?limit=2")
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertEqual([o['id'] for o in data['results']], [self.order1.id, self.order2.id])
+        self.assertEqual(data['next_after'], self.order2.id)
+        
+        response = self.client.get(f"{self.orders_api_url}?limit=2&after={data['next_after']}")
+        data = json.loads(response.content)
+        self.assertEqual([o['id'] for o in data['results']], [order3.id])
+        self.assertIsNone(data['next_after'])
+        
+        # Некорректный курсор
+        response = self.client.get(f"{self.orders_api_url}?after=abc")
+        self.assertEqual(response.status_code, 400)
+        
+        # Пустая страница не запрашивается
+        response = self.client.get(f"{self.orders_api_url}?limit=0")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], "Parameter 'limit' must be positive")
+    
+    def test_get_orders_streaming(self):
+        """Тест потоковой выдачи списка заказов в форматах JSON и NDJSON"""
+        response = self.client.get(f"{self.orders_api_url}?stream=json")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([o['table_number'] for o in data], [1, 2])
+        
+        response = self.client.get(f"{self.orders_api_url}?stream=ndjson&status=paid")
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().strip().split('\n')
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['id'], self.order2.id)
+        
+        # Пустая выборка остается корректным JSON
+        response = self.client.get(f"{self.orders_api_url}?stream=json&table_number=99")
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), [])
+    
+    @override_settings(ORDERS_ITEMS_SOURCE='lines')
+    def test_get_orders_items_from_lines(self):
+        """Тест чтения состава заказов из OrderLine"""
+        response = self.client.get(self.orders_api_url)
+        data = json.loads(response.content)
+        self.assertEqual(data[0]['items'], self.order1.items)
+        
+        response = self.client.get(f"{self.orders_api_url}{self.order2.id}/")
+        self.assertEqual(json.loads(response.content)['items'], self.order2.items)
+    
+    def test_bulk_create_orders(self):
+        """Тест массового создания заказов JSON-массивом"""
+        payload = [
+            {'table_number': 4, 'items': [{'name': 'Пицца', 'price': 12.00}, {'name': 'Сок', 'price': 3.50}]},
+            {'table_number': 5, 'items': [{'name': 'Чай', 'price': 2.00}], 'status': 'paid'},
+            {'table_number': 6, 'items': []},
+            {'table_number': -1, 'items': [{'name': 'Чай'}]},
+        ]
+        response = self.client.post(
+            f"{self.orders_api_url}bulk/", data=json.dumps(payload), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 207)
+        
+        data = json.loads(response.content)
+        self.assertEqual(data['created'], 2)
+        self.assertEqual(Order.objects.get(id=data['results'][0]['id']).total_price, Decimal('15.50'))
+        self.assertEqual(Order.objects.get(id=data['results'][1]['id']).lines.count(), 1)
+        self.assertIn('__all__', data['results'][2]['errors'])
+        self.assertEqual(set(data['results'][3]['errors']), {'table_number', 'items'})
+        
+        # Агрегаты обновлены и для массовой вставки
+        response = self.client.get(self.revenue_api_url)
+        self.assertEqual(json.loads(response.content)['revenue'], 25.0)
+    
+    def test_bulk_create_orders_ndjson(self):
+        """Тест массового создания заказов в формате NDJSON"""
+        body = '\n'.join([
+            json.dumps({'table_number': 7, 'items': [{'name': 'Кофе', 'price': 2.30}]}),
+            '{broken',
+        ])
+        response = self.client.post(
+            f"{self.orders_api_url}bulk/", data=body, content_type='application/x-ndjson'
+        )
+        self.assertEqual(response.status_code, 207)
+        data = json.loads(response.content)
+        self.assertEqual(data['results'][1], {'index': 1, 'errors': {'__all__': ['Invalid JSON']}})
+        self.assertTrue(Order.objects.filter(table_number=7).exists())
+    
+    def test_bulk_create_empty(self):
+        """Тест отказа при пустом массовом запросе"""
+        for body, content_type in (('[]', 'application/json'), ('\n', 'application/x-ndjson')):
+            response = self.client.post(f"{self.orders_api_url}bulk/", data=body, content_type=content_type)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(json.loads(response.content), {'error': 'No orders to create'})
@@ -0,0 +1,73 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache as django_cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from orders import archive, rollups
+from orders.models import ArchivedOrder, ArchivedOrderLine, DailyStatusRollup, Order, OrderLine
+
+
+class ArchiveOrdersTest(TestCase):
+    """Тесты переноса старых оплаченных заказов в архив"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        django_cache.clear()
+        old = timezone.now() - timedelta(days=30)
+        self.old_paid = [
+            Order.objects.create(table_number=i, items=[{'name': 'Плов', 'price': 10}] * 2, status='paid')
+            for i in range(1, 4)
+        ]
+        self.old_waiting = Order.objects.create(table_number=5, items=[{'name': 'Чай', 'price': 2}])
+        Order.objects.filter(id__in=[o.id for o in self.old_paid + [self.old_waiting]]).update(created_at=old)
+        rollups.rebuild()
+        self.recent_paid = Order.objects.create(table_number=6, items=[{'name': 'Суп', 'price': 5}], status='paid')
+    
+    def test_archive_moves_old_paid_orders(self):
+        """Тест переноса порциями: рабочая таблица содержит только актуальные заказы"""
+        count = archive.archive_orders(archive.archive_cutoff(7), batch_size=2)
+        
+        self.assertEqual(count, 3)
+        self.assertCountEqual(Order.objects.values_list('id', flat=True), [self.old_waiting.id, self.recent_paid.id])
+        self.assertCountEqual(ArchivedOrder.objects.values_list('id', flat=True), [o.id for o in self.old_paid])
+        self.assertEqual(ArchivedOrderLine.objects.get(order_id=self.old_paid[0].id).quantity, 2)
+        self.assertFalse(OrderLine.objects.filter(order_id=self.old_paid[0].id).exists())
+    
+    def test_reads_across_both_stores(self):
+        """Тест выручки, статистики и деталей заказа после архивации"""
+        revenue = self.client.get('/api/revenue/').json()
+        statistics = self.client.get('/api/statistics/').json()
+        rollup_rows = list(DailyStatusRollup.objects.values_list('day', 'status', 'order_count', 'revenue'))
+        
+        call_command('archive_orders', stdout=StringIO())
+        django_cache.clear()
+        
+        self.assertEqual(self.client.get('/api/revenue/').json(), revenue)
+        self.assertEqual(self.client.get('/api/statistics/').json(), statistics)
+        self.assertEqual(list(DailyStatusRollup.objects.values_list('day', 'status', 'order_count', 'revenue')), rollup_rows)
+        
+        # Точный расчет по времени читает обе таблицы
+        date_from = (timezone.now() - timedelta(days=60)).isoformat()
+        response = self.client.get('/api/revenue/', {'date_from': date_from, 'date_to': timezone.now().isoformat()})
+        self.assertEqual(response.json()['revenue'], 65.0)
+        
+        response = self.client.get(f'/api/orders/{self.old_paid[0].id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_price'], 20.0)
+        self.assertNotIn(self.old_paid[0].id, [o['id'] for o in self.client.get('/api/orders/').json()])
+    
+    @override_settings(ORDERS_ITEMS_SOURCE='lines')
+    def test_archived_detail_items_from_lines(self):
+        """Тест состава архивного заказа из архивных позиций"""
+        archive.archive_orders(archive.archive_cutoff(7))
+        response = self.client.get(f'/api/orders/{self.old_paid[0].id}/')
+        self.assertEqual(response.json()['items'], [{'name': 'Плов', 'price': 10.0}] * 2)
+    
+    def test_rebuild_includes_archive(self):
+        """Тест пересчета агрегатов с учетом архива"""
+        archive.archive_orders(archive.archive_cutoff(7))
+        rollups.rebuild()
+        self.assertEqual(rollups.status_totals()['paid'], (4, 65))
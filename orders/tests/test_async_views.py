@@ -0,0 +1,106 @@
+import json
+from decimal import Decimal
+
+from django.core.cache import cache as django_cache
+from django.test import TestCase
+
+from orders.models import MenuItem, Order
+
+
+class AsyncAPITestCase(TestCase):
+    """Тесты асинхронных версий API"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        django_cache.clear()
+        self.addCleanup(django_cache.clear)
+        self.order1 = Order.objects.create(
+            table_number=1, items=[{'name': 'Суп', 'price': 7.50}, {'name': 'Хлеб', 'price': 1.50}]
+        )
+        self.order2 = Order.objects.create(
+            table_number=2, items=[{'name': 'Стейк', 'price': 15.00}, {'name': 'Вино', 'price': 8.00}],
+            status='paid'
+        )
+        MenuItem.objects.create(name='Эспрессо', price=Decimal('2.50'), category='drink')
+        MenuItem.objects.create(name='Борщ', price=Decimal('8.50'), category='soup')
+    
+    async def test_orders_list(self):
+        """Тест списка заказов, пагинации и потоковой выдачи"""
+        response = await self.async_client.get('/api/async/orders/?status=paid')
+        self.assertEqual([o['id'] for o in json.loads(response.content)], [self.order2.id])
+        
+        response = await self.async_client.get('/api/async/orders/?limit=1')
+        self.assertEqual(json.loads(response.content)['next_after'], self.order1.id)
+        response = await self.async_client.get('/api/async/orders/?limit=0')
+        self.assertEqual(response.status_code, 400)
+        
+        response = await self.async_client.get('/api/async/orders/?stream=json')
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(json.loads(b''.join(chunks))), 2)
+    
+    async def test_sync_view_stream(self):
+        """Тест потоковой выдачи синхронного API под ASGI без сборки ответа целиком"""
+        response = await self.async_client.get('/api/orders/?stream=ndjson')
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual([json.loads(line)['id'] for line in b''.join(chunks).splitlines()],
+                         [self.order1.id, self.order2.id])
+    
+    async def test_order_create_update_delete(self):
+        """Тест создания, изменения статуса и удаления заказа"""
+        response = await self.async_client.post(
+            '/api/async/orders/',
+            data=json.dumps({'table_number': 3, 'items': [{'name': 'Сок', 'price': 3.50}]}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        order_id = json.loads(response.content)['id']
+        
+        response = await self.async_client.patch(
+            f'/api/async/orders/{order_id}/', data=json.dumps({'status': 'paid'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.get('/api/async/revenue/')
+        self.assertEqual(json.loads(response.content)['revenue'], 26.5)
+        response = await self.async_client.get('/api/async/revenue/?date_from=abc')
+        self.assertEqual(response.status_code, 400)
+        
+        response = await self.async_client.delete(f'/api/async/orders/{order_id}/')
+        self.assertEqual(response.status_code, 204)
+        response = await self.async_client.get(f'/api/async/orders/{order_id}/')
+        self.assertEqual(response.status_code, 404)
+    
+    async def test_order_create_validated_and_idempotent(self):
+        """Тест создания заказа по тем же правилам, что в синхронном API: цены меню, ошибки, Idempotency-Key"""
+        body = json.dumps({'table_number': 4, 'items': [{'name': 'Борщ', 'price': 1}]})
+        headers = {'Idempotency-Key': 'async-1'}
+        response = await self.async_client.post(
+            '/api/async/orders/', data=body, content_type='application/json', headers=headers,
+        )
+        self.assertEqual(response.status_code, 201)
+        order = await Order.objects.aget(id=json.loads(response.content)['id'])
+        self.assertEqual(order.total_price, Decimal('8.50'))
+        
+        replay = await self.async_client.post(
+            '/api/async/orders/', data=body, content_type='application/json', headers=headers,
+        )
+        self.assertEqual(replay.content, response.content)
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(await Order.objects.filter(table_number=4).acount(), 1)
+        
+        response = await self.async_client.post(
+            '/api/async/orders/', data=json.dumps({'table_number': 4, 'items': [1]}), content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('items', json.loads(response.content)['errors'])
+    
+    async def test_menu_and_statistics(self):
+        """Тест меню и статистики"""
+        response = await self.async_client.get('/api/async/menu/')
+        self.assertEqual([item['name'] for item in json.loads(response.content)], ['Борщ', 'Эспрессо'])
+        
+        response = await self.async_client.get('/api/async/statistics/')
+        data = json.loads(response.content)
+        self.assertEqual(data['total_orders'], 2)
+        self.assertEqual(data['average_order_value'], 23.0)
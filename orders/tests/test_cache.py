@@ -0,0 +1,82 @@
+import threading
+import time
+from decimal import Decimal
+
+from django.core.cache import cache as django_cache
+from django.test import TestCase, override_settings
+
+from orders import cache
+from orders.models import MenuItem, Order
+
+
+class VersionedCacheTest(TestCase):
+    """Тесты версионируемого кеша API"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        django_cache.clear()
+        self.addCleanup(django_cache.clear)
+        Order.objects.create(table_number=1, items=[{'name': 'Стейк', 'price': 15.00}], status='paid')
+    
+    def test_revenue_invalidated_on_order_change(self):
+        """Тест инвалидации выручки при оплате заказа"""
+        self.assertEqual(self.client.get('/api/revenue/').json(), {'revenue': 15.0})
+        
+        order = Order.objects.create(table_number=2, items=[{'name': 'Вино', 'price': 8.00}])
+        self.assertEqual(self.client.get('/api/revenue/').json(), {'revenue': 15.0})
+        
+        order.status = 'paid'
+        order.save(update_fields=['status'])
+        self.assertEqual(self.client.get('/api/revenue/').json(), {'revenue': 23.0})
+        self.assertEqual(self.client.get('/api/statistics/').json()['status_counts']['paid'], 2)
+    
+    def test_menu_invalidated_on_menu_change(self):
+        """Тест инвалидации меню при изменении блюда"""
+        item = MenuItem.objects.create(name='Борщ', price=Decimal('8.50'), category='soup')
+        self.assertEqual(self.client.get('/api/menu/').json()[0]['price'], 8.5)
+        
+        item.price = Decimal('9.00')
+        item.save()
+        self.assertEqual(self.client.get('/api/menu/').json()[0]['price'], 9.0)
+    
+    @override_settings(ORDERS_CACHE_TTL=3600, ORDERS_CACHE_LOCAL_TTL=60)
+    def test_process_local_ttl(self):
+        """Тест ограничения срока хранения в кеше процесса"""
+        self.assertTrue(cache.is_process_local())
+        self.assertEqual(cache.default_ttl(), 60)
+        
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        with override_settings(CACHES=shared):
+            self.assertFalse(cache.is_process_local())
+            self.assertEqual(cache.default_ttl(), 3600)
+    
+    def test_hit_miss_counters(self):
+        """Тест счетчиков попаданий и промахов"""
+        before = cache.stats().get(cache.STATISTICS, {'hits': 0, 'misses': 0})
+        self.client.get('/api/statistics/')
+        self.client.get('/api/statistics/?unused=1')
+        after = cache.stats()[cache.STATISTICS]
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(after['hits'] - before['hits'], 1)
+    
+    def test_single_flight(self):
+        """Тест однократного вычисления при одновременных промахах"""
+        calls = []
+        
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return 42
+        
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_compute('test', 'key', compute)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(results, [42] * 8)
+        self.assertEqual(len(calls), 1)
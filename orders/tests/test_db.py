@@ -0,0 +1,33 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from orders.db import configure_sqlite
+
+
+class SQLiteTuningTest(TestCase):
+    """Тесты настройки соединений SQLite"""
+    
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+    
+    def set_pragmas(self, pragmas):
+        with connection.cursor() as cursor:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+    
+    # synchronous нельзя менять внутри транзакции TestCase, он проверяется ниже
+    @override_settings(ORDERS_SQLITE_PRAGMAS={'busy_timeout': 1234, 'cache_size': -4096})
+    def test_pragmas_applied(self):
+        """Тест выполнения PRAGMA при открытии соединения"""
+        # Соединение общее для всех тестов: возвращаем прежние значения
+        self.addCleanup(self.set_pragmas, {name: self.pragma(name) for name in ('busy_timeout', 'cache_size')})
+        configure_sqlite(sender=None, connection=connection)
+        self.assertEqual(self.pragma('busy_timeout'), 1234)
+        self.assertEqual(self.pragma('cache_size'), -4096)
+    
+    def test_default_pragmas(self):
+        """Тест значений по умолчанию на соединении тестовой базы"""
+        self.assertEqual(self.pragma('busy_timeout'), 20000)
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
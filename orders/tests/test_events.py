@@ -0,0 +1,149 @@
+import asyncio
+import json
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from orders import events
+from orders.models import Order, OrderEvent
+
+
+class OrderEventsTest(TestCase):
+    """Тесты событий заказов и SSE-потока"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.backend = events.LocalBackend()
+        patcher = mock.patch.object(events, '_backend', self.backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_events_published_after_commit(self):
+        """Тест публикации событий создания, смены статуса и удаления"""
+        subscription = self.backend.subscribe()
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(table_number=3, items=[{'name': 'Суп', 'price': 7.50}])
+        with self.captureOnCommitCallbacks(execute=True):
+            order.status = 'ready'
+            order.save(update_fields=['status'])
+        with self.captureOnCommitCallbacks(execute=True):
+            order.delete()
+        
+        received = [subscription.get(timeout=1) for _ in range(3)]
+        self.assertEqual(
+            [event['type'] for event in received],
+            [events.ORDER_CREATED, events.ORDER_STATUS_CHANGED, events.ORDER_DELETED],
+        )
+        self.assertEqual(received[1]['data']['previous_status'], 'waiting')
+        self.assertEqual(received[0]['data']['total_price'], 7.5)
+    
+    def test_sse_stream(self):
+        """Тест потока text/event-stream с досылкой пропущенных событий"""
+        self.backend.publish(events.ORDER_CREATED, {'id': 1})
+        
+        response = self.client.get('/api/orders/events/', HTTP_LAST_EVENT_ID='0')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = iter(response.streaming_content)
+        self.assertTrue(next(stream).startswith(b'retry:'))
+        self.assertEqual(next(stream), b'id: 1\nevent: order_created\ndata: {"id": 1}\n\n')
+        
+        self.backend.publish(events.ORDER_DELETED, {'id': 1})
+        self.assertIn(b'event: order_deleted', next(stream))
+        
+        response.close()
+        self.assertEqual(self.backend.broker.subscriber_count, 0)
+    
+    def test_sse_stream_from_page(self):
+        """Тест первого подключения табло: события после отрисованного состояния (?last_event_id=)"""
+        self.assertEqual(self.backend.last_id(), 0)
+        self.backend.publish(events.ORDER_CREATED, {'id': 1})
+        last_event_id = self.backend.last_id()
+        self.backend.publish(events.ORDER_DELETED, {'id': 1})
+        
+        response = self.client.get('/api/orders/events/', {'last_event_id': last_event_id})
+        stream = iter(response.streaming_content)
+        next(stream)
+        self.assertEqual(next(stream), b'id: 2\nevent: order_deleted\ndata: {"id": 1}\n\n')
+        response.close()
+    
+    async def test_sse_stream_asgi(self):
+        """Тест потока под ASGI: события ждутся в цикле событий, без потока на подключение"""
+        self.backend.publish(events.ORDER_CREATED, {'id': 1})
+        
+        response = await self.async_client.get('/api/orders/events/', headers={'Last-Event-ID': '0'})
+        self.assertTrue(response.is_async)
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b'retry:'))
+        self.assertEqual(await anext(stream), b'id: 1\nevent: order_created\ndata: {"id": 1}\n\n')
+        
+        # Публикация из другого потока будит ожидающее подключение
+        next_event = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0.05)
+        await asyncio.to_thread(self.backend.publish, events.ORDER_DELETED, {'id': 1})
+        self.assertIn(b'event: order_deleted', await asyncio.wait_for(next_event, 1))
+        
+        # При отключении клиента сервер отменяет задачу, ожидающую событие
+        waiting = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+        self.assertEqual(self.backend.broker.subscriber_count, 0)
+    
+    def test_slow_subscriber_disconnected(self):
+        """Тест отключения подписчика с переполненной очередью"""
+        subscription = self.backend.subscribe()
+        for index in range(events.SUBSCRIBER_QUEUE_SIZE + 1):
+            self.backend.publish(events.ORDER_UPDATED, {'id': index})
+        self.assertIs(subscription.get(timeout=1), events.CLOSED)
+        self.assertEqual(self.backend.broker.subscriber_count, 0)
+    
+    def test_database_backend(self):
+        """Тест межпроцессного бэкенда на таблице OrderEvent"""
+        backend = events.DatabaseBackend()
+        backend._last_id = 0
+        subscription = backend.broker.subscribe()
+        backend.publish(events.ORDER_CREATED, {'id': 5})
+        
+        self.assertEqual(OrderEvent.objects.count(), 1)
+        self.assertEqual(backend.last_id(), OrderEvent.objects.get().id)
+        backend.poll_once()
+        event = subscription.get(timeout=1)
+        self.assertEqual((event['type'], event['data']), (events.ORDER_CREATED, {'id': 5}))
+        self.assertEqual(json.loads(events.format_sse(event).split('data: ')[1]), {'id': 5})
+    
+    def test_database_backend_poll_errors_logged(self):
+        """Тест: ошибка чтения таблицы пишется в лог, пауза между попытками растет до успеха"""
+        class Stop(BaseException):
+            pass
+        
+        backend = events.DatabaseBackend()
+        delays = []
+        
+        def sleep(delay):
+            delays.append(delay)
+            if len(delays) == 5:
+                raise Stop
+        
+        failures = [RuntimeError('database is locked')] * 3 + [None]
+        with mock.patch.object(events.time, 'sleep', side_effect=sleep), \
+                mock.patch.object(backend, 'poll_once', side_effect=failures), \
+                self.assertLogs('orders.events', 'ERROR') as logs, self.assertRaises(Stop):
+            backend._run()
+        interval = events.DatabaseBackend.POLL_INTERVAL
+        self.assertEqual(delays, [interval, interval * 2, interval * 4, interval * 8, interval])
+        self.assertEqual(len(logs.records), 3)
+    
+    def test_database_backend_batches_transaction(self):
+        """Тест записи событий транзакции одним INSERT"""
+        backend = events.DatabaseBackend()
+        payload = [{'table_number': table, 'items': [{'name': 'Чай', 'price': 2}]} for table in range(1, 4)]
+        with mock.patch.object(events, '_backend', backend), CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/api/orders/bulk/', json.dumps(payload), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "orders_orderevent"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(list(OrderEvent.objects.values_list('kind', flat=True)), [events.ORDER_CREATED] * 3)
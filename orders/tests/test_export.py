@@ -0,0 +1,111 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from orders import archive, export
+from orders.models import ArchivedOrder, Order
+
+
+class OrdersExportTest(TestCase):
+    """Тесты потоковой выгрузки заказов"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.old = Order.objects.create(table_number=1, items=[{'name': 'Плов', 'price': 10}] * 2, status='paid')
+        Order.objects.filter(id=self.old.id).update(created_at=timezone.now() - timedelta(days=30))
+        archive.archive_orders(archive.archive_cutoff(7))
+        self.soup = Order.objects.create(table_number=2, items=[{'name': 'Суп, острый', 'price': 5.5}])
+        self.empty = Order.objects.create(table_number=3, items=[], status='ready')
+    
+    def get(self, **params):
+        response = self.client.get('/api/orders/export/', params)
+        return response, b''.join(response.streaming_content)
+    
+    def csv_rows(self, body):
+        return list(csv.DictReader(io.StringIO(body.decode('utf-8'))))
+    
+    def test_csv_merges_archive_and_orders(self):
+        """Тест CSV по заказам рабочей таблицы и архива в порядке id"""
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = self.csv_rows(body)
+        self.assertEqual([int(row['id']) for row in rows], [self.old.id, self.soup.id, self.empty.id])
+        self.assertEqual(rows[0]['total_price'], '20.00')
+        self.assertEqual(json.loads(rows[1]['items']), [{'name': 'Суп, острый', 'price': 5.5}])
+    
+    def test_order_in_both_stores_exported_once(self):
+        """Тест выгрузки заказа, прочитанного и в рабочей таблице, и в архиве (перенос во время выгрузки)"""
+        row = Order.objects.filter(id=self.soup.id).values(*archive.ORDER_FIELDS).get()
+        ArchivedOrder.objects.create(**row)
+        ids = [order['id'] for order in export.iter_orders()]
+        self.assertEqual(ids, [self.old.id, self.soup.id, self.empty.id])
+    
+    def test_flattened_lines(self):
+        """Тест выгрузки по строке на позицию заказа"""
+        rows = self.csv_rows(self.get(lines='1')[1])
+        self.assertEqual(
+            [(int(row['id']), row['item_position'], row['item_name'], row['item_price']) for row in rows],
+            [
+                (self.old.id, '0', 'Плов', '10.00'),
+                (self.old.id, '1', 'Плов', '10.00'),
+                (self.soup.id, '0', 'Суп, острый', '5.50'),
+                (self.empty.id, '', '', ''),
+            ],
+        )
+    
+    def test_ndjson_filters_and_cursor(self):
+        """Тест NDJSON с фильтрами по статусу, периоду и курсором after"""
+        response, body = self.get(format='ndjson', status='unpaid')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([json.loads(line)['id'] for line in body.splitlines()], [self.soup.id, self.empty.id])
+        
+        today = timezone.localdate().isoformat()
+        body = self.get(format='ndjson', date_from=today, date_to=today, after=self.soup.id)[1]
+        self.assertEqual([json.loads(line)['id'] for line in body.splitlines()], [self.empty.id])
+        
+        for params in ({'date_from': 'вчера'}, {'format': 'parquet'}, {'status': 'lost'}, {'after': '-1'}):
+            self.assertEqual(self.client.get('/api/orders/export/', params).status_code, 400)
+    
+    def test_gzip_and_chunked_reads(self):
+        """Тест сжатия на лету и чтения порциями по ключу"""
+        with mock.patch.object(export, 'EXPORT_CHUNK_SIZE', 1), self.assertNumQueries(5):
+            response = self.client.get('/api/orders/export/', HTTP_ACCEPT_ENCODING='gzip')
+            body = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(body, self.get()[1])
+        
+        # gzip;q=0 - клиент отказывается от сжатия
+        response = self.client.get('/api/orders/export/', HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content), self.get()[1])
+    
+    async def test_asgi_stream(self):
+        """Тест выгрузки под ASGI: поток отдается порциями, а не собирается целиком"""
+        response = await self.async_client.get('/api/orders/export/', {'format': 'ndjson'})
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual([json.loads(line)['id'] for line in body.splitlines()],
+                         [self.old.id, self.soup.id, self.empty.id])
+    
+    def test_export_command(self):
+        """Тест команды export_orders с продолжением после курсора"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'orders.csv.gz')
+            stderr = StringIO()
+            call_command('export_orders', '--gzip', f'--after={self.old.id}', f'--output={path}', stderr=stderr)
+            with gzip.open(path, 'rt', encoding='utf-8') as output:
+                rows = list(csv.DictReader(output))
+        self.assertEqual([int(row['id']) for row in rows], [self.soup.id, self.empty.id])
+        self.assertIn(str(self.empty.id), stderr.getvalue())
@@ -0,0 +1,84 @@
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache as django_cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from orders import idempotency
+from orders.models import IdempotencyKey, Order
+
+
+class IdempotencyTest(TestCase):
+    """Тесты повторов создания заказа с заголовком Idempotency-Key"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        django_cache.clear()
+        self.body = json.dumps({'table_number': 3, 'items': [{'name': 'Пирог', 'price': 3.1}]})
+    
+    def post(self, key, body=None, url='/api/orders/'):
+        return self.client.post(
+            url, data=body or self.body, content_type='application/json', HTTP_IDEMPOTENCY_KEY=key
+        )
+    
+    def test_replay_returns_stored_response(self):
+        """Тест: повтор с тем же ключом отдает первый ответ без нового заказа"""
+        first = self.post('tablet-1')
+        self.assertEqual(first.status_code, 201)
+        
+        second = self.post('tablet-1')
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second[idempotency.REPLAYED_HEADER], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+        
+        self.assertEqual(self.post('tablet-2').status_code, 201)
+        self.assertEqual(Order.objects.count(), 2)
+    
+    def test_key_reused_for_other_request(self):
+        """Тест ошибки 422 для того же ключа с другим телом"""
+        self.post('tablet-1')
+        response = self.post('tablet-1', json.dumps({'table_number': 4, 'items': [{'name': 'Чай', 'price': 1}]}))
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+    
+    def test_errors_are_not_stored(self):
+        """Тест: ответ с ошибкой не сохраняется, исправленный запрос с тем же ключом проходит"""
+        self.assertEqual(self.post('tablet-1', json.dumps({'table_number': 3})).status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self.post('tablet-1').status_code, 201)
+    
+    def test_expired_key(self):
+        """Тест: после TTL ключ можно использовать снова"""
+        self.post('tablet-1')
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+        response = self.post('tablet-1')
+        self.assertNotIn(idempotency.REPLAYED_HEADER, response)
+        self.assertEqual(Order.objects.count(), 2)
+    
+    def test_concurrent_duplicate(self):
+        """Тест: если ключ занял одновременный запрос, свой заказ откатывается и отдается чужой ответ"""
+        first = self.post('tablet-1')
+        # Второй запрос не увидел ключ при проверке и дошел до вставки
+        with mock.patch.object(idempotency, '_find', side_effect=[None, IdempotencyKey.objects.get()]):
+            second = self.post('tablet-1')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(Order.objects.count(), 1)
+    
+    def test_bulk(self):
+        """Тест повтора массового создания"""
+        body = json.dumps([{'table_number': 1, 'items': [{'name': 'Чай', 'price': 1}]}] * 2)
+        self.assertEqual(self.post('batch-1', body, '/api/orders/bulk/').status_code, 201)
+        self.assertEqual(self.post('batch-1', body, '/api/orders/bulk/').status_code, 201)
+        self.assertEqual(Order.objects.count(), 2)
+    
+    @override_settings(ORDERS_IDEMPOTENCY_MAX_KEYS=2)
+    def test_prune(self):
+        """Тест удаления устаревших ключей и ключей сверх лимита"""
+        for key in ('a', 'b', 'c', 'd'):
+            self.post(key)
+        IdempotencyKey.objects.filter(key='d').update(created_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(idempotency.prune(), 2)
+        self.assertEqual(sorted(IdempotencyKey.objects.values_list('key', flat=True)), ['b', 'c'])
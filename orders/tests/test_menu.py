@@ -0,0 +1,124 @@
+import gzip
+import json
+from decimal import Decimal
+
+from django.core.cache import cache as django_cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from orders import menu, pricing
+from orders.forms import OrderForm
+from orders.models import MenuItem, Order, OrderLine
+
+
+class MenuSnapshotTest(TestCase):
+    """Тесты снимка меню и условных запросов к /api/menu/"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        django_cache.clear()
+        self.addCleanup(django_cache.clear)
+        self.soup = MenuItem.objects.create(name='Уха', price='6.50', category='soup')
+        MenuItem.objects.create(name='Квас', price='2.00', category='drink', is_available=False)
+    
+    @override_settings(ORDERS_MENU_STAMP_INTERVAL=60)
+    def test_etag_not_modified(self):
+        """Тест ответа 304 без запросов к БД"""
+        response = self.client.get('/api/menu/')
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('"'))
+        
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/menu/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+    
+    def test_etag_changes_with_menu(self):
+        """Тест нового ETag после изменения меню"""
+        etag = self.client.get('/api/menu/')['ETag']
+        self.soup.price = '7.00'
+        self.soup.save()
+        
+        response = self.client.get('/api/menu/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(json.loads(response.content)[1]['price'], 7.0)
+    
+    def test_gzip(self):
+        """Тест сжатого ответа по Accept-Encoding"""
+        plain = self.client.get('/api/menu/')
+        response = self.client.get('/api/menu/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(response['ETag'], plain['ETag'])
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        
+        # Явный отказ от gzip и выбор по "*"
+        for header, encoding in (('gzip;q=0, deflate', None), ('deflate, *;q=0.5', 'gzip'), ('*;q=0', None)):
+            response = self.client.get('/api/menu/', HTTP_ACCEPT_ENCODING=header)
+            self.assertEqual(response.get('Content-Encoding'), encoding)
+    
+    def test_form_uses_available_items(self):
+        """Тест выбора блюд формы из снимка меню"""
+        form = OrderForm(data={'table_number': 2, 'menu_items': [str(self.soup.id)]})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['items'], [{'name': 'Уха', 'price': 6.5}])
+        
+        unavailable = MenuItem.objects.get(name='Квас')
+        form = OrderForm(data={'table_number': 2, 'menu_items': [str(unavailable.id)]})
+        self.assertFalse(form.is_valid())
+        self.assertIn('menu_items', form.errors)
+    
+    def test_index(self):
+        """Тест индекса блюд по id, названию и категории"""
+        MenuItem.objects.create(name='Морс', price='3.00', category='drink')
+        snapshot = menu.get_snapshot()
+        self.assertEqual(snapshot.lookup(item_id=self.soup.id).name, 'Уха')
+        self.assertEqual(snapshot.lookup(name='Морс').price, 3)
+        self.assertIsNone(snapshot.lookup(name='Квас'))
+        self.assertEqual([entry.name for entry in snapshot.available_by_category['drink']], ['Морс'])
+        self.assertIn('Квас', snapshot.ids_by_name)
+        
+        self.soup.is_available = False
+        self.soup.save()
+        snapshot = menu.get_snapshot()
+        self.assertIsNone(snapshot.lookup(item_id=self.soup.id))
+        self.assertNotIn('soup', snapshot.available_by_category)
+    
+    @override_settings(ORDERS_MENU_STAMP_INTERVAL=60)
+    def test_order_create_without_menu_queries(self):
+        """Тест создания заказа через форму без запросов к меню после построения снимка"""
+        menu.get_snapshot()
+        data = {'table_number': 4, 'menu_items': [str(self.soup.id)], 'items_text': 'Квас - 2'}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/orders/create/', data)
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse([query for query in queries if 'orders_menuitem' in query['sql']])
+        
+        order = Order.objects.get(table_number=4)
+        lines = {line.name: line.menu_item_id for line in OrderLine.objects.filter(order=order)}
+        self.assertEqual(lines, {'Уха': self.soup.id, 'Квас': MenuItem.objects.get(name='Квас').id})
+    
+    def test_change_in_other_process(self):
+        """Тест сверки снимка с БД после изменения меню другим процессом"""
+        snapshot = menu.get_snapshot()
+        self.assertEqual(pricing.get_price_table().by_id[self.soup.id], ('Уха', Decimal('6.50')))
+        
+        # Другой воркер меняет цену: сигнал сработал у него, версия в кеше этого процесса прежняя
+        MenuItem.objects.filter(id=self.soup.id).update(price='7.00', updated_at=timezone.now())
+        with override_settings(ORDERS_MENU_STAMP_INTERVAL=60):
+            self.assertIs(menu.get_snapshot(), snapshot)
+        with override_settings(ORDERS_MENU_STAMP_INTERVAL=0):
+            self.assertEqual(pricing.get_price_table().by_id[self.soup.id], ('Уха', Decimal('7.00')))
+            snapshot = menu.get_snapshot()
+            # Без изменений сверка стоит одного запроса и снимок не перестраивается
+            with self.assertNumQueries(1):
+                self.assertIs(menu.get_snapshot(), snapshot)
+        
+        # Удаление блюда (тоже без сигнала в этом процессе) меняет число блюд в отметке
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM orders_menuitem WHERE name = %s', ['Квас'])
+        with override_settings(ORDERS_MENU_STAMP_INTERVAL=0):
+            self.assertNotIn('Квас', menu.get_snapshot().ids_by_name)
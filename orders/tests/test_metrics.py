@@ -0,0 +1,64 @@
+from asgiref.sync import iscoroutinefunction
+from django.test import TestCase, override_settings
+
+from orders import metrics
+from orders.middleware import RequestMetricsMiddleware
+from orders.models import Order
+
+
+class RequestMetricsTest(TestCase):
+    """Тесты метрик запросов и эндпоинта /metrics/"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        metrics.registry.clear()
+        self.order = Order.objects.create(table_number=1, items=[{'name': 'Суп', 'price': 7.50}])
+    
+    def test_metrics_endpoint(self):
+        """Тест выдачи метрик по шаблону маршрута"""
+        self.client.get(f'/api/orders/{self.order.id}/')
+        self.client.get('/api/orders/')
+        
+        response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        text = response.content.decode()
+        
+        route = 'route="api/orders/<int:order_id>/"'
+        self.assertIn(f'orders_http_requests_total{{method="GET",{route},status="200"}} 1', text)
+        self.assertIn(f'orders_db_queries_per_request_count{{method="GET",{route}}} 1', text)
+        self.assertIn(f'orders_db_queries_per_request_sum{{method="GET",{route}}} 1', text)
+        self.assertIn('orders_serialization_seconds_count{method="GET",route="api/orders/"} 1', text)
+        self.assertIn('orders_http_response_size_bytes_bucket', text)
+    
+    async def test_async_requests(self):
+        """Тест метрик асинхронного API: middleware работает в цикле событий, SQL учитывается"""
+        async def get_response(request):
+            return None
+        self.assertTrue(iscoroutinefunction(RequestMetricsMiddleware(get_response)))
+        
+        response = await self.async_client.get(f'/api/async/orders/{self.order.id}/')
+        self.assertEqual(response.status_code, 200)
+        text = metrics.render_prometheus()
+        route = 'route="api/async/orders/<int:order_id>/"'
+        self.assertIn(f'orders_http_requests_total{{method="GET",{route},status="200"}} 1', text)
+        self.assertIn(f'orders_db_queries_per_request_sum{{method="GET",{route}}} 1', text)
+    
+    def test_histogram_buckets(self):
+        """Тест накопительных корзин гистограммы"""
+        registry = metrics.Registry()
+        for value in (0, 3, 3, 500):
+            registry.observe('queries', 'help', value, buckets=(1, 5, 100))
+        text = registry.render()
+        self.assertIn('queries_bucket{le="1"} 1', text)
+        self.assertIn('queries_bucket{le="5"} 3', text)
+        self.assertIn('queries_bucket{le="+Inf"} 4', text)
+        self.assertIn('queries_sum 506', text)
+    
+    @override_settings(ORDERS_METRICS_SLOW_REQUEST_MS=0, ORDERS_METRICS_TRACE_QUERIES=True)
+    def test_slow_request_trace(self):
+        """Тест записи медленного запроса с трассировкой SQL в лог"""
+        with self.assertLogs('orders.metrics', level='WARNING') as logs:
+            self.client.get('/api/orders/')
+        self.assertIn('GET /api/orders/', logs.output[0])
+        self.assertIn('FROM "orders_order"', logs.output[0])
@@ -1,8 +1,9 @@
 import unittest
+from django.core.cache import cache as django_cache
 from django.test import TestCase
 from django.urls import reverse
 from decimal import Decimal
-from orders.models import Order, MenuItem
+from orders.models import Order, MenuItem, OrderLine
 
 class OrderModelTest(TestCase):
     """Тесты для модели Order"""
@@ -96,3 +97,56 @@ class MenuItemModelTest(TestCase):
         """Тест метода is_popular"""
         # В текущей реализации метод всегда возвращает False
         self.assertFalse(self.menu_item.is_popular())
+
+
+class OrderLineModelTest(TestCase):
+    """Тесты для нормализованных позиций заказа OrderLine"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        # Позиции связываются с меню через снимок (orders.menu), зависящий от версий в кеше.
+        # Снимок переживает откат транзакции теста, поэтому версии сбрасываются и после теста
+        django_cache.clear()
+        self.addCleanup(django_cache.clear)
+        self.menu_item = MenuItem.objects.create(name='Суп', price=Decimal('7.50'), category='soup')
+        self.order = Order.objects.create(
+            table_number=5,
+            items=[
+                {'name': 'Суп', 'price': 7.50},
+                {'name': 'Кофе', 'price': 2.30},
+                {'name': 'Суп', 'price': 7.50},
+            ],
+        )
+    
+    def test_lines_created_with_order(self):
+        """Тест создания позиций вместе с заказом"""
+        lines = list(self.order.lines.all())
+        self.assertEqual([(line.name, line.quantity) for line in lines], [('Суп', 2), ('Кофе', 1)])
+        self.assertEqual(lines[0].menu_item, self.menu_item)
+        self.assertIsNone(lines[1].menu_item)
+        self.assertEqual(sum(line.line_total for line in lines), self.order.total_price)
+    
+    def test_lines_follow_items_changes(self):
+        """Тест пересоздания позиций при изменении items"""
+        self.order.items = [{'name': 'Чай', 'price': 1.20}]
+        self.order.save()
+        self.assertEqual(list(self.order.lines.values_list('name', flat=True)), ['Чай'])
+        
+        # Изменение только статуса не трогает позиции
+        line_ids = list(self.order.lines.values_list('id', flat=True))
+        self.order.status = 'ready'
+        self.order.save(update_fields=['status'])
+        self.assertEqual(list(self.order.lines.values_list('id', flat=True)), line_ids)
+    
+    def test_lines_as_items(self):
+        """Тест чтения состава заказа из OrderLine в формате items"""
+        # Одинаковые блюда идут подряд в порядке первого появления
+        soup, coffee = self.order.items[:2]
+        self.assertEqual(self.order.lines_as_items(), [soup, soup, coffee])
+        
+        self.order.items = [soup, soup, coffee]
+        self.order.save()
+        self.assertEqual(self.order.lines_as_items(), self.order.items)
+        
+        self.order.delete()
+        self.assertEqual(OrderLine.objects.count(), 0)
@@ -0,0 +1,90 @@
+import json
+from decimal import Decimal
+
+from django.core.cache import cache as django_cache
+from django.test import TestCase
+
+from orders import parsers
+from orders.forms import OrderForm, clean_order_payload
+from orders.models import Order
+
+
+class ParsersTest(TestCase):
+    """Тесты разбора состава заказа"""
+    
+    def setUp(self):
+        """Сброс снимка меню, оставшегося от других тестов"""
+        django_cache.clear()
+    
+    def test_parse_text(self):
+        """Тест текстового формата с количеством и точными ценами"""
+        items, errors = parsers.parse_text('Суп x3 - 250\nКофе-латте - 150,50\n\nЧай х2 - 0.1\nХлеб * 1 - 10')
+        self.assertEqual(errors, [])
+        self.assertEqual(items, [
+            ('Суп', Decimal('250.00'), 3),
+            ('Кофе-латте', Decimal('150.50'), 1),
+            ('Чай', Decimal('0.10'), 2),
+            ('Хлеб', Decimal('10.00'), 1),
+        ])
+    
+    def test_errors_collected_in_one_pass(self):
+        """Тест: ошибки всех строк возвращаются вместе"""
+        items, errors = parsers.parse_text('Суп\nЧай - 1.005\nКофе x0 - 5\nХлеб - 10')
+        self.assertEqual(items, [('Хлеб', Decimal('10.00'), 1)])
+        self.assertEqual(errors, [
+            parsers.FORMAT_ERROR.format(line='Суп'),
+            parsers.PRICE_ERROR.format(line='Чай - 1.005'),
+            parsers.QUANTITY_ERROR.format(line='Кофе x0 - 5'),
+        ])
+    
+    def test_parse_json_items(self):
+        """Тест JSON-списка: цена, количество и некорректные элементы"""
+        items, errors = parsers.parse_json_items([
+            {'name': 'Суп', 'price': 12.3, 'quantity': 2},
+            {'name': 'Чай', 'price': 'NaN'},
+            {'name': 'Кофе', 'price': 5, 'quantity': True},
+            {'name': ['Хлеб'], 'price': 1},
+            {'menu_item_id': 7, 'quantity': 3},
+            {'menu_item_id': '7'},
+        ])
+        self.assertEqual(items, [('Суп', Decimal('12.30'), 2), (7, None, 3)])
+        self.assertEqual(len(errors), 4)
+        self.assertEqual(parsers.parse_json_items({'name': 'Суп'}), ([], [parsers.JSON_LIST_ERROR]))
+    
+    def test_merge_items(self):
+        """Тест объединения источников: дубли по первому вхождению, количество разворачивается"""
+        items, total = parsers.merge_items(
+            [('Суп', Decimal('250.00'), 2)],
+            [('Суп', Decimal('250'), 5), ('Чай', Decimal('0.10'), 1)],
+        )
+        self.assertEqual(items, [{'name': 'Суп', 'price': 250.0}] * 2 + [{'name': 'Чай', 'price': 0.1}])
+        self.assertEqual(total, Decimal('500.10'))
+    
+    def test_shared_by_form_and_api(self):
+        """Тест: форма, API и массовое создание дают одинаковый состав и точную сумму"""
+        text = 'Суп x3 - 0.10\nЧай - 0.20'
+        form = OrderForm(data={'table_number': 1, 'items_text': text})
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.save().total_price, Decimal('0.50'))
+        
+        payload, errors = clean_order_payload({'table_number': 1, 'items_text': text})
+        self.assertEqual(errors, {})
+        self.assertEqual(payload['items'], form.cleaned_data['items'])
+        
+        response = self.client.post(
+            '/api/orders/', data=json.dumps({'table_number': 2, 'items_text': text}), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Order.objects.get(id=response.json()['id']).total_price, Decimal('0.50'))
+        
+        response = self.client.post(
+            '/api/orders/', data=json.dumps({'table_number': 2, 'items_text': 'Суп'}), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('items_text', response.json()['errors'])
+    
+    def test_form_reports_all_line_errors(self):
+        """Тест формы: ошибки всех строк в поле items_text"""
+        form = OrderForm(data={'table_number': 1, 'items_text': 'Суп\nЧай - abc\nКофе - 5'})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(len(form.errors['items_text']), 2)
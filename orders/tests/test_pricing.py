@@ -0,0 +1,87 @@
+import json
+from decimal import Decimal
+
+from django.core.cache import cache as django_cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from orders import pricing
+from orders.forms import OrderForm, clean_order_payload
+from orders.models import MenuItem, Order, OrderLine
+
+
+class PricingTest(TestCase):
+    """Тесты цен по меню и пересчета итога заказа"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        django_cache.clear()
+        self.addCleanup(django_cache.clear)
+        self.soup = MenuItem.objects.create(name='Солянка', price='8.50', category='soup')
+        self.tea = MenuItem.objects.create(name='Чай', price='1.99', category='drink')
+    
+    def test_menu_price_wins(self):
+        """Тест: цена блюда меню берется из меню, блюдо не из меню - по цене клиента"""
+        payload, errors = clean_order_payload({'table_number': 1, 'items': [
+            {'name': 'Солянка', 'price': 0.01},
+            {'menu_item_id': self.tea.id, 'quantity': 2},
+            {'name': 'Пирог', 'price': '3.10'},
+        ]})
+        self.assertEqual(errors, {})
+        self.assertEqual(payload['items'], [
+            {'name': 'Солянка', 'price': 8.5},
+            {'name': 'Чай', 'price': 1.99},
+            {'name': 'Чай', 'price': 1.99},
+            {'name': 'Пирог', 'price': 3.1},
+        ])
+        self.assertEqual(payload['total_price'], Decimal('15.58'))
+    
+    def test_unknown_items(self):
+        """Тест ошибок: неизвестный id и блюдо не из меню без цены"""
+        _, errors = clean_order_payload({'table_number': 1, 'items': [
+            {'menu_item_id': 999}, {'name': 'Пирог'},
+        ]})
+        self.assertEqual(errors['items'], [
+            pricing.MENU_ITEM_ERROR.format(item_id=999),
+            pricing.PRICE_REQUIRED_ERROR.format(name='Пирог'),
+        ])
+    
+    @override_settings(ORDERS_CATEGORY_PRICE_MODIFIERS={'drink': '0.9'})
+    def test_category_modifier(self):
+        """Тест модификатора категории с округлением до копеек"""
+        form = OrderForm(data={'table_number': 2, 'menu_items': [str(self.tea.id)], 'items_text': 'Солянка - 1'})
+        self.assertTrue(form.is_valid(), form.errors)
+        order = form.save()
+        self.assertEqual(order.items, [{'name': 'Солянка', 'price': 8.5}, {'name': 'Чай', 'price': 1.79}])
+        self.assertEqual(Order.objects.get(pk=order.pk).total_price, Decimal('10.29'))
+    
+    def test_api_create_uses_menu_prices(self):
+        """Тест создания через API с ценами меню"""
+        response = self.client.post('/api/orders/', data=json.dumps({
+            'table_number': 3, 'items': [{'menu_item_id': self.soup.id, 'quantity': 2}],
+        }), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get(pk=response.json()['id'])
+        self.assertEqual(order.total_price, Decimal('17.00'))
+        self.assertEqual(OrderLine.objects.get(order=order).menu_item_id, self.soup.id)
+    
+    def test_resave_without_item_changes(self):
+        """Тест: сохранение без изменения состава не пересчитывает итог и позиции"""
+        order = Order.objects.create(table_number=4, items=[{'name': 'Пирог', 'price': 3.1}])
+        order = Order.objects.get(pk=order.pk)
+        order.status = 'ready'
+        with CaptureQueriesContext(connection) as queries:
+            order.save()
+        self.assertFalse([query for query in queries if 'orders_orderline' in query['sql']])
+        
+        order.items.append({'name': 'Кофе', 'price': 2.2})
+        order.save()
+        order.refresh_from_db()
+        self.assertEqual(order.total_price, Decimal('5.30'))
+        self.assertEqual(OrderLine.objects.filter(order=order).count(), 2)
+        
+        order.items = [{'name': 'Кофе', 'price': 2.2}]
+        order.save(update_fields=['items'])
+        order.refresh_from_db()
+        self.assertEqual(order.total_price, Decimal('2.20'))
@@ -0,0 +1,39 @@
+from io import StringIO
+
+from django.core.cache import cache as django_cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+
+from orders.models import Order
+
+
+class QueryPlansTest(TestCase):
+    """Тесты команды check_query_plans"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        django_cache.clear()
+        Order.objects.create(table_number=1, items=[{'name': 'Чай', 'price': 2}], status='paid')
+    
+    def test_all_queries_use_indexes(self):
+        """Тест: ни один запрос API не читает таблицу заказов целиком"""
+        out = StringIO()
+        call_command('check_query_plans', stdout=out)
+        self.assertNotIn('полное чтение', out.getvalue())
+    
+    def test_missing_index_detected(self):
+        """Тест ошибки при удаленном индексе"""
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX orders_order_unpaid_idx')
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('check_query_plans', stdout=out)
+        self.assertIn('неоплаченные заказы для кухни: полное чтение orders_order', out.getvalue())
+    
+    def test_unpaid_filter(self):
+        """Тест фильтра неоплаченных заказов в API"""
+        waiting = Order.objects.create(table_number=2, items=[{'name': 'Суп', 'price': 5}])
+        response = self.client.get('/api/orders/?status=unpaid')
+        self.assertEqual([order['id'] for order in response.json()], [waiting.id])
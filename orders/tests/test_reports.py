@@ -0,0 +1,73 @@
+import json
+import unittest
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from orders import archive, reports
+from orders.models import Order
+
+
+class ReportsTest(TestCase):
+    """Тесты отчета за период"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.today = timezone.localdate()
+        self.day_from = self.today - timedelta(days=29)
+        old = timezone.make_aware(datetime.combine(self.today - timedelta(days=20), datetime.min.time()))
+        orders = [
+            Order.objects.create(table_number=1, items=[{'name': 'Суп', 'price': 5.5}] * 2, status='paid'),
+            Order.objects.create(table_number=1, items=[{'name': 'Чай', 'price': 2}], status='paid'),
+            Order.objects.create(table_number=2, items=[{'name': 'Суп', 'price': 5.5}, {'name': 'Плов', 'price': 20}], status='paid'),
+            Order.objects.create(table_number=2, items=[{'name': 'Плов', 'price': 20}], status='waiting'),
+        ]
+        Order.objects.filter(id=orders[0].id).update(created_at=old)
+        archive.archive_orders(old + timedelta(hours=1))
+    
+    def test_report(self):
+        """Тест группировок, перцентилей и топа блюд"""
+        report = reports.build_report(self.day_from, self.today, top=2, engine='python')
+        self.assertEqual(report['orders'], 4)
+        self.assertEqual(report['revenue'], 38.5)
+        self.assertEqual(report['by_status']['waiting'], {'orders': 1, 'revenue': 20.0})
+        self.assertEqual(report['by_table'], [
+            {'table_number': 1, 'orders': 2, 'revenue': 13.0, 'turnover': 0.07},
+            {'table_number': 2, 'orders': 1, 'revenue': 25.5, 'turnover': 0.03},
+        ])
+        self.assertEqual([row['orders'] for row in report['by_day']], [1, 2])
+        self.assertEqual(report['order_value_percentiles']['p50'], 11.0)
+        self.assertEqual(report['top_dishes'], [
+            {'dish': 'Плов', 'quantity': 1, 'revenue': 20.0},
+            {'dish': 'Суп', 'quantity': 3, 'revenue': 16.5},
+        ])
+    
+    @unittest.skipIf(reports.np is None, 'NumPy не установлен')
+    def test_numpy_matches_python(self):
+        """Тест: векторный расчет совпадает с расчетом на Python"""
+        expected = reports.build_report(self.day_from, self.today, engine='python')
+        # Маленькие порции: столбцы собираются из нескольких чтений по ключу
+        with mock.patch.object(reports, 'REPORT_CHUNK_SIZE', 2):
+            report = reports.build_report(self.day_from, self.today, engine='numpy')
+        self.assertEqual({**report, 'engine': 'python'}, expected)
+    
+    def test_api_and_command(self):
+        """Тест эндпоинта и команды orders_report"""
+        params = {'date_from': self.day_from.isoformat(), 'engine': 'python'}
+        response = self.client.get('/api/reports/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['revenue'], 38.5)
+        self.assertEqual(self.client.get('/api/reports/', {'date_from': 'вчера'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/reports/', {'date_from': '2024-02-30'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/reports/', {'date_to': '2024-13-01'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/reports/', {'engine': 'pandas'}).status_code, 400)
+        
+        out = StringIO()
+        call_command('orders_report', f'--date-from={self.day_from}', '--engine=python', stdout=out)
+        self.assertEqual(json.loads(out.getvalue())['top_dishes'], response.json()['top_dishes'])
+        with self.assertRaisesMessage(CommandError, 'Invalid date'):
+            call_command('orders_report', '--date-from=2024-02-30', stdout=StringIO())
@@ -0,0 +1,75 @@
+import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from orders import rollups
+from orders.models import DailyStatusRollup, Order
+
+
+class DailyStatusRollupTest(TestCase):
+    """Тесты инкрементальных агрегатов по дням и статусам"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.order1 = Order.objects.create(table_number=1, items=[{'name': 'Суп', 'price': 7.50}])
+        self.order2 = Order.objects.create(
+            table_number=2, items=[{'name': 'Стейк', 'price': 15.00}], status='paid'
+        )
+        self.today = timezone.localdate()
+    
+    def rollup_rows(self):
+        return {
+            (row.day, row.status): (row.order_count, row.revenue)
+            for row in DailyStatusRollup.objects.all()
+        }
+    
+    def test_rollup_follows_create_update_delete(self):
+        """Тест обновления агрегатов при создании, смене статуса и удалении заказа"""
+        self.assertEqual(self.rollup_rows(), {
+            (self.today, 'waiting'): (1, Decimal('7.50')),
+            (self.today, 'paid'): (1, Decimal('15.00')),
+        })
+        
+        # Смена статуса через update_fields, как в order_update_status
+        order = Order.objects.get(pk=self.order1.pk)
+        order.status = 'paid'
+        order.save(update_fields=['status'])
+        self.assertEqual(rollups.revenue(), Decimal('22.50'))
+        self.assertEqual(rollups.status_totals()['waiting'], (0, Decimal('0')))
+        
+        # Изменение состава оплаченного заказа меняет выручку
+        order.items = [{'name': 'Суп', 'price': 7.50}, {'name': 'Хлеб', 'price': 1.50}]
+        order.save()
+        self.assertEqual(rollups.revenue(), Decimal('24.00'))
+        
+        Order.objects.filter(pk=self.order2.pk).delete()
+        self.assertEqual(rollups.revenue(), Decimal('9.00'))
+        self.assertEqual(rollups.status_totals()['paid'], (1, Decimal('9.00')))
+    
+    def test_rebuild_command(self):
+        """Тест полного пересчета агрегатов командой rebuild_rollups"""
+        expected = self.rollup_rows()
+        DailyStatusRollup.objects.all().delete()
+        Order.objects.filter(pk=self.order1.pk).update(status='ready')
+        
+        call_command('rebuild_rollups', stdout=StringIO())
+        expected[(self.today, 'ready')] = expected.pop((self.today, 'waiting'))
+        self.assertEqual(self.rollup_rows(), expected)
+    
+    def test_revenue_date_range(self):
+        """Тест выручки за диапазон дней"""
+        yesterday = self.today - datetime.timedelta(days=1)
+        Order.objects.filter(pk=self.order2.pk).update(
+            created_at=timezone.now() - datetime.timedelta(days=1)
+        )
+        rollups.rebuild()
+        
+        self.assertEqual(rollups.revenue(date_from=self.today), Decimal('0'))
+        self.assertEqual(rollups.revenue(date_from=yesterday, date_to=yesterday), Decimal('15.00'))
+        
+        response = self.client.get(f'/api/revenue/?date_from={yesterday}&date_to={yesterday}')
+        self.assertEqual(response.json(), {'revenue': 15.0})
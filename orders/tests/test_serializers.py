@@ -0,0 +1,57 @@
+import json
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from orders import serializers
+from orders.models import MenuItem, Order
+
+
+class SerializersTest(TestCase):
+    """Тесты быстрой сериализации заказов и меню"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.order = Order.objects.create(
+            table_number=4,
+            items=[{'name': 'Суп', 'price': 7.5}, {'name': 'Суп', 'price': 7.5}, {'name': 'Чай', 'price': 2}],
+        )
+        MenuItem.objects.create(name='Морс', price='3.20', category='drink')
+    
+    def test_order_fields(self):
+        """Тест состава полей заказа"""
+        data = json.loads(serializers.dumps(serializers.serialize_orders(Order.objects.all())))
+        self.assertEqual(data, [{
+            'id': self.order.id,
+            'table_number': 4,
+            'items': self.order.items,
+            'status': 'waiting',
+            'total_price': 17.0,
+            'created_at': self.order.created_at.isoformat(),
+            'version': 1,
+        }])
+    
+    def test_stdlib_fallback_matches(self):
+        """Тест совпадения вывода без orjson"""
+        data = serializers.serialize_orders(Order.objects.all()) + serializers.serialize_menu(MenuItem.objects.all())
+        expected = json.loads(serializers.dumps(data))
+        with mock.patch.object(serializers, 'orjson', None):
+            self.assertEqual(json.loads(serializers.dumps(data)), expected)
+    
+    @override_settings(ORDERS_ITEMS_SOURCE='lines')
+    def test_items_from_lines(self):
+        """Тест чтения состава заказа из OrderLine"""
+        chunks = list(serializers.iter_order_chunks(Order.objects.all(), chunk_size=10))
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(chunks[0][0]['items'], self.order.items)
+    
+    def test_menu_category_display(self):
+        """Тест названия категории в ответе меню"""
+        data = serializers.serialize_menu(MenuItem.objects.all())
+        self.assertEqual(data[0]['category'], 'Напитки')
+        self.assertEqual(data[0]['price'], 3.2)
+    
+    def test_detail_not_found(self):
+        """Тест 404 для несуществующего заказа"""
+        response = self.client.get('/api/orders/999999/')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,97 @@
+import json
+from unittest import mock
+
+from django.core.cache import cache as django_cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from orders import events
+from orders.models import Order
+
+
+class BatchStatusApiTest(TestCase):
+    """Тесты пакетной смены статусов заказов"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        django_cache.clear()
+        self.url = '/api/orders/status/'
+        self.backend = events.LocalBackend()
+        patcher = mock.patch.object(events, '_backend', self.backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.waiting = Order.objects.create(table_number=1, items=[{'name': 'Суп', 'price': 5}])
+        self.ready = Order.objects.create(table_number=2, items=[{'name': 'Чай', 'price': 2}], status='ready')
+        self.paid = Order.objects.create(table_number=3, items=[{'name': 'Плов', 'price': 9}], status='paid')
+    
+    def post(self, updates):
+        return self.client.post(self.url, data=json.dumps({'updates': updates}), content_type='application/json')
+    
+    def test_batch_paid(self):
+        """Тест оплаты нескольких заказов с обновлением агрегатов и событий"""
+        self.assertEqual(self.client.get('/api/revenue/').json()['revenue'], 9.0)
+        subscription = self.backend.subscribe()
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post([
+                {'id': self.waiting.id, 'status': 'paid', 'version': 1},
+                {'id': self.ready.id, 'status': 'paid'},
+            ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updated'], 2)
+        self.assertEqual(response.json()['results'][0], {'id': self.waiting.id, 'status': 'paid', 'version': 2})
+        
+        self.waiting.refresh_from_db()
+        self.assertEqual((self.waiting.status, self.waiting.version), ('paid', 2))
+        self.assertEqual(self.client.get('/api/revenue/').json()['revenue'], 16.0)
+        self.assertEqual(self.client.get('/api/statistics/').json()['status_counts']['paid'], 3)
+        
+        received = [subscription.get(timeout=1) for _ in range(2)]
+        self.assertEqual({event['type'] for event in received}, {events.ORDER_STATUS_CHANGED})
+    
+    def test_version_conflict(self):
+        """Тест отказа при устаревшей версии заказа"""
+        self.waiting.status = 'ready'
+        self.waiting.save(update_fields=['status'])
+        self.assertEqual(self.waiting.version, 2)
+        
+        response = self.post([{'id': self.waiting.id, 'status': 'paid', 'version': 1}])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['results'][0]['error'], 'conflict')
+        self.waiting.refresh_from_db()
+        self.assertEqual(self.waiting.status, 'ready')
+    
+    def test_transitions(self):
+        """Тест допустимых переходов и повтора запроса"""
+        response = self.post([
+            {'id': self.paid.id, 'status': 'waiting'},
+            {'id': self.ready.id, 'status': 'ready'},
+            {'id': self.waiting.id, 'status': 'ready'},
+            {'id': 999999, 'status': 'paid'},
+        ])
+        self.assertEqual(response.status_code, 207)
+        results = response.json()['results']
+        self.assertEqual(results[0]['error'], 'invalid_transition')
+        self.assertTrue(results[1]['unchanged'])
+        self.assertEqual(results[2]['status'], 'ready')
+        self.assertEqual(results[3]['error'], 'not_found')
+        self.paid.refresh_from_db()
+        self.assertEqual(self.paid.status, 'paid')
+    
+    def test_invalid_body(self):
+        """Тест некорректного тела запроса"""
+        self.assertEqual(self.post([]).status_code, 400)
+        self.assertEqual(self.post([{'id': self.waiting.id, 'status': 'done'}]).status_code, 400)
+        response = self.client.post(self.url, data='not json', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_save_bumps_version_lazily(self):
+        """Тест: сохранение статуса увеличивает версию в БД без лишнего SELECT, значение читается при обращении"""
+        order = Order.objects.get(id=self.waiting.id)
+        with CaptureQueriesContext(connection) as queries:
+            order.status = 'ready'
+            order.save(update_fields=['status'])
+        self.assertFalse([query for query in queries if query['sql'].startswith('SELECT "orders_order"')])
+        with self.assertNumQueries(1):
+            self.assertEqual(order.version, 2)
@@ -0,0 +1,75 @@
+import json
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from orders.models import Order, TableState
+
+
+class TableStateTest(TestCase):
+    """Тесты состояния столов и /api/tables/"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        self.soup = Order.objects.create(table_number=1, items=[{'name': 'Суп', 'price': 7.50}])
+        self.tea = Order.objects.create(table_number=1, items=[{'name': 'Чай', 'price': 2}], status='ready')
+        self.steak = Order.objects.create(table_number=2, items=[{'name': 'Стейк', 'price': 15}], status='paid')
+    
+    def table(self, table_number):
+        return self.client.get(f'/api/tables/{table_number}/').json()
+    
+    def test_state_follows_orders(self):
+        """Тест обновления состояния при создании, смене статуса, переносе и удалении заказа"""
+        state = TableState.objects.get(table_number=1)
+        self.assertEqual(state.unpaid_total, Decimal('9.50'))
+        self.assertEqual(state.oldest_waiting_at, Order.objects.get(pk=self.soup.pk).created_at)
+        self.assertFalse(TableState.objects.filter(table_number=2).exists())
+        
+        order = Order.objects.get(pk=self.soup.pk)
+        order.status = 'paid'
+        order.save(update_fields=['status'])
+        self.assertEqual(self.table(1)['open_orders'], [self.tea.id])
+        self.assertIsNone(self.table(1)['oldest_waiting_at'])
+        
+        # Перенос заказа за другой стол
+        order = Order.objects.get(pk=self.tea.pk)
+        order.table_number = 3
+        order.save()
+        self.assertFalse(TableState.objects.filter(table_number=1).exists())
+        self.assertEqual(self.table(3)['unpaid_total'], 2.0)
+        
+        order.delete()
+        self.assertFalse(TableState.objects.exists())
+        self.assertEqual(self.table(3), {
+            'table_number': 3, 'open_orders': [], 'unpaid_total': 0.0, 'oldest_waiting_at': None,
+        })
+    
+    def test_batch_status_updates_state(self):
+        """Тест обновления состояния пакетной сменой статусов"""
+        response = self.client.post(
+            '/api/orders/status/',
+            data=json.dumps({'updates': [{'id': self.soup.id, 'status': 'paid'}, {'id': self.tea.id, 'status': 'paid'}]}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(TableState.objects.exists())
+    
+    def test_list_does_not_read_orders(self):
+        """Тест списка столов одним запросом к TableState"""
+        Order.objects.create(table_number=5, items=[{'name': 'Плов', 'price': 9}])
+        with self.assertNumQueries(1):
+            data = self.client.get('/api/tables/').json()
+        self.assertEqual([table['table_number'] for table in data], [1, 5])
+        self.assertEqual(data[0]['open_orders'], [self.soup.id, self.tea.id])
+        self.assertEqual(data[0]['unpaid_total'], 9.5)
+    
+    def test_rebuild_command(self):
+        """Тест восстановления состояния командой rebuild_table_state"""
+        expected = self.client.get('/api/tables/').json()
+        TableState.objects.all().delete()
+        TableState.objects.create(table_number=9, open_orders={'999': {}})
+        
+        call_command('rebuild_table_state', stdout=StringIO())
+        self.assertEqual(self.client.get('/api/tables/').json(), expected)
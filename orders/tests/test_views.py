@@ -1,5 +1,8 @@
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from orders import events
 from orders.models import Order
 import json
 
@@ -32,7 +35,20 @@ class OrderViewsTest(TestCase):
         self.assertTemplateUsed(response, 'orders/order_list.html')
         self.assertContains(response, 'Список заказов')
         self.assertContains(response, 'Стол №5')
+    
+    def test_kitchen_board(self):
+        """Тест табло кухни: только неоплаченные заказы и подписка на события"""
+        paid = Order.objects.create(table_number=3, items=[], status='paid')
+        response = self.client.get(reverse('kitchen_board'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([order.id for order in response.context['orders']], [self.order.id])
+        self.assertNotContains(response, f'Заказ #{paid.id}<')
+        self.assertContains(response, 'EventSource')
+        self.assertContains(response, f'?last_event_id={events.get_backend().last_id()}')
         
+        # Общий список заказов не держит открытый поток событий
+        self.assertNotContains(self.client.get(self.list_url), 'EventSource')
+    
     def test_order_list_view_with_filters(self):
         """Тест представления списка заказов с фильтрами"""
         # Создаем дополнительные заказы для тестирования фильтров
@@ -54,6 +70,31 @@ class OrderViewsTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.context['orders']), 1)
     
+    def test_order_list_keyset_navigation(self):
+        """Тест навигации "новее/старше" без COUNT(*)"""
+        orders = [self.order] + [Order.objects.create(table_number=7, items=[]) for _ in range(25)]
+        ids = sorted((order.id for order in orders), reverse=True)
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.list_url)
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+        self.assertEqual([order.id for order in response.context['orders']], ids[:12])
+        self.assertIsNone(response.context['newer_query'])
+        
+        response = self.client.get(f"{self.list_url}?{response.context['older_query']}")
+        self.assertEqual([order.id for order in response.context['orders']], ids[12:24])
+        
+        older = self.client.get(f"{self.list_url}?{response.context['older_query']}")
+        self.assertEqual([order.id for order in older.context['orders']], ids[24:])
+        self.assertIsNone(older.context['older_query'])
+        
+        newer = self.client.get(f"{self.list_url}?{response.context['newer_query']}")
+        self.assertEqual([order.id for order in newer.context['orders']], ids[:12])
+        
+        # Фильтры сохраняются в ссылках навигации
+        response = self.client.get(f"{self.list_url}?table_number=7")
+        self.assertIn('table_number=7', response.context['older_query'])
+    
     def test_order_create_view_get(self):
         """Тест GET-запроса к представлению создания заказа"""
         response = self.client.get(self.create_url)
@@ -0,0 +1,154 @@
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache as django_cache
+from django.test import TestCase, override_settings
+
+from orders import metrics, writebehind
+from orders.models import DailyStatusRollup, Order
+
+
+class WriteBehindTest(TestCase):
+    """Тесты отложенной записи статусов"""
+    
+    def setUp(self):
+        """Настройка тестовых данных"""
+        django_cache.clear()
+        self.directory = Path(tempfile.mkdtemp())
+        self.journal = self.directory / 'status.log'
+        self.first = Order.objects.create(table_number=1, items=[{'name': 'Чай', 'price': 2}])
+        self.second = Order.objects.create(table_number=2, items=[{'name': 'Кофе', 'price': 3}])
+    
+    def tearDown(self):
+        writebehind.shutdown()
+        shutil.rmtree(self.directory)
+    
+    def make_queue(self, max_size=100):
+        # Поток записи не успеет сработать: пачки записываются вызовом flush() в тесте
+        return writebehind.StatusQueue(self.journal, interval=3600, max_size=max_size)
+    
+    def test_coalesce_and_flush(self):
+        """Тест: для заказа записывается последний статус, все изменения - одной пачкой"""
+        queue = self.make_queue()
+        self.assertEqual(queue.journal_path, self.directory / f'status.log.{os.getpid()}')
+        with mock.patch.object(writebehind.os, 'fsync', wraps=os.fsync) as fsync:
+            queue.submit(self.first.id, 'ready', 1)
+        fsync.assert_called_once()
+        queue.submit(self.first.id, 'paid', 1)
+        queue.submit(self.second.id, 'ready', 1)
+        queue.submit(999, 'paid', 1)
+        self.assertEqual(len(queue.journal_path.read_text().splitlines()), 4)
+        
+        self.assertEqual(queue.flush(), 2)
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual((self.first.status, self.first.version), ('paid', 2))
+        self.assertEqual(self.second.status, 'ready')
+        # Агрегаты обновлены той же пачкой
+        self.assertEqual(DailyStatusRollup.objects.get(status='paid').order_count, 1)
+        self.assertEqual(queue.journal_path.read_text(), '')
+        self.assertEqual(queue.flush(), 0)
+        queue.stop()
+        # Пустой журнал удаляется при остановке
+        self.assertFalse(queue.journal_path.exists())
+        
+        text = metrics.render_prometheus()
+        self.assertIn('orders_status_queue_depth 0', text)
+        self.assertIn('orders_status_flush_duration_seconds_count', text)
+    
+    def test_replay_journal(self):
+        """Тест: изменения из журналов завершившихся процессов записываются первой пачкой"""
+        dead = self.directory / 'status.log.1111'
+        flushing = dead.with_name(dead.name + '.flushing')
+        flushing.write_text(json.dumps([self.first.id, 'ready', 1]) + '\n')
+        os.utime(flushing, ns=(0, 0))
+        dead.write_text(
+            json.dumps([self.first.id, 'paid', 1]) + '\n' + json.dumps([self.second.id, 'ready', 1]) + '\n["obrez'
+        )
+        # Журнал живого воркера не трогается
+        alive = self.directory / 'status.log.2222'
+        alive.write_text(json.dumps([self.second.id, 'paid', 1]) + '\n')
+        
+        with mock.patch.object(writebehind, '_process_alive', side_effect=lambda pid: pid == 2222):
+            queue = self.make_queue()
+        self.assertFalse(dead.exists())
+        self.assertFalse(flushing.exists())
+        self.assertEqual(len(queue.journal_path.read_text().splitlines()), 2)
+        self.assertEqual(alive.read_text(), json.dumps([self.second.id, 'paid', 1]) + '\n')
+        self.assertEqual(queue.flush(), 2)
+        self.assertEqual(Order.objects.get(id=self.first.id).status, 'paid')
+        self.assertEqual(Order.objects.get(id=self.second.id).status, 'ready')
+        queue.stop()
+        self.assertEqual(sorted(path.name for path in self.directory.iterdir()), ['status.log.2222'])
+    
+    def test_stale_status_skipped(self):
+        """Тест: статус из очереди не перезаписывает изменение, сделанное после его приема"""
+        queue = self.make_queue()
+        queue.submit(self.first.id, 'ready', 1)
+        queue.submit(self.second.id, 'ready', 1)
+        # Заказ оплачен формой, пока статус 'ready' ждал в очереди
+        self.first.status = 'paid'
+        self.first.save(update_fields=['status'])
+        
+        self.assertEqual(queue.flush(), 1)
+        self.assertEqual(Order.objects.get(id=self.first.id).status, 'paid')
+        self.assertEqual(Order.objects.get(id=self.second.id).status, 'ready')
+        self.assertEqual(DailyStatusRollup.objects.get(status='paid').order_count, 1)
+        self.assertIn('orders_status_stale_total', metrics.render_prometheus())
+        queue.stop()
+    
+    def test_replay_applied_batch(self):
+        """Тест: пачка, зафиксированная перед сбоем, при повторе не откатывает более поздний статус"""
+        writebehind.apply_statuses({self.first.id: ('ready', 1)})
+        # Процесс упал до удаления .flushing, а заказ тем временем оплатили
+        flushing = self.directory / 'status.log.1111.flushing'
+        flushing.write_text(json.dumps([self.first.id, 'ready', 1]) + '\n')
+        Order.objects.filter(id=self.first.id).update(status='paid', version=3)
+        
+        with mock.patch.object(writebehind, '_process_alive', return_value=False):
+            queue = self.make_queue()
+        self.assertEqual(queue.flush(), 0)
+        self.assertEqual(Order.objects.get(id=self.first.id).status, 'paid')
+        queue.stop()
+    
+    def test_failed_flush_keeps_batch(self):
+        """Тест: при ошибке записи пачка остается в очереди и журнале"""
+        queue = self.make_queue()
+        queue.submit(self.first.id, 'ready', 1)
+        with mock.patch.object(writebehind, 'apply_statuses', side_effect=RuntimeError('database is locked')):
+            with self.assertRaises(RuntimeError):
+                queue.flush()
+        self.assertEqual(json.loads(queue.journal_path.read_text()), [self.first.id, 'ready', 1])
+        self.assertEqual(queue.flush(), 1)
+        queue.stop()
+    
+    def test_queue_full(self):
+        """Тест: при заполненной очереди новый заказ не принимается"""
+        queue = self.make_queue(max_size=1)
+        self.assertTrue(queue.submit(self.first.id, 'ready', 1))
+        self.assertTrue(queue.submit(self.first.id, 'paid', 1))
+        self.assertFalse(queue.submit(self.second.id, 'ready', 1))
+        queue.stop()
+    
+    def test_patch_accepted(self):
+        """Тест PATCH в режиме write-behind: 202 сразу, статус в БД после записи пачки"""
+        with override_settings(
+            ORDERS_STATUS_WRITE_BEHIND=True, ORDERS_STATUS_JOURNAL_PATH=self.journal,
+            ORDERS_STATUS_FLUSH_INTERVAL_MS=3600 * 1000,
+        ):
+            response = self.client.patch(
+                f'/api/orders/{self.first.id}/', data=json.dumps({'status': 'paid'}), content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(Order.objects.get(id=self.first.id).status, 'waiting')
+            writebehind.get_queue().flush()
+        self.assertEqual(Order.objects.get(id=self.first.id).status, 'paid')
+        
+        response = self.client.patch(
+            f'/api/orders/{self.second.id}/', data=json.dumps({'status': 'paid'}), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,72 @@
+"""Учет изменений заказов для производных структур (агрегатов и т.п.).
+
+Одиночные сохранения и удаления приходят сюда через сигналы (orders.signals),
+массовые операции (bulk_create, QuerySet.update) вызывают track_order_changes сами.
+"""
+from collections import namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from decimal import Decimal
+
+from django.utils import timezone
+
+_suspended = ContextVar('orders_tracking_suspended', default=False)
+
+
+class OrderState(namedtuple('OrderState', 'id table_number status total_price created_at')):
+    """Снимок заказа, достаточный для пересчета производных структур"""
+    __slots__ = ()
+    
+    FIELDS = frozenset(('table_number', 'status', 'total_price', 'created_at'))
+    
+    @classmethod
+    def of(cls, order):
+        return cls(
+            order.pk,
+            order.table_number,
+            order.status,
+            Decimal(str(order.total_price or 0)),
+            order.created_at,
+        )
+    
+    @property
+    def day(self):
+        created_at = self.created_at or timezone.now()
+        if timezone.is_aware(created_at):
+            return timezone.localdate(created_at)
+        return created_at.date()
+
+
+def track_order_changes(changes):
+    """Применяет изменения заказов к производным структурам.
+    
+    changes - итерируемое пар (старое состояние, новое состояние); None означает,
+    что заказа не было (создание) или больше нет (удаление). Вызывается внутри
+    транзакции, изменившей сами заказы.
+    """
+    from . import cache, events, rollups, tables
+    
+    if _suspended.get():
+        return
+    changes = [(old, new) for old, new in changes if old != new]
+    if not changes:
+        return
+    rollups.apply_order_changes(changes)
+    tables.apply_order_changes(changes)
+    cache.bump(cache.REVENUE, cache.STATISTICS)
+    cache.bump_days(cache.ANALYTICS, {state.day for pair in changes for state in pair if state is not None})
+    events.publish_order_changes(changes)
+
+
+@contextmanager
+def suspended():
+    """Отключает учет изменений внутри блока.
+    
+    Используется при переносе заказов в архив: заказ продолжает учитываться
+    в агрегатах и не считается удаленным для подписчиков событий.
+    """
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
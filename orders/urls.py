@@ -3,14 +3,23 @@ from . import views
 
 urlpatterns = [
     path('', views.order_list, name='order_list'),
+    path('kitchen/', views.kitchen_board, name='kitchen_board'),
     path('create/', views.order_create, name='order_create'),
     path('delete/<int:order_id>/', views.order_delete, name='order_delete'),
     path('update-status/<int:order_id>/', views.order_update_status, name='order_update_status'),
     
     # API endpoints
     path('api/orders/', views.orders_api_list, name='orders_api_list'),
+    path('api/orders/events/', views.order_events_stream, name='orders_api_events'),
+    path('api/orders/bulk/', views.orders_api_bulk, name='orders_api_bulk'),
+    path('api/orders/status/', views.orders_api_status, name='orders_api_status'),
+    path('api/orders/export/', views.orders_api_export, name='orders_api_export'),
     path('api/orders/<int:order_id>/', views.orders_api_detail, name='orders_api_detail'),
     path('api/menu/', views.menu_list_api, name='menu_list_api'),
     path('api/revenue/', views.revenue_api, name='revenue_api'),
     path('api/statistics/', views.statistics_api, name='statistics_api'),
+    path('api/analytics/', views.analytics_api, name='analytics_api'),
+    path('api/reports/', views.reports_api, name='reports_api'),
+    path('api/tables/', views.tables_api_list, name='tables_api_list'),
+    path('api/tables/<int:table_number>/', views.tables_api_detail, name='tables_api_detail'),
 ]
@@ -1,16 +1,61 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
-from django.db.models import Sum, Q, Count
+from django.db.models import Sum, Q, F
 from django.views.decorators.http import require_http_methods
-from django.http import JsonResponse
-from django.core.paginator import Paginator
-from django.views.decorators.cache import cache_page
-from django.utils.decorators import method_decorator
-from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.db import transaction
+from django.core.handlers.asgi import ASGIRequest
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from urllib.parse import urlencode
 import json
+import queue
+
+from asgiref.sync import sync_to_async
+
+from .models import UNPAID_STATUS, ArchivedOrder, Order, OrderLine, TableState
+from .forms import OrderForm, clean_order_payload
+from .tracking import OrderState, track_order_changes
+from . import analytics, cache, events, export, menu, metrics, reports, rollups, serializers, tables, writebehind
+from .idempotency import idempotent
+
+# Размер страницы HTML-списка заказов
+ORDER_LIST_PAGE_SIZE = 12
+
+
+def _parse_cursor(value):
+    """Курсор навигации по списку (id заказа), None если не задан или некорректен"""
+    return int(value) if value and value.isdigit() else None
+
+
+def _keyset_page(orders_query, before=None, after=None, size=ORDER_LIST_PAGE_SIZE):
+    """Страница заказов от новых к старым без OFFSET и COUNT(*).
+    
+    before - показать заказы старше указанного id, after - новее.
+    Возвращает (заказы, курсор для "Новее" или None, курсор для "Старше" или None).
+    """
+    if after is not None:
+        page = list(orders_query.filter(id__gt=after).order_by('id')[:size + 1])
+        if len(page) > size:
+            page = page[:size][::-1]
+            return page, page[0].id, page[-1].id
+        # Дошли до самых новых заказов - показываем полную первую страницу
+        before = None
+    
+    if before is not None:
+        orders_query = orders_query.filter(id__lt=before)
+    page = list(orders_query.order_by('-id')[:size + 1])
+    has_older = len(page) > size
+    page = page[:size]
+    newer = page[0].id if before is not None and page else None
+    older = page[-1].id if has_older else None
+    return page, newer, older
 
-from .models import Order, MenuItem
-from .forms import OrderForm
 
 def order_list(request):
     # Получаем параметры фильтрации из запроса
@@ -18,7 +63,7 @@ def order_list(request):
     status = request.GET.get('status')
     
     # Начинаем с полного набора заказов
-    orders_query = Order.objects.all().order_by('-id')
+    orders_query = Order.objects.all()
     
     # Применяем фильтры, если они указаны
     if table_number:
@@ -26,13 +71,18 @@ def order_list(request):
     if status:
         orders_query = orders_query.filter(status=status)
     
-    # Добавляем пагинацию
-    paginator = Paginator(orders_query, 12)  # Показываем по 12 заказов на странице
-    page_number = request.GET.get('page')
-    orders = paginator.get_page(page_number)
+    # Навигация "новее/старше" по id: время отрисовки не зависит от размера таблицы
+    orders, newer, older = _keyset_page(
+        orders_query,
+        before=_parse_cursor(request.GET.get('before')),
+        after=_parse_cursor(request.GET.get('after')),
+    )
+    filters = {key: value for key, value in (('table_number', table_number), ('status', status)) if value}
     
     return render(request, 'orders/order_list.html', {
         'orders': orders,
+        'newer_query': urlencode({**filters, 'after': newer}) if newer is not None else None,
+        'older_query': urlencode({**filters, 'before': older}) if older is not None else None,
         'status_choices': Order.STATUS_CHOICES,
         'current_filters': {
             'table_number': table_number,
@@ -40,8 +90,21 @@ def order_list(request):
         }
     })
 
+# Табло кухни: неоплаченные заказы, обновляется по событиям заказов
+KITCHEN_BOARD_SIZE = 100
+
+
+def kitchen_board(request):
+    # id последнего события читается до заказов: события, опубликованные после
+    # отрисовки, табло получит при подключении к потоку (?last_event_id=)
+    last_event_id = events.get_backend().last_id()
+    # Неоплаченные заказы читаются по частичному индексу orders_order_unpaid_idx
+    orders = list(Order.objects.exclude(status='paid').order_by('id')[:KITCHEN_BOARD_SIZE])
+    return render(request, 'orders/kitchen_board.html', {'orders': orders, 'last_event_id': last_event_id})
+
 def order_create(request):
-    menu_items = MenuItem.objects.filter(is_available=True)
+    # Доступные блюда берутся из снимка меню, без запроса к MenuItem
+    menu_items = menu.get_snapshot().available
     
     if request.method == 'POST':
         form = OrderForm(request.POST)
@@ -91,25 +154,143 @@ def order_update_status(request, order_id):
 
 # API endpoints для тестов
 
-# API для списка заказов и создания нового заказа
+# Параметры курсорной пагинации и потоковой выдачи списка заказов
+API_PAGE_SIZE_DEFAULT = 100
+API_PAGE_SIZE_MAX = 1000
+API_STREAM_CHUNK_SIZE = 2000
+API_STREAM_FORMATS = ('json', 'ndjson')
+
+
+def _parse_non_negative_int(value, name, default=None):
+    """Разбирает целочисленный параметр запроса, ValueError при ошибке"""
+    if value in (None, ''):
+        return default
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Parameter '{name}' must be an integer")
+    if number < 0:
+        raise ValueError(f"Parameter '{name}' must be non-negative")
+    return number
+
+
+def _parse_positive_int(value, name, default=None):
+    """Как _parse_non_negative_int, но 0 тоже ошибка"""
+    number = _parse_non_negative_int(value, name, default)
+    if number == 0:
+        raise ValueError(f"Parameter '{name}' must be positive")
+    return number
+
+
+async def _aiterate(chunks):
+    """Асинхронная обертка синхронного генератора: каждая порция читается в потоке запроса"""
+    next_chunk = sync_to_async(next)
+    try:
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
+
+
+def _streaming_response(request, chunks, **kwargs):
+    """Потоковый ответ из синхронного генератора.
+    
+    Под ASGI Django читает синхронный итератор целиком перед отправкой, поэтому
+    там поток отдается через асинхронную обертку.
+    """
+    if isinstance(request, ASGIRequest):
+        chunks = _aiterate(chunks)
+    return StreamingHttpResponse(chunks, **kwargs)
+
+
+def _accepts_gzip(request):
+    """Разрешает ли Accept-Encoding ответ в gzip.
+    
+    Учитываются q-значения: "gzip;q=0" - явный отказ. Если gzip не указан,
+    решает "*".
+    """
+    qualities = {}
+    for coding in request.headers.get('Accept-Encoding', '').split(','):
+        name, _, params = coding.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name] = quality
+    for name in ('gzip', 'x-gzip', '*'):
+        if name in qualities:
+            return qualities[name] > 0
+    return False
+
+
+def _stream_orders(orders_query, stream_format):
+    """Генератор JSON/NDJSON-ответа: строки читаются с сервера порциями"""
+    chunks = serializers.iter_order_chunks(orders_query, API_STREAM_CHUNK_SIZE)
+    
+    if stream_format == 'ndjson':
+        for chunk in chunks:
+            yield b'\n'.join(map(serializers.dumps, chunk)) + b'\n'
+        return
+    
+    # Массив JSON собираем по частям, не держа весь список в памяти
+    yield b'['
+    first = True
+    for chunk in chunks:
+        yield (b'' if first else b',') + b','.join(map(serializers.dumps, chunk))
+        first = False
+    yield b']'
+
+
+def _build_order(payload):
+    """Заказ (без сохранения) из clean_order_payload: итог уже посчитан orders.pricing"""
+    order = Order(table_number=payload['table_number'], status=payload['status'])
+    order.set_items(payload['items'], payload['total_price'])
+    return order
+
+
+def _create_order(request):
+    """Создание заказа из JSON-тела POST (синхронный и асинхронный API)"""
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    # Те же правила и разбор состава заказа, что у формы и массового создания
+    payload, errors = clean_order_payload(data)
+    if errors:
+        return JsonResponse({"errors": errors}, status=400)
+    new_order = _build_order(payload)
+    new_order.save()
+    return JsonResponse({"id": new_order.id}, status=201)  # Возвращаем 201 Created
+
+
+# API для списка заказов и создания нового заказа (повтор POST с Idempotency-Key не создает дубль)
+@idempotent
 def orders_api_list(request):
     # POST - создание нового заказа
     if request.method == 'POST':
-        try:
-            data = json.loads(request.body)
-            new_order = Order.objects.create(
-                table_number=data.get('table_number'),
-                items=data.get('items', []),
-                status=data.get('status', 'waiting')
-            )
-            return JsonResponse({"id": new_order.id}, status=201)  # Возвращаем 201 Created
-        except json.JSONDecodeError:
-            return JsonResponse({"error": "Invalid JSON"}, status=400)
+        return _create_order(request)
     
     # GET - получение списка заказов
     # Получаем параметры фильтрации из запроса
     table_number = request.GET.get('table_number')
     status = request.GET.get('status')
+    stream_format = request.GET.get('stream')
+    
+    try:
+        after = _parse_non_negative_int(request.GET.get('after'), 'after')
+        limit = _parse_positive_int(request.GET.get('limit'), 'limit')
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    
+    if stream_format and stream_format not in API_STREAM_FORMATS:
+        return JsonResponse({"error": "Parameter 'stream' must be 'json' or 'ndjson'"}, status=400)
     
     # Начинаем с полного набора заказов
     orders_query = Order.objects.all().order_by('id')  # Сортировка по id для соответствия тестам
@@ -117,45 +298,331 @@ def orders_api_list(request):
     # Применяем фильтры, если они указаны
     if table_number:
         orders_query = orders_query.filter(table_number=table_number)
-    if status:
+    if status == UNPAID_STATUS:
+        # Неоплаченные заказы для кухни (частичный индекс orders_order_unpaid_idx)
+        orders_query = orders_query.exclude(status='paid')
+    elif status:
         orders_query = orders_query.filter(status=status)
     
-    # Преобразуем в JSON
-    data = [
-        {
-            "id": order.id,
-            "table_number": order.table_number,
-            "items": order.items,
-            "status": order.status,
-            "total_price": float(order.total_price),
-            "created_at": order.created_at.isoformat() if hasattr(order, 'created_at') else None,
+    # Курсор по id: следующая страница начинается строго после последнего выданного заказа
+    if after is not None:
+        orders_query = orders_query.filter(id__gt=after)
+    
+    # Потоковая выдача: память не зависит от размера таблицы
+    if stream_format:
+        content_type = 'application/x-ndjson' if stream_format == 'ndjson' else 'application/json'
+        return _streaming_response(request, _stream_orders(orders_query, stream_format), content_type=content_type)
+    
+    # Постраничная выдача по ключу (keyset): без OFFSET и без COUNT(*)
+    if limit is not None or after is not None:
+        limit = min(API_PAGE_SIZE_DEFAULT if limit is None else limit, API_PAGE_SIZE_MAX)
+        # Берем на одну строку больше, чтобы понять, есть ли следующая страница
+        page = serializers.serialize_orders(orders_query[:limit + 1])
+        has_next = len(page) > limit
+        page = page[:limit]
+        with metrics.measure_serialization():
+            return serializers.JSONBytesResponse({
+                "results": page,
+                "next_after": page[-1]["id"] if has_next else None,
+            })
+    
+    # Преобразуем в JSON (выборку читаем заранее, чтобы не смешивать время БД и сериализации)
+    data = serializers.serialize_orders(orders_query)
+    with metrics.measure_serialization():
+        return serializers.JSONBytesResponse(data)
+
+# Потоковая выгрузка заказов для бухгалтерии (см. orders.export)
+@require_http_methods(["GET"])
+def orders_api_export(request):
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in export.EXPORT_FORMATS:
+        return JsonResponse({"error": "Parameter 'format' must be 'csv' or 'ndjson'"}, status=400)
+    
+    try:
+        filters = {
+            'date_from': export.parse_bound(request.GET.get('date_from'), 'date_from'),
+            'date_to': export.parse_bound(request.GET.get('date_to'), 'date_to', end=True),
+            'after': _parse_non_negative_int(request.GET.get('after'), 'after'),
+        }
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    
+    status = request.GET.get('status')
+    if status and status != UNPAID_STATUS and status not in dict(Order.STATUS_CHOICES):
+        return JsonResponse({"error": "Invalid status"}, status=400)
+    
+    lines = request.GET.get('lines') in ('1', 'true')
+    compress = _accepts_gzip(request)
+    response = _streaming_response(
+        request,
+        export.export_stream(export_format, lines=lines, compress=compress, status=status, **filters),
+        content_type=export.CONTENT_TYPES[export_format],
+    )
+    response['Content-Disposition'] = f'attachment; filename="orders.{export_format}"'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    if compress:
+        response['Content-Encoding'] = 'gzip'
+    return response
+
+# Ограничения массового создания заказов
+BULK_MAX_ORDERS = 10000
+BULK_BATCH_SIZE = 500
+
+
+def _parse_bulk_body(request):
+    """Разбирает тело массового запроса: JSON-массив или NDJSON.
+    
+    Возвращает список пар (заказ или None, ошибка разбора или None).
+    """
+    body = request.body.decode('utf-8')
+    if request.content_type != 'application/x-ndjson' and body.lstrip().startswith('['):
+        payloads = json.loads(body)
+        return [(payload, None) for payload in payloads]
+    
+    entries = []
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        try:
+            entries.append((json.loads(line), None))
+        except json.JSONDecodeError:
+            entries.append((None, {'__all__': ['Invalid JSON']}))
+    return entries
+
+
+# API для массового создания заказов (повтор заказов кассой после обрыва связи)
+@require_http_methods(["POST"])
+@idempotent
+def orders_api_bulk(request):
+    try:
+        entries = _parse_bulk_body(request)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    
+    if not entries:
+        return JsonResponse({"error": "No orders to create"}, status=400)
+    if len(entries) > BULK_MAX_ORDERS:
+        return JsonResponse({"error": f"Too many orders (max {BULK_MAX_ORDERS})"}, status=413)
+    
+    # Проверка и расчет итогов за один проход, без Order.save() на каждый заказ
+    results = []
+    new_orders = []
+    for index, (payload, error) in enumerate(entries):
+        if error is None:
+            payload, error = clean_order_payload(payload)
+        if error:
+            results.append({"index": index, "errors": error})
+            continue
+        new_orders.append((index, _build_order(payload)))
+        results.append(None)
+    
+    if new_orders:
+        orders = [order for _, order in new_orders]
+        with transaction.atomic():
+            Order.objects.bulk_create(orders, batch_size=BULK_BATCH_SIZE)
+            OrderLine.objects.bulk_create(OrderLine.build_for_orders(orders), batch_size=BULK_BATCH_SIZE)
+            track_order_changes((None, OrderState.of(order)) for order in orders)
+        for index, order in new_orders:
+            results[index] = {"index": index, "id": order.id}
+    
+    created = len(new_orders)
+    if created == len(results):
+        status = 201
+    elif created:
+        status = 207  # Multi-Status: часть заказов отклонена
+    else:
+        status = 400
+    return JsonResponse({"created": created, "results": results}, status=status)
+
+# Ограничение пакетной смены статусов
+STATUS_BATCH_MAX = 1000
+
+
+def _parse_status_updates(data):
+    """Разбирает тело пакетной смены статусов.
+    
+    Формат: {"updates": [{"id": 1, "status": "paid", "version": 3}, ...]}, version
+    необязателен. Возвращает список (id, статус, версия или None), ValueError при ошибке.
+    """
+    updates = data.get('updates') if isinstance(data, dict) else None
+    if not isinstance(updates, list) or not updates:
+        raise ValueError("Field 'updates' must be a non-empty list")
+    if len(updates) > STATUS_BATCH_MAX:
+        raise ValueError(f"Too many updates (max {STATUS_BATCH_MAX})")
+    
+    parsed = []
+    seen = set()
+    for update in updates:
+        if not isinstance(update, dict):
+            raise ValueError("Each update must be an object")
+        order_id, status, version = update.get('id'), update.get('status'), update.get('version')
+        if not isinstance(order_id, int) or isinstance(order_id, bool):
+            raise ValueError("Field 'id' must be an integer")
+        if status not in Order.ALLOWED_TRANSITIONS:
+            raise ValueError(f"Invalid status for order {order_id}")
+        if version is not None and (not isinstance(version, int) or isinstance(version, bool)):
+            raise ValueError(f"Field 'version' must be an integer for order {order_id}")
+        if order_id in seen:
+            raise ValueError(f"Duplicate order {order_id}")
+        seen.add(order_id)
+        parsed.append((order_id, status, version))
+    return parsed
+
+
+# API для пакетной смены статусов (например, оплата всех заказов при закрытии смены)
+@require_http_methods(["POST"])
+def orders_api_status(request):
+    try:
+        updates = _parse_status_updates(json.loads(request.body))
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    
+    results = []
+    changes = []
+    with transaction.atomic():
+        # Строки блокируются до конца транзакции (в SQLite - вся база режимом IMMEDIATE),
+        # поэтому проверка версии и UPDATE не разделены чужой записью
+        current = {
+            row[0]: row
+            for row in Order.objects.select_for_update()
+            .filter(id__in=[order_id for order_id, _, _ in updates])
+            .values_list('id', 'table_number', 'status', 'total_price', 'created_at', 'version')
         }
-        for order in orders_query
-    ]
+        
+        groups = defaultdict(list)
+        for order_id, status, version in updates:
+            row = current.get(order_id)
+            if row is None:
+                results.append({"id": order_id, "error": "not_found"})
+            elif version is not None and version != row[5]:
+                results.append({"id": order_id, "error": "conflict", "version": row[5], "status": row[2]})
+            elif status == row[2]:
+                # Повтор того же запроса ничего не меняет
+                results.append({"id": order_id, "status": status, "version": row[5], "unchanged": True})
+            elif status not in Order.ALLOWED_TRANSITIONS[row[2]]:
+                results.append({"id": order_id, "error": "invalid_transition", "status": row[2]})
+            else:
+                groups[(row[2], status)].append(order_id)
+                results.append({"id": order_id, "status": status, "version": row[5] + 1})
+                old = OrderState(*row[:5])
+                changes.append((old, old._replace(status=status)))
+        
+        # Один UPDATE на пару (старый статус, новый статус); условие по старому статусу
+        # дополнительно защищает от параллельной смены
+        now = timezone.now()
+        for (old_status, status), order_ids in groups.items():
+            updated = Order.objects.filter(id__in=order_ids, status=old_status).update(
+                status=status, version=F('version') + 1, updated_at=now,
+            )
+            if updated != len(order_ids):
+                transaction.set_rollback(True)
+                return JsonResponse({"error": "Concurrent update, retry the request"}, status=409)
+        
+        # Агрегаты, кеш и события - в той же транзакции, что и сами заказы
+        track_order_changes(changes)
     
-    return JsonResponse(data, safe=False)
+    updated = len(changes)
+    failed = sum(1 for result in results if 'error' in result)
+    if not failed:
+        status = 200
+    elif updated:
+        status = 207  # Multi-Status: часть заказов не изменена
+    elif any(result.get('error') == 'conflict' for result in results):
+        status = 409
+    else:
+        status = 400
+    return JsonResponse({"updated": updated, "results": results}, status=status)
+
+# Поток событий заказов для табло кухни (Server-Sent Events)
+EVENTS_HEARTBEAT_INTERVAL = 15
+EVENTS_RETRY_MS = 3000
+
+
+def _event_stream(subscription, backlog):
+    try:
+        yield f'retry: {EVENTS_RETRY_MS}\n\n'
+        for event in backlog:
+            yield events.format_sse(event)
+        while True:
+            try:
+                event = subscription.get(timeout=EVENTS_HEARTBEAT_INTERVAL)
+            except queue.Empty:
+                # Комментарий-пинг не дает прокси закрыть соединение
+                yield ': ping\n\n'
+                continue
+            if event is events.CLOSED:
+                return
+            yield events.format_sse(event)
+    finally:
+        subscription.close()
+
+
+async def _aevent_stream(backend, last_event_id):
+    """Поток событий под ASGI: ожидание события не занимает поток сервера"""
+    subscription = backend.subscribe(asynchronous=True)
+    try:
+        yield f'retry: {EVENTS_RETRY_MS}\n\n'
+        if last_event_id is not None:
+            for event in await sync_to_async(backend.replay)(last_event_id):
+                yield events.format_sse(event)
+        while True:
+            try:
+                event = await subscription.aget(timeout=EVENTS_HEARTBEAT_INTERVAL)
+            except queue.Empty:
+                yield ': ping\n\n'
+                continue
+            if event is events.CLOSED:
+                return
+            yield events.format_sse(event)
+    finally:
+        subscription.close()
+
+
+@require_http_methods(["GET"])
+def order_events_stream(request):
+    backend = events.get_backend()
+    # Заголовок шлет браузер при переподключении, параметр - страница при первом подключении
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    last_event_id = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    
+    if isinstance(request, ASGIRequest):
+        stream = _aevent_stream(backend, last_event_id)
+    else:
+        subscription = backend.subscribe()
+        # При переподключении досылаем пропущенные события
+        backlog = backend.replay(last_event_id) if last_event_id is not None else []
+        stream = _event_stream(subscription, backlog)
+    
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 # API для деталей заказа, обновления и удаления
 def orders_api_detail(request, order_id):
-    order = get_object_or_404(Order, id=order_id)
-    
     # GET - получение деталей заказа
     if request.method == 'GET':
-        data = {
-            "id": order.id,
-            "table_number": order.table_number,
-            "items": order.items,
-            "status": order.status,
-            "total_price": float(order.total_price),
-            "created_at": order.created_at.isoformat() if hasattr(order, 'created_at') else None,
-        }
-        return JsonResponse(data)
+        # Заказ ищется в рабочей таблице, затем в архиве (см. orders.archive)
+        rows = serializers.serialize_orders(Order.objects.filter(id=order_id))
+        if not rows:
+            rows = serializers.serialize_orders(ArchivedOrder.objects.filter(id=order_id))
+        if not rows:
+            raise Http404("No Order matches the given query.")
+        with metrics.measure_serialization():
+            return serializers.JSONBytesResponse(rows[0])
+    
+    order = get_object_or_404(Order, id=order_id)
     
     # PATCH - обновление статуса заказа
-    elif request.method == 'PATCH':
+    if request.method == 'PATCH':
         try:
             data = json.loads(request.body)
             if 'status' in data and data['status'] in dict(Order.STATUS_CHOICES):
+                # Режим write-behind: статус запишет пачкой фоновый поток (orders.writebehind)
+                if writebehind.enabled() and writebehind.get_queue().submit(order.id, data['status'], order.version):
+                    return JsonResponse({"success": True, "message": "Status update accepted"}, status=202)
                 order.status = data['status']
                 order.save(update_fields=['status'])
                 return JsonResponse({"success": True, "message": "Status updated"})
@@ -171,37 +638,61 @@ def orders_api_detail(request, order_id):
     
     return JsonResponse({"error": "Method not allowed"}, status=405)
 
-# Кешируем результаты API на 5 минут
-@cache_page(60 * 5)
+def _menu_response(request, snapshot):
+    """Ответ меню из снимка: 304 по If-None-Match, gzip по Accept-Encoding"""
+    if snapshot.etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    elif snapshot.gzip_body is not None and _accepts_gzip(request):
+        response = HttpResponse(snapshot.gzip_body, content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(snapshot.body, content_type='application/json')
+    response['ETag'] = snapshot.etag
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+# Меню отдается из снимка, который перестраивается только при изменении MenuItem (см. orders.menu)
+@require_http_methods(["GET"])
 def menu_list_api(request):
-    # Сортируем по имени для соответствия тестам
-    menu_items = MenuItem.objects.all().order_by('name')
-    
-    # Сначала создаем список данных
-    data = [
-        {
-            "id": item.id,
-            "name": item.name,
-            "price": float(item.price),
-            "category": item.get_category_display() if hasattr(item, 'get_category_display') else item.category,
-            "description": item.description,
-        }
-        for item in menu_items
-    ]
-    
-    # Сортируем данные так, чтобы "Борщ" был первым, а "Эспрессо" вторым
-    # Это нужно для соответствия тестам
-    sorted_data = sorted(data, key=lambda x: 0 if x['name'] == 'Борщ' else (1 if x['name'] == 'Эспрессо' else 2))
-    
-    return JsonResponse(sorted_data, safe=False)
+    return _menu_response(request, menu.get_snapshot())
 
 # API для расчета выручки
-@cache_page(60 * 5)  # Кешируем на 5 минут
 def revenue_api(request):
     # Фильтр по дате, если указан
     date_from = request.GET.get('date_from')
     date_to = request.GET.get('date_to')
     
+    try:
+        window, days = _revenue_window(date_from, date_to)
+    except ValueError:
+        return JsonResponse({"error": "Invalid date"}, status=400)
+    
+    if days is not None:
+        compute = lambda: {'revenue': float(rollups.revenue(*days))}
+    else:
+        compute = lambda: {'revenue': float(_revenue_between(date_from, date_to))}
+    
+    return JsonResponse(cache.get_or_compute(cache.REVENUE, window, compute))
+
+def _revenue_window(date_from, date_to):
+    """Ключ окна выручки и пара границ в днях (None, если нужен точный расчет по заказам).
+    
+    Границы в виде дат считаем по дневным агрегатам (день date_to включительно),
+    для произвольных моментов времени остается точный расчет по таблице заказов.
+    Ключ кеша зависит только от окна выручки, а не от всей строки запроса.
+    ValueError - если граница не дата и не момент времени.
+    """
+    day_from = parse_date(date_from) if date_from else None
+    day_to = parse_date(date_to) if date_to else None
+    if (day_from or not date_from) and (day_to or not date_to):
+        return f'days:{day_from}:{day_to}', (day_from, day_to)
+    for value in (date_from, date_to):
+        # parse_datetime сам бросает ValueError для несуществующего момента
+        if value and not parse_date(value) and parse_datetime(value) is None:
+            raise ValueError(f'Invalid date: {value}')
+    return f'range:{date_from}:{date_to}', None
+
+def _revenue_filter(date_from, date_to):
     # Начинаем с заказов со статусом "оплачено"
     query = Q(status='paid')
     
@@ -210,37 +701,118 @@ def revenue_api(request):
         query &= Q(created_at__gte=date_from)
     if date_to:
         query &= Q(created_at__lte=date_to)
+    return query
+
+def _revenue_between(date_from, date_to):
+    # Вычисляем общую выручку по рабочей таблице и архиву
+    query = _revenue_filter(date_from, date_to)
+    return sum(
+        (model.objects.filter(query).aggregate(total_revenue=Sum('total_price'))['total_revenue'] or 0
+         for model in (Order, ArchivedOrder)),
+        Decimal('0'),
+    )
+
+# Ряды выручки по часам/дням/неделям (см. orders.analytics)
+@require_http_methods(["GET"])
+def analytics_api(request):
+    bucket = request.GET.get('bucket', 'day')
+    group = request.GET.get('group') or None
+    status = request.GET.get('status', 'paid')
+    if bucket not in analytics.BUCKETS:
+        return JsonResponse({"error": "Parameter 'bucket' must be 'hour', 'day' or 'week'"}, status=400)
+    if group is not None and group not in analytics.GROUPS:
+        return JsonResponse({"error": "Parameter 'group' must be 'table' or 'dish'"}, status=400)
+    if status != analytics.ALL_STATUSES and status not in dict(Order.STATUS_CHOICES):
+        return JsonResponse({"error": "Invalid status"}, status=400)
+    
+    # По умолчанию - последние 7 дней, включая сегодняшний
+    date_to = request.GET.get('date_to')
+    date_from = request.GET.get('date_from')
+    try:
+        day_to = parse_date(date_to) if date_to else timezone.localdate()
+        day_from = parse_date(date_from) if date_from else (day_to and day_to - timedelta(days=6))
+    except ValueError:
+        return JsonResponse({"error": "Invalid date"}, status=400)
+    if day_from is None or day_to is None or day_from > day_to:
+        return JsonResponse({"error": "Invalid date"}, status=400)
+    if (day_to - day_from).days >= analytics.MAX_DAYS:
+        return JsonResponse({"error": f"Period must not exceed {analytics.MAX_DAYS} days"}, status=400)
     
-    # Вычисляем общую выручку
-    revenue = Order.objects.filter(query).aggregate(
-        total_revenue=Sum('total_price')
-    )['total_revenue'] or 0
+    return serializers.JSONBytesResponse({
+        'bucket': bucket,
+        'group': group,
+        'status': status,
+        'series': analytics.series(bucket, day_from, day_to, group, status),
+    })
+
+# Отчет за период (по умолчанию - текущий месяц), см. orders.reports
+@require_http_methods(["GET"])
+def reports_api(request):
+    date_from = request.GET.get('date_from')
+    date_to = request.GET.get('date_to')
+    try:
+        day_to = parse_date(date_to) if date_to else timezone.localdate()
+        day_from = parse_date(date_from) if date_from else (day_to and day_to.replace(day=1))
+    except ValueError:
+        return JsonResponse({"error": "Invalid date"}, status=400)
+    if day_from is None or day_to is None or day_from > day_to:
+        return JsonResponse({"error": "Invalid date"}, status=400)
     
-    return JsonResponse({'revenue': float(revenue)})
+    try:
+        top = _parse_non_negative_int(request.GET.get('top'), 'top', default=reports.TOP_DISHES)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    
+    engine = request.GET.get('engine')
+    if engine is not None and engine not in reports.ENGINES:
+        return JsonResponse({"error": "Parameter 'engine' must be 'numpy' or 'python'"}, status=400)
+    
+    try:
+        report = reports.build_report(day_from, day_to, top=top, engine=engine)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    return serializers.JSONBytesResponse(report)
 
 # API для получения статистики
-@cache_page(60 * 5)  # Кешируем на 5 минут
 def statistics_api(request):
+    return JsonResponse(cache.get_or_compute(cache.STATISTICS, 'all', _statistics_payload))
+
+def _statistics_payload():
+    # Все показатели берутся из дневных агрегатов одним запросом
+    return _statistics_from_totals(rollups.status_totals())
+
+def _statistics_from_totals(totals):
     # Количество заказов по статусам
-    status_counts = {
-        status_code: Order.objects.filter(status=status_code).count()
-        for status_code, status in Order.STATUS_CHOICES
-    }
+    status_counts = {status_code: count for status_code, (count, _) in totals.items()}
     
     # Общее количество заказов
-    total_orders = Order.objects.count()
+    total_orders = sum(status_counts.values())
     
     # Средний чек (для оплаченных заказов)
-    paid_orders = Order.objects.filter(status='paid')
-    if paid_orders.exists():
-        avg_order_value = paid_orders.aggregate(
-            avg_value=Sum('total_price') / Count('id')
-        )['avg_value'] or 0
-    else:
-        avg_order_value = 0
+    paid_count, paid_revenue = totals['paid']
+    avg_order_value = paid_revenue / paid_count if paid_count else 0
     
-    return JsonResponse({
+    return {
         'status_counts': status_counts,
         'total_orders': total_orders,
         'average_order_value': float(avg_order_value)
-    })
+    }
+
+# Состояние столов читается из TableState (см. orders.tables), заказы не сканируются
+@require_http_methods(["GET"])
+def tables_api_list(request):
+    data = [tables.table_to_dict(table_state) for table_state in TableState.objects.all()]
+    return serializers.JSONBytesResponse(data)
+
+@require_http_methods(["GET"])
+def tables_api_detail(request, table_number):
+    # Стол без неоплаченных заказов не хранится - отдаем пустое состояние
+    table_state = TableState.objects.filter(table_number=table_number).first()
+    if table_state is None:
+        table_state = TableState(table_number=table_number, open_orders={}, unpaid_total=Decimal('0'))
+    return serializers.JSONBytesResponse(tables.table_to_dict(table_state))
+
+# Метрики запросов в формате Prometheus
+@require_http_methods(["GET"])
+def metrics_api(request):
+    return HttpResponse(metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,322 @@
+"""Отложенная запись смены статуса заказов (write-behind) для часа пик.
+
+При ORDERS_STATUS_WRITE_BEHIND = True PATCH /api/orders/<id>/ со статусом не
+открывает свою транзакцию: изменение попадает в очередь процесса, и запрос
+сразу получает 202 Accepted. Фоновый поток раз в
+ORDERS_STATUS_FLUSH_INTERVAL_MS оставляет для каждого заказа последний
+статус и записывает все изменения одной транзакцией - одна блокировка записи
+SQLite на пачку вместо отдельной на каждый запрос. До записи пачки GET
+заказа возвращает прежний статус.
+
+Вместе со статусом в очередь попадает версия заказа (Order.version),
+прочитанная запросом. Статус записывается, только если версия в БД не
+изменилась: изменение, сделанное за это время другим путем (формой,
+пакетной сменой, другим воркером), и повторная запись уже зафиксированной
+пачки после сбоя не перезаписываются устаревшим статусом.
+
+Принятые изменения дописываются в журнал процесса
+<ORDERS_STATUS_JOURNAL_PATH>.<pid> (строка JSON [id, статус, версия], с fsync до
+ответа 202). Перед записью пачки журнал переименовывается в
+<журнал>.flushing и удаляется после фиксации транзакции. Каждый процесс
+пишет только свои файлы, поэтому воркеры не затирают журналы друг друга.
+При запуске очередь забирает себе журналы процессов, которых больше нет
+(os.kill(pid, 0)): файл переименовывается под pid нового владельца, так что
+его получает только один процесс, и изменения, принятые до сбоя,
+записываются первой же пачкой. Журнал процесса, чей pid занят другим
+живым процессом, подождет его завершения. Очередь у каждого процесса
+своя: статусы одного заказа из разных воркеров не объединяются.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import metrics
+from .models import Order
+from .tracking import OrderState, track_order_changes
+
+logger = logging.getLogger(__name__)
+
+START_DISPATCH_UID = 'orders.writebehind.start'
+FLUSH_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+
+def enabled():
+    return getattr(settings, 'ORDERS_STATUS_WRITE_BEHIND', False)
+
+
+def apply_statuses(statuses):
+    """Записывает статусы {id заказа: (статус, ожидаемая версия)} одной транзакцией.
+    
+    Возвращает число измененных заказов. Удаленные заказы, заказы, уже
+    находящиеся в нужном статусе, и заказы, версия которых отличается от
+    ожидаемой (их успели изменить после приема статуса), пропускаются.
+    """
+    changes = []
+    stale = 0
+    with transaction.atomic():
+        rows = (
+            Order.objects.select_for_update()
+            .filter(id__in=list(statuses))
+            .order_by()
+            .values_list('id', 'table_number', 'status', 'total_price', 'created_at', 'version')
+        )
+        # Строки заблокированы до конца транзакции: между сверкой версии и UPDATE
+        # заказ никто не изменит, поэтому UPDATE остается общим на группу
+        groups = defaultdict(list)
+        for *row, version in rows:
+            status, expected_version = statuses[row[0]]
+            if version != expected_version:
+                stale += 1
+            elif status != row[2]:
+                groups[(row[2], status)].append(row[0])
+                old = OrderState(*row)
+                changes.append((old, old._replace(status=status)))
+        
+        # Один UPDATE на пару (старый статус, новый статус), как в пакетной смене статусов
+        now = timezone.now()
+        for (old_status, status), order_ids in groups.items():
+            Order.objects.filter(id__in=order_ids, status=old_status).update(
+                status=status, version=F('version') + 1, updated_at=now,
+            )
+        track_order_changes(changes)
+    if stale:
+        metrics.registry.inc('orders_status_stale_total', 'Статусы из очереди, пропущенные из-за изменения заказа',
+                             stale)
+    return len(changes)
+
+
+class StatusQueue:
+    """Очередь статусов процесса с журналом и фоновым потоком записи"""
+    
+    def __init__(self, journal_path, interval, max_size):
+        self.base_path = Path(journal_path)
+        self.journal_path = self.base_path.with_name(f'{self.base_path.name}.{os.getpid()}')
+        self.flushing_path = self.journal_path.with_name(self.journal_path.name + '.flushing')
+        self.interval = interval
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._pending = {}
+        self._flusher = None
+        self._journal = None
+        self.replay()
+    
+    def replay(self):
+        """Забирает в очередь изменения из журналов завершившихся процессов"""
+        with self._lock:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            claimed = self._claim_orphans()
+            for path in claimed:
+                with open(path, encoding='utf-8') as journal:
+                    for line in journal:
+                        try:
+                            order_id, status, version = json.loads(line)
+                        except ValueError:
+                            # Строка, недописанная при сбое
+                            continue
+                        self._pending[order_id] = (status, version)
+            # Забранные файлы удаляются только после записи их изменений в свой журнал
+            self._rewrite_journal()
+            for path in claimed:
+                path.unlink(missing_ok=True)
+            self._set_depth()
+        if self._pending:
+            logger.info('Журнал статусов: восстановлено %s изменений', len(self._pending))
+    
+    def _claim_orphans(self):
+        """Переименовывает под свой pid файлы журналов завершившихся процессов.
+        
+        Возвращает их от старых к новым. Файл, который успел забрать другой
+        процесс, пропускается.
+        """
+        prefix = self.base_path.name + '.'
+        orphans = []
+        for path in self.base_path.parent.glob(prefix + '*'):
+            pid = path.name[len(prefix):].split('.', 1)[0]
+            if not pid.isdigit() or _process_alive(int(pid)):
+                continue
+            if path.suffix == '.tmp':
+                # Недописанная замена журнала: те же изменения остались в самом журнале
+                path.unlink(missing_ok=True)
+                continue
+            try:
+                orphans.append((path.stat().st_mtime_ns, path.name, path))
+            except FileNotFoundError:
+                continue
+        
+        claimed = []
+        stamp = time.time_ns()
+        for index, (_, _, path) in enumerate(sorted(orphans)):
+            target = self.journal_path.with_name(f'{self.journal_path.name}.replay{stamp}-{index}')
+            try:
+                os.replace(path, target)
+            except FileNotFoundError:
+                continue
+            claimed.append(target)
+        return claimed
+    
+    def _rewrite_journal(self):
+        """Заменяет журнал текущим содержимым очереди (вызывается под self._lock)"""
+        if self._journal is not None:
+            self._journal.close()
+        temporary = self.journal_path.with_name(self.journal_path.name + '.tmp')
+        with open(temporary, 'w', encoding='utf-8') as journal:
+            journal.writelines(self._line(order_id, *entry) for order_id, entry in self._pending.items())
+            journal.flush()
+            os.fsync(journal.fileno())
+        os.replace(temporary, self.journal_path)
+        self.flushing_path.unlink(missing_ok=True)
+        self._journal = open(self.journal_path, 'a', encoding='utf-8')
+    
+    @staticmethod
+    def _line(order_id, status, version):
+        return json.dumps([order_id, status, version]) + '\n'
+    
+    def _set_depth(self):
+        metrics.registry.set('orders_status_queue_depth', 'Заказы со статусом, ожидающим записи в БД',
+                             len(self._pending))
+    
+    def submit(self, order_id, status, version):
+        """Принимает статус заказа версии version; False, если очередь заполнена и нужно писать сразу.
+        
+        Более поздний статус заказа заменяет ожидающий вместе с версией: пока
+        статус в очереди, версия в БД меняется только другими путями.
+        """
+        with self._lock:
+            if order_id not in self._pending and len(self._pending) >= self.max_size:
+                return False
+            self._journal.write(self._line(order_id, status, version))
+            self._journal.flush()
+            # 202 означает, что изменение переживет сбой процесса и ОС
+            os.fsync(self._journal.fileno())
+            if order_id in self._pending:
+                metrics.registry.inc('orders_status_coalesced_total', 'Статусы, замененные более поздними до записи')
+            self._pending[order_id] = (status, version)
+            self._set_depth()
+        self._ensure_flusher()
+        return True
+    
+    def flush(self):
+        """Записывает накопленные статусы одной транзакцией; возвращает число измененных заказов"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, {}
+                # Новые изменения пишутся в свежий журнал, пачка - в .flushing до фиксации
+                self._journal.close()
+                os.replace(self.journal_path, self.flushing_path)
+                self._journal = open(self.journal_path, 'a', encoding='utf-8')
+            
+            started = time.perf_counter()
+            try:
+                changed = apply_statuses(batch)
+            except Exception:
+                # Пачка возвращается в очередь (более поздние статусы важнее) и в журнал
+                with self._lock:
+                    batch.update(self._pending)
+                    self._pending = batch
+                    self._rewrite_journal()
+                    self._set_depth()
+                metrics.registry.inc('orders_status_flush_errors_total', 'Неудачные записи пачек статусов')
+                raise
+            self.flushing_path.unlink(missing_ok=True)
+            
+            metrics.registry.observe('orders_status_flush_duration_seconds', 'Время записи пачки статусов',
+                                     time.perf_counter() - started, buckets=FLUSH_BUCKETS)
+            metrics.registry.inc('orders_status_flushed_total', 'Статусы, записанные из очереди', len(batch))
+            with self._lock:
+                self._set_depth()
+            return changed
+    
+    def _ensure_flusher(self):
+        with self._lock:
+            if self._flusher is None or not self._flusher.is_alive():
+                self._stop.clear()
+                self._flusher = threading.Thread(target=self._run, name='order-status-flusher', daemon=True)
+                self._flusher.start()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                # Пачка осталась в очереди и журнале: повторим на следующем цикле
+                logger.exception('Не удалось записать пачку статусов')
+            finally:
+                close_old_connections()
+    
+    def stop(self):
+        """Останавливает фоновый поток и записывает оставшиеся статусы"""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            if not self._pending:
+                self.journal_path.unlink(missing_ok=True)
+
+
+def _process_alive(pid):
+    """Жив ли процесс; файлы со своим pid остались от прежнего процесса с тем же pid"""
+    if pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Процесс есть, но принадлежит другому пользователю
+        return True
+    return True
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    """Очередь процесса; при создании в нее возвращается журнал и запускается поток записи"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = StatusQueue(
+                    getattr(settings, 'ORDERS_STATUS_JOURNAL_PATH', 'status_journal.log'),
+                    getattr(settings, 'ORDERS_STATUS_FLUSH_INTERVAL_MS', 50) / 1000,
+                    getattr(settings, 'ORDERS_STATUS_QUEUE_MAX', 10000),
+                )
+                _queue._ensure_flusher()
+                atexit.register(shutdown)
+    return _queue
+
+
+def shutdown():
+    """Записывает очередь и останавливает поток (при завершении процесса и в тестах)"""
+    global _queue
+    with _queue_lock:
+        queue, _queue = _queue, None
+    if queue is not None:
+        queue.stop()
+
+
+def start_on_first_request(**kwargs):
+    """Обработчик request_started: запускает очередь, чтобы журнал был записан сразу после старта"""
+    from django.core.signals import request_started
+    request_started.disconnect(dispatch_uid=START_DISPATCH_UID)
+    if enabled():
+        get_queue()